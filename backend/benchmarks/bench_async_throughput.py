@@ -0,0 +1,69 @@
+"""
+Concurrent-request throughput of the RAG path against a local stub LLM and
+embedding server: the old blocking call on the event loop versus the bounded
+thread pool and the native async pipeline used by /generate.
+
+    python backend/benchmarks/bench_async_throughput.py --requests 32 --latency 0.2
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from langchain_core.vectorstores import InMemoryVectorStore
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+import backend.main as main_module
+from backend.rag import get_qa_chain
+from backend.schemas import NarrativeRequest
+from backend.simple_agent import SimpleSearchAgent
+from backend.benchmarks.stub_openai import StubOpenAIServer
+
+def build_processor(base_url: str):
+    embeddings = OpenAIEmbeddings(base_url=base_url, api_key="stub", check_embedding_ctx_length=False)
+    store = InMemoryVectorStore(embedding=embeddings)
+    agent = SimpleSearchAgent(os.path.join(os.path.dirname(__file__), "../data/raw"))
+    store.add_texts([d["content"] for d in agent.documents], metadatas=[{"source": d["source"]} for d in agent.documents])
+    llm = ChatOpenAI(base_url=base_url, api_key="stub", model="stub")
+    return get_qa_chain(llm=llm, retriever=store.as_retriever(search_kwargs={"k": 5}))
+
+async def blocking(request):
+    # What /generate used to do: the sync chain call directly inside the async handler
+    return main_module.process_query(query=request.query, age=request.user_age,
+                                     education=request.education_level, tone=request.tone)
+
+async def thread_pool(request):
+    return await main_module.run_blocking(main_module.process_query, query=request.query, age=request.user_age,
+                                          education=request.education_level, tone=request.tone)
+
+async def native_async(request):
+    return await main_module.run_query(request)
+
+async def measure(fn, requests):
+    start = time.perf_counter()
+    await asyncio.gather(*(fn(r) for r in requests))
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub LLM latency in seconds")
+    args = parser.parse_args()
+
+    with StubOpenAIServer(latency=args.latency) as server:
+        main_module.process_query = build_processor(server.base_url)
+        requests = [NarrativeRequest(query=f"Tell me about the Owu Wars ({i})") for i in range(args.requests)]
+        asyncio.run(native_async(requests[0]))  # warm up connections and chains
+
+        print(f"{args.requests} concurrent requests, stub LLM latency {args.latency * 1000:.0f} ms, "
+              f"blocking pool of {main_module.blocking_pool._max_workers} threads")
+        for name, fn in [("blocking on event loop", blocking), ("bounded thread pool", thread_pool),
+                         ("native async (ainvoke)", native_async)]:
+            elapsed = asyncio.run(measure(fn, requests))
+            print(f"{name:24s} {elapsed:6.2f} s  {args.requests / elapsed:7.1f} req/s")
+
+if __name__ == "__main__":
+    main()
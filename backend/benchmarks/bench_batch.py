@@ -0,0 +1,96 @@
+"""
+Throughput of one POST /generate/batch against N sequential POST /generate calls,
+in RAG mode against the local stub LLM/embedding server and in local search mode.
+A quarter of the worksheet questions are repeats, as in real classroom batches.
+
+    python backend/benchmarks/bench_batch.py --requests 32 --latency 0.2
+"""
+import sys
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+import httpx
+from langchain_core.vectorstores import InMemoryVectorStore
+from langchain_openai import ChatOpenAI
+
+import backend.main as main_module
+from backend.embeddings import CachedEmbeddings
+from backend.rag import get_qa_chain
+from backend.simple_agent import SimpleSearchAgent
+from backend.benchmarks.bench_ingest import BatchEmbeddings
+from backend.benchmarks.stub_openai import StubOpenAIServer
+
+RAW_DIR = os.path.join(os.path.dirname(__file__), "../data/raw")
+
+def build_processor(base_url: str, cache_dir: str):
+    embeddings = CachedEmbeddings(BatchEmbeddings(base_url), "stub", cache_dir=cache_dir)
+    store = InMemoryVectorStore(embedding=embeddings)
+    agent = SimpleSearchAgent(RAW_DIR)
+    store.add_texts([d["content"] for d in agent.documents], metadatas=[{"source": d["source"]} for d in agent.documents])
+    llm = ChatOpenAI(base_url=base_url, api_key="stub", model="stub")
+    return get_qa_chain(llm=llm, retriever=store.as_retriever(search_kwargs={"k": 5}), embeddings=embeddings)
+
+def worksheet(n: int) -> list:
+    unique = max(1, n - n // 4)
+    return [{"query": f"Worksheet question {i % unique}: what happened during the Owu Wars?"} for i in range(n)]
+
+async def sequential(payloads) -> float:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main_module.app), base_url="http://bench") as client:
+        start = time.perf_counter()
+        for payload in payloads:
+            (await client.post("/generate", json=payload)).raise_for_status()
+        return time.perf_counter() - start
+
+async def batch(payloads) -> float:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main_module.app), base_url="http://bench",
+                                 timeout=None) as client:
+        start = time.perf_counter()
+        async with client.stream("POST", "/generate/batch", json=payloads) as response:
+            lines = [line async for line in response.aiter_lines() if line]
+        assert len(lines) == len(payloads)
+        return time.perf_counter() - start
+
+def report(mode: str, n: int, seq: float, bat: float):
+    print(f"{mode:13s} sequential {seq:6.2f} s ({n / seq:7.1f} req/s)   batch {bat:6.2f} s ({n / bat:7.1f} req/s)   "
+          f"speedup {seq / bat:5.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub LLM latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=main_module.BATCH_CONCURRENCY)
+    args = parser.parse_args()
+    main_module.BATCH_CONCURRENCY = args.concurrency
+    payloads = worksheet(args.requests)
+    print(f"{args.requests} requests ({len({p['query'] for p in payloads})} unique), "
+          f"stub LLM latency {args.latency * 1000:.0f} ms, batch concurrency {args.concurrency}")
+
+    with StubOpenAIServer(latency=args.latency, embedding_latency=0.02) as server:
+        timings = []
+        for run in (sequential, batch):
+            cache_dir = tempfile.mkdtemp(prefix="owu_emb_")
+            try:
+                main_module.process_query = build_processor(server.base_url, cache_dir)
+                main_module.response_cache.clear()
+                timings.append(asyncio.run(run(payloads)))
+            finally:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+        report("RAG", args.requests, *timings)
+
+    main_module.process_query = None
+    main_module.get_qa_chain = None
+    main_module.local_agent.refresh()
+    timings = []
+    for run in (sequential, batch):
+        main_module.response_cache.clear()
+        timings.append(asyncio.run(run(payloads)))
+    report("Local Search", args.requests, *timings)
+
+if __name__ == "__main__":
+    main()
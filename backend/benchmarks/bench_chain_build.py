@@ -0,0 +1,73 @@
+"""
+Per-call overhead of the RAG chain: building PromptTemplate + RetrievalQA on every
+request (the previous behaviour) versus reusing one compiled chain per persona.
+Uses a fake LLM and an in-memory retriever, so no API key or vector store is needed.
+
+    python backend/benchmarks/bench_chain_build.py --calls 200
+"""
+import sys
+import os
+import json
+import time
+import argparse
+from typing import List
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from langchain.prompts import PromptTemplate
+from langchain.chains import RetrievalQA
+from langchain_core.documents import Document
+from langchain_core.language_models.fake import FakeListLLM
+from langchain_core.retrievers import BaseRetriever
+
+from backend.personalization import adjust_prompt
+from backend.rag import PROMPT_TEMPLATE, get_qa_chain, parse_output
+
+ANSWER = json.dumps({"narrative": "Owu-Ipole fell around 1825.", "timeline": [{"year": "1825", "event": "Fall of Owu-Ipole"}], "sources": []})
+
+class StaticRetriever(BaseRetriever):
+    docs: List[Document]
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        return self.docs
+
+def per_request_chain(llm, retriever):
+    def process_query(query, age, education, tone):
+        prompt = PromptTemplate(
+            template=PROMPT_TEMPLATE,
+            input_variables=["context", "question"],
+            partial_variables={"system_instruction": adjust_prompt(query, age, education, tone)}
+        )
+        chain = RetrievalQA.from_chain_type(
+            llm=llm, chain_type="stuff", retriever=retriever,
+            return_source_documents=True, chain_type_kwargs={"prompt": prompt}
+        )
+        result = chain.invoke({"query": query})
+        return parse_output(result["result"], result["source_documents"])
+    return process_query
+
+def run(process_query, calls: int) -> float:
+    personas = [(10, "Child", "Storyteller"), (16, "General", "Neutral"), (40, "Academic", "Formal")]
+    process_query("warm up", 25, "General", "Neutral")
+    start = time.perf_counter()
+    for i in range(calls):
+        age, education, tone = personas[i % len(personas)]
+        process_query("Tell me about the Owu Wars", age, education, tone)
+    return (time.perf_counter() - start) * 1000 / calls
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    llm = FakeListLLM(responses=[ANSWER])
+    retriever = StaticRetriever(docs=[Document(page_content="The Owu Wars (1821-1825)...", metadata={"source": "wars.txt"})] * 5)
+
+    before = run(per_request_chain(llm, retriever), args.calls)
+    after = run(get_qa_chain(llm=llm, retriever=retriever), args.calls)
+    print(f"Per-request chain construction: {before:.3f} ms/call")
+    print(f"Cached chain per persona:       {after:.3f} ms/call")
+    print(f"Overhead removed:               {before - after:.3f} ms/call")
+
+if __name__ == "__main__":
+    main()
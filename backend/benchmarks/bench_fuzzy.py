@@ -0,0 +1,75 @@
+"""
+Compares the old per-paragraph difflib fuzzy check with the vocabulary-level
+FuzzyIndex used by SimpleSearchAgent.
+
+    python backend/benchmarks/bench_fuzzy.py --scale 20
+"""
+import sys
+import os
+import time
+import random
+import difflib
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.simple_agent import SimpleSearchAgent
+
+QUERIES = ["Ajiboshin", "Abeokutta", "Olowwu", "lakoda", "Ijebbu", "Egbba", "warriors", "destroyd"]
+
+def scale_corpus(agent: SimpleSearchAgent, scale: int):
+    """Replicates the corpus, mutating a few tokens per copy so the vocabulary grows too."""
+    rng = random.Random(0)
+    originals = list(agent.documents)
+    for copy in range(1, scale):
+        for doc in originals:
+            words = doc["content"].split()
+            for _ in range(max(1, len(words) // 10)):
+                i = rng.randrange(len(words))
+                words[i] = words[i] + rng.choice("aeiou")
+            content = " ".join(words)
+            agent.documents.append(dict(doc, content=content))
+            agent.normalized.append(agent.normalize_text(content))
+    agent.build_index()
+
+def legacy_fuzzy(agent: SimpleSearchAgent, keyword: str):
+    hits = set()
+    for doc_id, normalized in enumerate(agent.normalized):
+        if difflib.get_close_matches(keyword, normalized.split(), n=1, cutoff=0.8):
+            hits.add(doc_id)
+    return hits
+
+def indexed_fuzzy(agent: SimpleSearchAgent, keyword: str):
+    hits = set()
+    for term in agent.fuzzy.close_terms(keyword):
+        hits.update(agent.index[term])
+    return hits
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=10)
+    args = parser.parse_args()
+
+    data_dir = os.path.join(os.path.dirname(__file__), "../data/raw")
+    agent = SimpleSearchAgent(data_dir)
+    scale_corpus(agent, args.scale)
+    print(f"Corpus: {len(agent.documents)} paragraphs, {len(agent.index)} distinct terms")
+
+    total_legacy = total_indexed = 0.0
+    for query in QUERIES:
+        keyword = agent.normalize_text(query)
+        expected, legacy_ms = timed(legacy_fuzzy, agent, keyword)
+        got, indexed_ms = timed(indexed_fuzzy, agent, keyword)
+        assert got == expected, f"Mismatch for {query}"
+        total_legacy += legacy_ms
+        total_indexed += indexed_ms
+        print(f"{query:12s} docs={len(got):5d}  difflib per paragraph {legacy_ms:9.2f} ms  fuzzy index {indexed_ms:7.2f} ms")
+    print(f"Total: {total_legacy:.1f} ms -> {total_indexed:.1f} ms ({total_legacy / max(total_indexed, 1e-9):.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Retrieval latency of vector-only, lexical-only and hybrid (RRF) retrieval over
+copies of data/raw. The query embedding is delayed by --embed-latency to stand in
+for a remote embedding call; the hybrid retriever overlaps lexical scoring with it,
+and the sequential column shows what running the branches back to back would cost.
+
+    python backend/benchmarks/bench_hybrid.py --copies 20 --embed-latency 0.03
+"""
+import sys
+import os
+import time
+import shutil
+import tempfile
+import argparse
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.hybrid import HybridRetriever, lexical_documents, reciprocal_rank_fusion
+from backend.shared_agent import SharedSearchAgent
+from backend.vector_index import NumpyVectorStore
+from backend.benchmarks.bench_ingest import build_archive
+
+QUERIES = ["Ajibosin", "Owu wars 1821", "Who founded the Owu kingdom?", "oriki of Olowu", "Abeokuta settlement"]
+
+class SlowQueryEmbedding(DeterministicFakeEmbedding):
+    latency: float = 0.0
+
+    def embed_query(self, text):
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+def timed(fn, repeats: int) -> dict:
+    samples = []
+    for _ in range(repeats):
+        for query in QUERIES:
+            start = time.perf_counter()
+            fn(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {"p50_ms": round(statistics.median(samples), 2), "p95_ms": round(samples[int(len(samples) * 0.95)], 2)}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copies", type=int, default=20)
+    parser.add_argument("--embed-latency", type=float, default=0.03)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    data_dir = build_archive(args.copies)
+    index_dir = tempfile.mkdtemp(prefix="owu_index_")
+    try:
+        agent = SharedSearchAgent(data_dir)
+        paragraphs = agent.current().documents
+        embedding = SlowQueryEmbedding(size=384, latency=args.embed_latency)
+        store = NumpyVectorStore.from_texts([p["content"] for p in paragraphs], embedding, directory=index_dir,
+                                            metadatas=[{"source": p["source"]} for p in paragraphs])
+        vector = store.as_retriever(search_kwargs={"k": args.candidates})
+        hybrid = HybridRetriever(vector_retriever=vector, lexical_agent=agent, k=5, candidates=args.candidates)
+
+        def sequential(query):
+            docs = vector.invoke(query)
+            lexical = lexical_documents(agent.current(), query, args.candidates)
+            return reciprocal_rank_fusion([docs, lexical])[:5]
+
+        print(f"{len(paragraphs)} paragraphs, {args.candidates} candidates per branch, "
+              f"query embedding latency {args.embed_latency * 1000:.0f} ms")
+        for name, fn in [
+            ("vector", lambda q: vector.invoke(q)[:5]),
+            ("lexical", lambda q: lexical_documents(agent.current(), q, 5)),
+            ("hybrid-seq", sequential),
+            ("hybrid", hybrid.invoke),
+        ]:
+            print(f"{name:11s} {timed(fn, args.repeats)}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
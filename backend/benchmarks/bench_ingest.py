@@ -0,0 +1,80 @@
+"""
+Ingestion pipeline throughput against the local stub embedding server: one big
+embedding call with a single loader process versus batched, concurrent embedding
+with a process pool for loading.
+
+    python backend/benchmarks/bench_ingest.py --copies 50
+"""
+import sys
+import os
+import shutil
+import tempfile
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import InMemoryVectorStore
+from openai import OpenAI
+
+from backend.ingest import ingest_documents
+from backend.benchmarks.stub_openai import StubOpenAIServer
+
+RAW_DIR = os.path.join(os.path.dirname(__file__), "../data/raw")
+
+class BatchEmbeddings(Embeddings):
+    """
+    One /embeddings request per embed_documents call, like OpenAIEmbeddings with
+    token checking enabled (which needs tiktoken downloads, so it is avoided here).
+    """
+
+    def __init__(self, base_url: str):
+        self.client = OpenAI(base_url=base_url, api_key="stub")
+
+    def embed_documents(self, texts):
+        response = self.client.embeddings.create(input=texts, model="stub")
+        return [item.embedding for item in response.data]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+def build_archive(copies: int) -> str:
+    data_dir = tempfile.mkdtemp(prefix="owu_ingest_")
+    for i in range(copies):
+        for name in os.listdir(RAW_DIR):
+            if name.endswith(".txt"):
+                with open(os.path.join(RAW_DIR, name), encoding="utf-8") as f:
+                    text = f.read()
+                with open(os.path.join(data_dir, f"{i:04d}_{name}"), "w", encoding="utf-8") as f:
+                    f.write(f"Copy {i}.\n\n{text}")
+    return data_dir
+
+def run(base_url: str, data_dir: str, **kwargs) -> dict:
+    db_dir = tempfile.mkdtemp(prefix="owu_db_")
+    try:
+        embeddings = BatchEmbeddings(base_url)
+        return ingest_documents(data_dir=data_dir, db_dir=db_dir, embeddings=embeddings,
+                                vectorstore_factory=lambda emb: InMemoryVectorStore(embedding=emb), **kwargs)
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copies", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub embedding latency per request")
+    parser.add_argument("--item-latency", type=float, default=0.002, help="Extra stub latency per embedded text")
+    args = parser.parse_args()
+
+    data_dir = build_archive(args.copies)
+    try:
+        with StubOpenAIServer(embedding_latency=args.latency, embedding_item_latency=args.item_latency) as server:
+            # The old behaviour: everything in one add_documents call, loaded in-process
+            sequential = run(server.base_url, data_dir, batch_size=10 ** 6, concurrency=1, workers=1)
+            pipelined = run(server.base_url, data_dir, batch_size=64, concurrency=8)
+        for name, report in [("sequential", sequential), ("pipelined", pipelined)]:
+            print(f"{name:10s} {report['chunks_added']} chunks  {report['chunks_per_second']:8.1f} chunks/s  timings {report['timings']}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
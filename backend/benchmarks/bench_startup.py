@@ -0,0 +1,81 @@
+"""
+Cold-start cost of the API: `import backend.main` in a fresh interpreter, and the
+time from launching uvicorn to the first successful POST /generate, with the RAG
+warm-up in the background (default) and blocking startup (RAG_WARMUP=blocking,
+which is how startup behaved before the warm-up moved off the critical path).
+
+    python backend/benchmarks/bench_startup.py --runs 3
+"""
+import sys
+import os
+import json
+import time
+import socket
+import argparse
+import subprocess
+import statistics
+import urllib.request
+import urllib.error
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+
+IMPORT_SNIPPET = ("import time; start = time.perf_counter(); import backend.main; "
+                  "print((time.perf_counter() - start) * 1000)")
+
+def import_ms() -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, capture_output=True, text=True,
+                            check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def request(url: str, payload: dict = None) -> dict:
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=30) as response:
+        return json.loads(response.read())
+
+def first_response(warmup: str) -> dict:
+    """Seconds from process launch to the first /generate answer and to RAG being ready."""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, RAG_WARMUP=warmup)
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port),
+                               "--log-level", "warning"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                answer = request(f"{base}/generate", {"query": "Owu Wars"})
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited during startup")
+                time.sleep(0.005)
+        first = time.perf_counter() - start
+        while request(f"{base}/status").get("rag_state", "ready") in ("cold", "warming"):
+            time.sleep(0.01)
+        ready = time.perf_counter() - start
+        return {"first_response": first, "rag_ready": ready, "mode": answer["metadata"].get("mode", "RAG")}
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    imports = [import_ms() for _ in range(args.runs)]
+    print(f"import backend.main: median {statistics.median(imports):7.0f} ms")
+    for warmup in ("background", "blocking"):
+        runs = [first_response(warmup) for _ in range(args.runs)]
+        print(f"RAG_WARMUP={warmup:10s} first /generate {statistics.median(r['first_response'] for r in runs):6.2f} s "
+              f"({runs[-1]['mode']})   RAG ready {statistics.median(r['rag_ready'] for r in runs):6.2f} s")
+
+if __name__ == "__main__":
+    main()
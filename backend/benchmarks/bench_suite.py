@@ -0,0 +1,289 @@
+"""
+Reproducible benchmark suite. For each corpus scale (copies of data/raw, see
+corpus.py) it measures:
+
+  load      SimpleSearchAgent.load_data wall time and memory (tracemalloc peak and retained)
+  generate  SimpleSearchAgent.generate latency percentiles and peak allocation per query mix
+  local     end-to-end POST /generate in local search mode, response cache cold and warm
+  rag       end-to-end POST /generate in RAG mode (hybrid retrieval over a NumPy store)
+            against the stub OpenAI server, so only our own overhead is timed
+
+Results go to a JSON file; --compare prints the change against an earlier run and
+exits non-zero when a latency or memory figure regressed past --threshold.
+
+    python backend/benchmarks/bench_suite.py --scales 1 10 100 --out bench.json
+    python backend/benchmarks/bench_suite.py --scales 1 10 100 --compare bench.json
+"""
+import sys
+import os
+import gc
+import io
+import json
+import time
+import shutil
+import asyncio
+import platform
+import tempfile
+import argparse
+import subprocess
+import tracemalloc
+import contextlib
+from typing import Callable, Dict, List
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+import httpx
+
+import backend.main as main_module
+from backend.simple_agent import SimpleSearchAgent
+from backend.shared_agent import SharedSearchAgent
+from backend.benchmarks.corpus import generate_corpus
+
+# Plain, diacritic, misspelled, phrase, oriki and no-match queries
+QUERIES = [
+    "Owu Wars", "What happened to Owu-Ipole?", "Ajíbọ̀sìn", "Olówu kingship", "Abeokutta migration",
+    "oriki of Owu", "praise poetry Ọmọ akọni", "Egba refugees at Abeokuta", "Ife and Ijebu siege",
+    "facial marks", "Aro festival", "quantum chromodynamics",
+]
+
+def percentiles(samples_ms: List[float]) -> dict:
+    ordered = sorted(samples_ms)
+
+    def at(q: float) -> float:
+        position = (len(ordered) - 1) * q
+        low = int(position)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 4),
+        "p50_ms": round(at(0.50), 4),
+        "p90_ms": round(at(0.90), 4),
+        "p99_ms": round(at(0.99), 4),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+def quiet():
+    """Swallows the app's print() logging inside measured sections."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+def timed_ms(fn: Callable, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6, 1)
+
+def traced(fn: Callable):
+    """Runs fn under tracemalloc; returns (result, peak MB, MB still allocated afterwards)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, round(peak / 1e6, 2), round(current / 1e6, 2)
+
+def bench_load(data_dir: str, repeats: int, ranking: str) -> dict:
+    agent = SimpleSearchAgent(data_dir, ranking=ranking)
+    samples = [timed_ms(agent.load_data) for _ in range(repeats)]
+    _, peak, retained = traced(lambda: SimpleSearchAgent(data_dir, ranking=ranking))
+    return dict(percentiles(samples), paragraphs=len(agent.documents), terms=len(agent.index),
+                peak_mb=peak, retained_mb=retained)
+
+def bench_generate(agent: SimpleSearchAgent, rounds: int) -> dict:
+    for query in QUERIES:
+        agent.generate(query, 25, "General", "Neutral")
+    samples = [timed_ms(agent.generate, query, 25, "General", "Neutral") for _ in range(rounds) for query in QUERIES]
+    _, peak, _ = traced(lambda: [agent.generate(query, 25, "General", "Neutral") for query in QUERIES])
+    return dict(percentiles(samples), peak_mb=peak)
+
+async def post_all(payloads: List[dict], rounds: int, cold: bool) -> List[float]:
+    samples = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main_module.app), base_url="http://bench",
+                                 timeout=None) as client:
+        for _ in range(rounds):
+            for payload in payloads:
+                if cold:
+                    main_module.response_cache.clear()
+                start = time.perf_counter()
+                (await client.post("/generate", json=payload)).raise_for_status()
+                samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def bench_endpoint(rounds: int) -> dict:
+    payloads = [{"query": query} for query in QUERIES]
+    with quiet():
+        asyncio.run(post_all(payloads, 1, cold=True))
+        cold = asyncio.run(post_all(payloads, rounds, cold=True))
+        warm = asyncio.run(post_all(payloads, rounds, cold=False))
+    return {"cold": percentiles(cold), "warm": percentiles(warm)}
+
+def use_corpus(data_dir: str, ranking: str) -> SharedSearchAgent:
+    agent = SharedSearchAgent(data_dir, ranking=ranking)
+    agent.add_reload_listener(main_module.response_cache.clear)
+    agent.refresh()
+    main_module.local_agent = agent
+    main_module.response_cache.clear()
+    return agent
+
+def bench_rag(data_dir: str, rounds: int, llm_latency: float) -> dict:
+    from langchain_openai import ChatOpenAI
+    from backend.embeddings import CachedEmbeddings
+    from backend.hybrid import HYBRID_CANDIDATES, HybridRetriever
+    from backend.rag import get_qa_chain
+    from backend.vector_index import NumpyVectorStore
+    from backend.benchmarks.bench_ingest import BatchEmbeddings
+    from backend.benchmarks.stub_openai import StubOpenAIServer
+
+    work_dir = tempfile.mkdtemp(prefix="owu_bench_rag_")
+    try:
+        with StubOpenAIServer(latency=llm_latency, embedding_latency=0.0, dimensions=384) as server:
+            embeddings = CachedEmbeddings(BatchEmbeddings(server.base_url), "stub",
+                                          cache_dir=os.path.join(work_dir, "cache"))
+            store = NumpyVectorStore(os.path.join(work_dir, "index"), embeddings)
+            documents = main_module.local_agent.current().documents
+            start = time.perf_counter()
+            store.add_texts([d["content"] for d in documents], metadatas=[{"source": d["source"]} for d in documents])
+            store.persist()
+            index_ms = (time.perf_counter() - start) * 1000
+            retriever = HybridRetriever(
+                vector_retriever=store.as_retriever(search_kwargs={"k": HYBRID_CANDIDATES}),
+                lexical_agent=main_module.local_agent,
+            )
+            # No semantic cache: every cold request runs retrieval, the prompt and the LLM call
+            main_module.process_query = get_qa_chain(llm=ChatOpenAI(base_url=server.base_url, api_key="stub",
+                                                                    model="stub"),
+                                                     retriever=retriever, embeddings=embeddings)
+            result = bench_endpoint(rounds)
+            result["index_ms"] = round(index_ms, 1)
+            result["stub_llm_latency_ms"] = llm_latency * 1000
+            return result
+    finally:
+        main_module.process_query = None
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def run_scale(scale: int, args) -> dict:
+    data_dir = tempfile.mkdtemp(prefix=f"owu_bench_{scale}x_")
+    try:
+        corpus = generate_corpus(data_dir, scale, seed=args.seed)
+        print(f"\n{scale}x: {corpus['paragraphs']} paragraphs, {corpus['bytes'] / 1e6:.1f} MB")
+        result = {"corpus": corpus}
+
+        with quiet():
+            result["load"] = bench_load(data_dir, args.load_repeats, args.ranking)
+        print(f"  load_data      p50 {result['load']['p50_ms']:9.2f} ms   peak {result['load']['peak_mb']:7.1f} MB   "
+              f"retained {result['load']['retained_mb']:7.1f} MB")
+
+        with quiet():
+            agent = SimpleSearchAgent(data_dir, ranking=args.ranking)
+        result["generate"] = bench_generate(agent, args.rounds)
+        print(f"  generate       p50 {result['generate']['p50_ms']:9.3f} ms   p99 {result['generate']['p99_ms']:9.3f} ms")
+        del agent
+
+        with quiet():
+            use_corpus(data_dir, args.ranking)
+        main_module.process_query = None
+        result["local"] = bench_endpoint(args.rounds)
+        print(f"  /generate local  cold p50 {result['local']['cold']['p50_ms']:8.3f} ms   "
+              f"warm p50 {result['local']['warm']['p50_ms']:8.3f} ms")
+
+        if scale <= args.rag_max_scale:
+            result["rag"] = bench_rag(data_dir, args.rounds, args.llm_latency)
+            print(f"  /generate RAG    cold p50 {result['rag']['cold']['p50_ms']:8.3f} ms   "
+                  f"warm p50 {result['rag']['warm']['p50_ms']:8.3f} ms")
+        result["peak_rss_mb"] = peak_rss_mb()
+        return result
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+# Figures --compare checks; means, maxima and p99 of a few hundred samples are too noisy to gate on
+COMPARED = ("p50_ms", "p90_ms", "peak_mb", "retained_mb", "peak_rss_mb")
+
+def flatten(result: dict, prefix: str = "") -> Dict[str, float]:
+    """The compared figures as 'scale.section.metric' -> value."""
+    flat = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif key in COMPARED:
+            flat[name] = value
+    return flat
+
+def compare(current: dict, baseline: dict, threshold: float) -> int:
+    """Prints current / baseline for every shared figure; returns how many exceed the threshold."""
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    print(f"\nAgainst {baseline['meta']['commit']} (regression threshold {threshold:.2f}x):")
+    regressions = 0
+    for name in sorted(set(old) & set(new)):
+        # Sub-millisecond noise is not a regression
+        if old[name] <= 0 or max(old[name], new[name]) < 0.05:
+            continue
+        ratio = new[name] / old[name]
+        flag = "REGRESSION" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(f"  {name:40s} {old[name]:10.3f} -> {new[name]:10.3f}  {ratio:5.2f}x {flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--rounds", type=int, default=20, help="Passes over the query mix per measurement")
+    parser.add_argument("--load-repeats", type=int, default=10)
+    parser.add_argument("--ranking", choices=["keyword", "bm25"], default="keyword")
+    parser.add_argument("--rag-max-scale", type=int, default=10,
+                        help="Largest scale to run the RAG benchmark at (it embeds every paragraph)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Stub LLM latency in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    original_agent, original_chain = main_module.local_agent, main_module.get_qa_chain
+    # Local mode must not fall back to building the real chain from the environment
+    main_module.get_qa_chain = None
+    try:
+        results = {f"{scale}x": run_scale(scale, args) for scale in args.scales}
+    finally:
+        main_module.local_agent, main_module.get_qa_chain = original_agent, original_chain
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+NumpyVectorStore versus Chroma on a synthetic index: time to import and open the
+store, resident memory once open, and top-5 query latency. Each store is measured
+in a fresh subprocess so import costs and memory are not shared. Chroma is skipped
+when it is not installed.
+
+    python backend/benchmarks/bench_vector_store.py --chunks 20000 --dim 384
+"""
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import subprocess
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+def synthetic(chunks: int, dim: int, seed: int = 0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((chunks, dim), dtype=np.float32)
+    texts = [f"Synthetic Owu archive chunk {i}. " * 20 for i in range(chunks)]
+    metadatas = [{"source": f"doc_{i // 10}.txt", "type": "General/Oral"} for i in range(chunks)]
+    return vectors, texts, metadatas
+
+def build(kind: str, directory: str, chunks: int, dim: int):
+    vectors, texts, metadatas = synthetic(chunks, dim)
+    ids = [str(i) for i in range(chunks)]
+    if kind == "numpy":
+        from backend.vector_index import NumpyVectorStore
+        store = NumpyVectorStore(directory)
+        store.add_embeddings(texts, vectors.tolist(), metadatas, ids)
+        store.persist()
+    else:
+        from langchain_community.vectorstores import Chroma
+        store = Chroma(persist_directory=directory)
+        for start in range(0, chunks, 5000):
+            end = min(start + 5000, chunks)
+            store._collection.add(ids=ids[start:end], embeddings=vectors[start:end].tolist(),
+                                  documents=texts[start:end], metadatas=metadatas[start:end])
+
+def measure(kind: str, directory: str, dim: int, queries: int) -> dict:
+    """Runs inside the child process."""
+    baseline = rss_mb()
+    started = time.perf_counter()
+    if kind == "numpy":
+        from backend.vector_index import NumpyVectorStore
+        imported = time.perf_counter()
+        store = NumpyVectorStore(directory)
+    else:
+        from langchain_community.vectorstores import Chroma
+        imported = time.perf_counter()
+        store = Chroma(persist_directory=directory)
+    opened = time.perf_counter()
+
+    import numpy as np
+    rng = np.random.default_rng(1)
+    latencies = []
+    for _ in range(queries):
+        query = rng.standard_normal(dim).astype(np.float32).tolist()
+        start = time.perf_counter()
+        store.similarity_search_by_vector(query, k=5)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "import_ms": round((imported - started) * 1000, 1),
+        "open_ms": round((opened - imported) * 1000, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 3),
+        "rss_mb": round(rss_mb() - baseline, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--child", choices=["numpy", "chroma"])
+    parser.add_argument("--dir")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.dir, args.dim, args.queries)))
+        return
+
+    for kind in ("numpy", "chroma"):
+        if kind == "chroma":
+            try:
+                import chromadb  # noqa: F401
+            except ImportError:
+                print("chroma      skipped (chromadb not installed)")
+                continue
+        directory = tempfile.mkdtemp(prefix=f"owu_{kind}_")
+        try:
+            start = time.perf_counter()
+            build(kind, directory, args.chunks, args.dim)
+            build_s = time.perf_counter() - start
+            output = subprocess.run([sys.executable, __file__, "--child", kind, "--dir", directory,
+                                     "--dim", str(args.dim), "--queries", str(args.queries)],
+                                    capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{kind:10s} {args.chunks} chunks x {args.dim}d  build {build_s:.2f}s  {result}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
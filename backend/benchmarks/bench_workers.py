@@ -0,0 +1,108 @@
+"""
+Per-worker memory and startup cost of the local search index, loading the raw
+files in every worker versus mapping a shared IndexSnapshot, for 1 and N worker
+processes started together (as `uvicorn --workers N` does).
+
+RSS counts the mapped snapshot pages in every worker that touches them; PSS
+(Linux only) splits shared pages between the processes using them and is the
+better measure of what N workers really cost.
+
+    python backend/benchmarks/bench_workers.py --scale 300 --workers 1 4
+"""
+import sys
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import contextlib
+import multiprocessing
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.benchmarks.corpus import generate_corpus
+
+QUERIES = ["Owu Wars", "Oriki of the Olowu", "Abeokuta founded", "Egba migration 1830", "festival heritage",
+           "warriors of Ijebu", "praise poetry", "Owu-Ipole"]
+
+def memory_mb() -> dict:
+    """RSS and PSS of this process, from /proc where available."""
+    figures = {}
+    for path, fields in (("/proc/self/status", {"VmRSS:": "rss_mb"}),
+                         ("/proc/self/smaps_rollup", {"Pss:": "pss_mb"})):
+        try:
+            with open(path) as f:
+                for line in f:
+                    parts = line.split()
+                    if parts and parts[0] in fields:
+                        figures[fields[parts[0]]] = int(parts[1]) / 1024
+        except OSError:
+            pass
+    if "rss_mb" not in figures:
+        import resource
+        figures["rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return figures
+
+def worker(data_dir, snapshot_dir, ready, done, results):
+    from backend.shared_agent import SharedSearchAgent
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        shared = SharedSearchAgent(data_dir, snapshot_dir=snapshot_dir)
+        agent = shared.current()
+        startup = time.perf_counter() - start
+        for query in QUERIES:
+            agent.generate(query, 30, "general", "neutral")
+    # Measure once every worker is serving, so shared pages are counted as shared
+    ready.wait()
+    results.put(dict(memory_mb(), startup_ms=startup * 1000))
+    done.wait()
+
+def run(data_dir, snapshot_dir, workers: int) -> dict:
+    context = multiprocessing.get_context("spawn")
+    ready, done = context.Barrier(workers), context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(data_dir, snapshot_dir, ready, done, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    figures = [results.get() for _ in processes]
+    done.set()
+    for process in processes:
+        process.join()
+    summary = {"startup_ms": statistics.median(f["startup_ms"] for f in figures),
+               "rss_mb": statistics.median(f["rss_mb"] for f in figures)}
+    if all("pss_mb" in f for f in figures):
+        summary["pss_mb"] = statistics.median(f["pss_mb"] for f in figures)
+        summary["total_pss_mb"] = sum(f["pss_mb"] for f in figures)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        data_dir, snapshot_dir = os.path.join(root, "raw"), os.path.join(root, "snapshots")
+        counts = generate_corpus(data_dir, args.scale)
+        print(f"corpus x{args.scale}: {counts['paragraphs']} paragraphs, {counts['bytes'] / 1e6:.1f} MB")
+        # The first start after a data change writes the snapshot; time that separately
+        start = time.perf_counter()
+        run(data_dir, snapshot_dir, 1)
+        print(f"snapshot build (one worker, cold): {(time.perf_counter() - start) * 1000:.0f} ms wall")
+
+        for workers in args.workers:
+            for label, directory in (("raw", None), ("snapshot", snapshot_dir)):
+                summary = run(data_dir, directory, workers)
+                pss = (f"   PSS/worker {summary['pss_mb']:7.1f} MB   total PSS {summary['total_pss_mb']:7.1f} MB"
+                       if "pss_mb" in summary else "")
+                print(f"{workers:2d} worker(s) {label:8s} startup {summary['startup_ms']:8.1f} ms   "
+                      f"RSS/worker {summary['rss_mb']:7.1f} MB{pss}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
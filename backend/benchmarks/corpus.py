@@ -0,0 +1,93 @@
+"""
+Deterministic synthetic archive for benchmarks: `scale` copies of data/raw, each
+copy varied so the vocabulary keeps growing with the corpus (years shifted,
+words mutated, fresh diacritic-heavy oriki stanzas added). The same seed and
+scale always produce byte-identical files.
+
+    python backend/benchmarks/corpus.py --scale 100 --out /tmp/owu_corpus_100
+"""
+import os
+import re
+import random
+import argparse
+from typing import Dict, List
+
+RAW_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data/raw"))
+
+# Tone-marked Yoruba vocabulary in the register of oriki_owu.txt
+ORIKI_SUBJECTS = ["Owu", "Ọmọ Ajíbọ̀sìn", "Olówu", "Ọmọ Arowíyì", "Ọmọ Labẹ̀rẹ̀jọ", "Ọba Owu", "Orílẹ̀ Owu"]
+ORIKI_EPITHETS = [
+    "ọmọ ọlọ́lá", "ọmọ akọni", "ilẹ̀ ajagun", "ọmọ ọlọ́kànjú", "ọmọ kì í bẹ̀rù ogun", "ọmọ alágbára",
+    "ọmọ ológo", "tí ń gbé idà yọ", "l’ákọ́dá oooo", "tó ń dájọ́ l’áàfin", "a fi ẹ̀jẹ̀ dáàbò bo",
+    "ẹni tí ń wọ ogun l’áì bẹ̀rù", "ọba aláṣẹ", "ilẹ̀ tí ń bí ọmọ akọni", "ọmọ osó só só kórùn",
+]
+ORIKI_TITLES = ["ORÍKÌ ILÚ OWU", "ORÍKÌ AJÍBỌ̀SÌN", "ORÍKÌ OLÓWÚ", "ORÍKÌ ORÍLẸ̀-OWU", "ORÍKÌ ỌMỌ OWU"]
+
+YEAR = re.compile(r"\b(1[0-9]{3})\b")
+
+def _raw_files() -> Dict[str, str]:
+    files = {}
+    for name in sorted(os.listdir(RAW_DIR)):
+        if name.endswith(".txt"):
+            with open(os.path.join(RAW_DIR, name), encoding="utf-8") as f:
+                files[name] = f.read()
+    return files
+
+def _mutate(paragraph: str, rng: random.Random, years: int) -> str:
+    """Shifts years and perturbs about one word in twelve, keeping line breaks."""
+    paragraph = YEAR.sub(lambda m: str(int(m.group(1)) + years), paragraph)
+    lines = []
+    for line in paragraph.split("\n"):
+        words = line.split(" ")
+        for i, word in enumerate(words):
+            if len(word) > 3 and rng.random() < 1 / 12:
+                words[i] = word + rng.choice(["a", "ẹ", "ọ", "ì", "ú", "n"])
+        lines.append(" ".join(words))
+    return "\n".join(lines)
+
+def oriki_stanza(rng: random.Random, number: int) -> str:
+    """A generated praise stanza: a numbered heading and 6-12 tone-marked lines."""
+    subject = rng.choice(ORIKI_SUBJECTS)
+    lines = [f"{number}. {rng.choice(ORIKI_TITLES)} ({subject.upper()})"]
+    for _ in range(rng.randint(6, 12)):
+        lines.append(f"{rng.choice(ORIKI_SUBJECTS)} {rng.choice(ORIKI_EPITHETS)}")
+    return "\n".join(lines)
+
+def generate_corpus(out_dir: str, scale: int, seed: int = 0) -> dict:
+    """
+    Writes the archive into `out_dir` (created if needed). Copy 0 holds the paragraphs
+    of data/raw unchanged; every further copy is a varied version of each file, and its
+    oriki file gets two extra generated stanzas. Returns file, paragraph and byte counts.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    files = _raw_files()
+    written = {"files": 0, "paragraphs": 0, "bytes": 0}
+    for copy in range(scale):
+        for name, text in files.items():
+            paragraphs: List[str] = [p for p in text.split("\n\n") if p.strip()]
+            if copy:
+                years = rng.randint(-40, 40)
+                paragraphs = [_mutate(p, rng, years) for p in paragraphs]
+                if "oriki" in name:
+                    paragraphs += [oriki_stanza(rng, len(paragraphs) + i + 1) for i in range(2)]
+            data = "\n\n".join(paragraphs).encode("utf-8")
+            with open(os.path.join(out_dir, f"{copy:04d}_{name}"), "wb") as f:
+                f.write(data)
+            written["files"] += 1
+            written["paragraphs"] += len(paragraphs)
+            written["bytes"] += len(data)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=10, help="Copies of data/raw (1-1000)")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    written = generate_corpus(args.out, args.scale, args.seed)
+    print(f"Wrote {written['files']} files, {written['paragraphs']} paragraphs, "
+          f"{written['bytes'] / 1e6:.1f} MB to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Minimal OpenAI-compatible stub server for benchmarks: /v1/chat/completions (plain
+or streamed) and /v1/embeddings answer after a fixed delay with canned JSON. Runs in a background
+thread; point ChatOpenAI / OpenAIEmbeddings at `server.base_url`.
+"""
+import json
+import time
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ANSWER = json.dumps({
+    "narrative": "The Owu Kingdom was destroyed during the Owu Wars (1821-1825).",
+    "timeline": [{"year": "1821", "event": "Owu War begins"}],
+    "sources": [{"title": "wars.txt", "type": "Oral", "confidence_score": 0.9}],
+})
+
+def stub_embedding(text: str, dimensions: int) -> list:
+    """Deterministic pseudo-embedding so identical texts embed identically."""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [((digest[i % len(digest)] + i) % 255) / 255.0 - 0.5 for i in range(dimensions)]
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 stalls bursts of concurrent connections
+    request_queue_size = 256
+
+class StubOpenAIServer:
+    def __init__(self, latency: float = 0.2, embedding_latency: float = 0.02, embedding_item_latency: float = 0.0,
+                 dimensions: int = 64, answer: str = DEFAULT_ANSWER, port: int = 0):
+        self.latency = latency
+        self.embedding_latency = embedding_latency
+        # Extra delay per input text, since real embedding latency grows with batch size
+        self.embedding_item_latency = embedding_item_latency
+        self.dimensions = dimensions
+        self.answer = answer
+        self.requests = {"chat": 0, "embeddings": 0}
+        self._server = _Server(("127.0.0.1", port), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path.endswith("/embeddings"):
+                    stub.requests["embeddings"] += 1
+                    inputs = body.get("input", [])
+                    if isinstance(inputs, str):
+                        inputs = [inputs]
+                    time.sleep(stub.embedding_latency + stub.embedding_item_latency * len(inputs))
+                    payload = {
+                        "object": "list",
+                        "model": body.get("model", "stub"),
+                        "data": [{"object": "embedding", "index": i,
+                                  "embedding": stub_embedding(str(text), stub.dimensions)}
+                                 for i, text in enumerate(inputs)],
+                        "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+                    }
+                elif self.path.endswith("/chat/completions") and body.get("stream"):
+                    stub.requests["chat"] += 1
+                    self._stream_chat(body)
+                    return
+                elif self.path.endswith("/chat/completions"):
+                    stub.requests["chat"] += 1
+                    time.sleep(stub.latency)
+                    payload = {
+                        "id": "stub", "object": "chat.completion", "created": int(time.time()),
+                        "model": body.get("model", "stub"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": stub.answer}}],
+                        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                    }
+                else:
+                    self.send_error(404)
+                    return
+                self._send_json(payload)
+
+            def _stream_chat(self, body):
+                """Server-sent events: the answer in small chunks spread over the latency."""
+                pieces = [stub.answer[i:i + 8] for i in range(0, len(stub.answer), 8)]
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for piece in pieces + [None]:
+                    time.sleep(stub.latency / (len(pieces) + 1))
+                    chunk = {
+                        "id": "stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                        "model": body.get("model", "stub"),
+                        "choices": [{"index": 0, "delta": {"content": piece} if piece else {},
+                                     "finish_reason": None if piece else "stop"}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def _send_json(self, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one computation. The first
+    caller starts it as a task; callers arriving while it runs wait for that task
+    instead of starting their own, for at most `timeout` seconds, after which they
+    compute on their own. The task is shielded, so a caller that disconnects does
+    not cancel the work the others are waiting for. Use from one event loop only.
+    """
+
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.computations = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller has gone away
+            task.exception()
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """compute()'s result, and whether it was shared with a call already in flight."""
+        if self.timeout <= 0:
+            self.computations += 1
+            return await compute(), False
+
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), self.timeout), True
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self.computations += 1
+                return await compute(), False
+
+        task = asyncio.ensure_future(compute())
+        self._calls[key] = task
+        self.computations += 1
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task), False
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "computations": self.computations,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "timeout_s": self.timeout,
+        }
@@ -0,0 +1,141 @@
+import os
+import re
+import math
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from .personalization import persona_key
+from .metrics import span
+
+# Context token budgets per education level, capped further for younger audiences.
+# Each can be overridden with CONTEXT_BUDGET_<LEVEL>, e.g. CONTEXT_BUDGET_ACADEMIC=2500.
+EDUCATION_BUDGETS = {"Child": 600, "General": 1200, "Academic": 2000}
+AUDIENCE_BUDGETS = {"child": 600, "teen": 1000, "adult": 2000}
+
+# Shorter shared runs than this are coincidence, not splitter overlap
+MIN_OVERLAP = 30
+# A partial chunk shorter than this is not worth its place in the prompt
+MIN_PARTIAL_TOKENS = 50
+
+@lru_cache(maxsize=1)
+def _encoder():
+    """tiktoken's encoder when it is installed and its vocabulary is available, else None."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken, or the usual ~4 characters per token estimate without it."""
+    encoder = _encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return math.ceil(len(text) / 4)
+
+def context_budget(age: int, education: str, tone: str) -> int:
+    """Context token budget for a persona: the smaller of its education and audience budgets."""
+    band, education, _ = persona_key(age, education, tone)
+    level = int(os.getenv(f"CONTEXT_BUDGET_{education.upper()}", EDUCATION_BUDGETS[education]))
+    return min(level, AUDIENCE_BUDGETS[band])
+
+def compress(text: str) -> str:
+    """Collapses runs of spaces and blank lines; single line breaks carry meaning in oriki."""
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\n\s*\n\s*\n+", "\n\n", text)
+    return text.strip()
+
+def _overlap(head: str, tail: str) -> int:
+    """Length of the longest suffix of `head` that is a prefix of `tail`."""
+    for k in range(min(len(head), len(tail)), MIN_OVERLAP - 1, -1):
+        if head.endswith(tail[:k]):
+            return k
+    return 0
+
+def _source(doc: Document) -> str:
+    return os.path.basename(str(doc.metadata.get("source", "")))
+
+def deduplicate(docs: List[Document]) -> Tuple[List[Document], int]:
+    """
+    Removes text a higher-ranked chunk of the same file already covers: chunks
+    contained in an earlier one are dropped and the 200 character splitter overlap
+    between neighbours is cut. Returns the documents and the characters removed.
+    """
+    kept: List[Document] = []
+    removed = 0
+    for doc in docs:
+        text = compress(doc.page_content)
+        size = len(text)
+        for earlier in kept:
+            if _source(earlier) != _source(doc):
+                continue
+            if text in earlier.page_content:
+                text = ""
+                break
+            cut = _overlap(earlier.page_content, text)
+            if cut:
+                text = text[cut:].lstrip()
+            cut = _overlap(text, earlier.page_content)
+            if cut:
+                text = text[:-cut].rstrip()
+        removed += size - len(text)
+        if text:
+            kept.append(Document(page_content=text, metadata=doc.metadata))
+    return kept, removed
+
+def truncate(text: str, budget: int) -> str:
+    """Cuts text to about `budget` tokens, preferring a sentence or line boundary."""
+    if count_tokens(text) <= budget:
+        return text
+    cut = text[:budget * 4]
+    # One token is left for the ellipsis
+    while cut and count_tokens(cut) > budget - 1:
+        cut = cut[:int(len(cut) * 0.9)]
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + " ..."
+
+def assemble_context(docs: List[Document], budget: Optional[int]) -> List[Document]:
+    """
+    The context-assembly stage between retrieval and the prompt: deduplicates the
+    ranked chunks, then keeps them best first until the token budget is spent. The
+    chunk that crosses the budget is truncated to fit and everything ranked below it
+    is dropped.
+    """
+    docs, _ = deduplicate(docs)
+    if budget is None:
+        return docs
+    assembled: List[Document] = []
+    used = 0
+    for doc in docs:
+        tokens = count_tokens(doc.page_content)
+        if used + tokens <= budget:
+            assembled.append(doc)
+            used += tokens
+            continue
+        remaining = budget - used
+        if remaining >= MIN_PARTIAL_TOKENS or not assembled:
+            assembled.append(Document(page_content=truncate(doc.page_content, remaining), metadata=doc.metadata))
+        break
+    return assembled
+
+class ContextAssemblyRetriever(BaseRetriever):
+    """Runs assemble_context over another retriever's ranked results."""
+    retriever: BaseRetriever
+    budget: Optional[int] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        with span("retrieve"):
+            docs = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        with span("prompt"):
+            return assemble_context(docs, self.budget)
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        with span("retrieve"):
+            docs = await self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+        with span("prompt"):
+            return assemble_context(docs, self.budget)
@@ -0,0 +1,193 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+from langchain_core.embeddings import Embeddings
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "data", "embedding_cache")
+
+DEFAULT_LOCAL_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# One instance per backend and model, so a process never has two writers on a cache directory
+_instances: Dict[str, "CachedEmbeddings"] = {}
+_instances_lock = threading.Lock()
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache for a single model. Vectors are appended as float32
+    rows to `vectors.f32`, which is read back through a memory map, and `index.tsv`
+    maps each text hash to its row. Appends hold an exclusive lock on the vector file
+    (where fcntl exists), so several worker processes can share one directory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.index_path = os.path.join(directory, "index.tsv")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self._lock = threading.Lock()
+        self._map: Optional[np.memmap] = None
+        self.index: Dict[str, int] = {}
+        self.dim: Optional[int] = None
+
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+        if self.dim and os.path.exists(self.index_path):
+            # Rows past the end of the vector file belong to an interrupted write; ignore them
+            rows = os.path.getsize(self.vectors_path) // (4 * self.dim) if os.path.exists(self.vectors_path) else 0
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and int(parts[1]) < rows:
+                        self.index[parts[0]] = int(parts[1])
+
+    @staticmethod
+    def key(text: str, kind: str = "doc") -> str:
+        return hashlib.sha256(f"{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _row(self, row: int) -> List[float]:
+        if self._map is None or row >= self._map.shape[0]:
+            rows = os.path.getsize(self.vectors_path) // (4 * self.dim)
+            self._map = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._map[row].tolist()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        row = self.index.get(key)
+        if row is None:
+            return None
+        with self._lock:
+            return self._row(row)
+
+    def put_many(self, keys: List[str], vectors: List[List[float]]):
+        if not keys:
+            return
+        with self._lock:
+            if self.dim is None:
+                self.dim = len(vectors[0])
+                with open(self.meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"dim": self.dim}, f)
+            block = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), self.dim)
+            row_bytes = 4 * self.dim
+            with open(self.vectors_path, "ab") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    # The row comes from the file as it is now, after any other process's appends
+                    end = f.seek(0, os.SEEK_END)
+                    if end % row_bytes:
+                        # Drop the partial row of an interrupted write
+                        end -= end % row_bytes
+                        f.truncate(end)
+                    start = end // row_bytes
+                    # Vectors first, then the index lines that point at them
+                    f.write(block.tobytes())
+                    f.flush()
+                    with open(self.index_path, "a", encoding="utf-8") as index:
+                        for i, key in enumerate(keys):
+                            index.write(f"{key}\t{start + i}\n")
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+            for i, key in enumerate(keys):
+                self.index[key] = start + i
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+class CachedEmbeddings(Embeddings):
+    """Wraps any embedding backend with an EmbeddingCache keyed by (model, text hash)."""
+
+    def __init__(self, base: Embeddings, model_name: str, cache_dir: str = CACHE_DIR):
+        self.base = base
+        self.model_name = model_name
+        self.cache = EmbeddingCache(os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)))
+        self.hits = 0
+        self.misses = 0
+
+    def _embed(self, texts: List[str], kind: str, batch: bool = True) -> List[List[float]]:
+        keys = [EmbeddingCache.key(t, kind) for t in texts]
+        vectors: List[Optional[List[float]]] = [self.cache.get(k) for k in keys]
+        missing: Dict[str, str] = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            missing_keys = list(missing)
+            if not batch:
+                computed = [self.base.embed_query(missing[k]) for k in missing_keys]
+            else:
+                computed = self.base.embed_documents([missing[k] for k in missing_keys])
+            # Round through float32 so a fresh vector equals its later cached copy
+            computed = np.asarray(computed, dtype=np.float32).tolist()
+            self.cache.put_many(missing_keys, computed)
+            fresh = dict(zip(missing_keys, computed))
+            vectors = [v if v is not None else fresh[k] for k, v in zip(keys, vectors)]
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "doc")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query", batch=False)[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds many queries with one backend call and caches them for embed_query.
+        The OpenAI and sentence-transformers backends embed queries and documents alike.
+        """
+        return self._embed(texts, "query")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "cached": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+def get_embeddings(backend: Optional[str] = None) -> CachedEmbeddings:
+    """
+    Returns the configured embedding backend wrapped in the on-disk cache.
+    EMBEDDING_BACKEND selects "openai" or "local" (a CPU sentence-transformers model,
+    LOCAL_EMBEDDING_MODEL); it defaults to OpenAI when OPENAI_API_KEY is set.
+    The instance is shared by every caller in the process.
+    """
+    backend = backend or os.getenv("EMBEDDING_BACKEND") or ("openai" if os.getenv("OPENAI_API_KEY") else "local")
+    if backend == "local":
+        model = os.getenv("LOCAL_EMBEDDING_MODEL", DEFAULT_LOCAL_MODEL)
+    elif backend == "openai":
+        model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-ada-002")
+    else:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}'. Expected 'openai' or 'local'.")
+
+    name = f"{backend}:{model}"
+    with _instances_lock:
+        if name not in _instances:
+            if backend == "local":
+                # Lazy import: sentence-transformers pulls in torch
+                from langchain_community.embeddings import HuggingFaceEmbeddings
+                base = HuggingFaceEmbeddings(
+                    model_name=model,
+                    model_kwargs={"device": "cpu"},
+                    encode_kwargs={"normalize_embeddings": True},
+                )
+            else:
+                from langchain_openai import OpenAIEmbeddings
+                base = OpenAIEmbeddings(model=model)
+            _instances[name] = CachedEmbeddings(base, name)
+        return _instances[name]
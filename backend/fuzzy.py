@@ -0,0 +1,80 @@
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+def bigrams(term: str) -> Set[str]:
+    return {term[i:i + 2] for i in range(len(term) - 1)}
+
+class FuzzyIndex:
+    """
+    Vocabulary-level replacement for running difflib.get_close_matches against
+    every paragraph. Terms are bucketed by length and by character bigram so a
+    query word is only compared with terms that can possibly reach the cutoff;
+    the survivors are then checked with the same SequenceMatcher ratios difflib
+    uses, so the matches are identical to a full scan.
+    """
+
+    def __init__(self, vocabulary: Iterable[str], cutoff: float = 0.8):
+        self.cutoff = cutoff
+        self.terms: List[str] = list(vocabulary)
+        self.by_length: Dict[int, List[int]] = {}
+        self.by_bigram: Dict[str, List[int]] = {}
+        for term_id, term in enumerate(self.terms):
+            self.by_length.setdefault(len(term), []).append(term_id)
+            for gram in bigrams(term):
+                self.by_bigram.setdefault(gram, []).append(term_id)
+
+    @classmethod
+    def from_parts(cls, terms: Sequence[str], by_length: Mapping[int, Sequence[int]],
+                   by_bigram: Mapping[str, Sequence[int]], cutoff: float = 0.8) -> "FuzzyIndex":
+        """Wraps buckets built elsewhere, e.g. the mapped arrays of an IndexSnapshot."""
+        index = cls((), cutoff)
+        index.terms = terms
+        index.by_length = by_length
+        index.by_bigram = by_bigram
+        return index
+
+    def _min_matches(self, total: int) -> int:
+        """Smallest number of matching characters that gives ratio() >= cutoff."""
+        matches = int(self.cutoff * total / 2)
+        while 2.0 * matches / total < self.cutoff:
+            matches += 1
+        return matches
+
+    def close_terms(self, word: str) -> List[str]:
+        """All vocabulary terms whose difflib ratio with `word` is at least the cutoff."""
+        word_len = len(word)
+        matcher = SequenceMatcher()
+        matcher.set_seq2(word)
+
+        shared_by_length: Optional[Dict[int, List[int]]] = None
+        results = []
+        for length, term_ids in self.by_length.items():
+            total = word_len + length
+            # ratio() can never exceed 2 * min(len) / total
+            if 2.0 * min(word_len, length) / total < self.cutoff:
+                continue
+
+            # SequenceMatcher's matching blocks are separated by at least one
+            # unmatched character, so M matched characters in k <= total - 2M + 1
+            # blocks share at least M - k bigrams. When that bound is positive a
+            # close term must share a bigram with the word; otherwise scan the bucket.
+            min_matches = self._min_matches(total)
+            if 3 * min_matches - total - 1 >= 1:
+                if shared_by_length is None:
+                    shared = set()
+                    for gram in bigrams(word):
+                        shared.update(self.by_bigram.get(gram, ()))
+                    shared_by_length = {}
+                    for term_id in shared:
+                        shared_by_length.setdefault(len(self.terms[term_id]), []).append(term_id)
+                candidates = shared_by_length.get(length, ())
+            else:
+                candidates = term_ids
+
+            for term_id in candidates:
+                matcher.set_seq1(self.terms[term_id])
+                if (matcher.real_quick_ratio() >= self.cutoff
+                        and matcher.quick_ratio() >= self.cutoff
+                        and matcher.ratio() >= self.cutoff):
+                    results.append(self.terms[term_id])
+        return results
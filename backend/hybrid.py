@@ -0,0 +1,77 @@
+import os
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, List, Sequence
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from .metrics import stage_prefix
+
+# Candidates taken from each branch before fusion, and the usual RRF damping constant
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = 60
+
+# Lexical scoring runs here while the calling thread waits on the vector search
+_lexical_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="owu-lexical")
+
+def _doc_key(doc: Document) -> Hashable:
+    """Identity for fusion: the same text from the same file counts once, whichever branch found it."""
+    source = os.path.basename(str(doc.metadata.get("source", "")))
+    return source, " ".join(doc.page_content.split())
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Document]], k: int = RRF_K) -> List[Document]:
+    """
+    Merges ranked lists by summing 1 / (k + rank) for every list a document appears in.
+    Ties keep the order of first appearance, favouring earlier lists.
+    """
+    scores: Dict[Hashable, float] = {}
+    docs: Dict[Hashable, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = _doc_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    order = sorted(scores, key=lambda key: -scores[key])
+    return [docs[key] for key in order]
+
+def lexical_documents(agent, query: str, limit: int) -> List[Document]:
+    """Runs the SimpleSearchAgent scorer and wraps matching paragraphs as Documents."""
+    return [
+        Document(page_content=doc["content"], metadata={"source": doc["source"], "type": "General/Oral"})
+        for score, doc in agent.rank(query, top_k=limit) if score > 0
+    ]
+
+class HybridRetriever(BaseRetriever):
+    """
+    Runs the lexical scorer (exact Yoruba names, oriki titles) and the vector search
+    (paraphrases) concurrently, each capped at `candidates` results, and returns the
+    top `k` after reciprocal rank fusion. `lexical_agent` is a SharedSearchAgent.
+    """
+    vector_retriever: BaseRetriever
+    lexical_agent: Any
+    k: int = 5
+    candidates: int = HYBRID_CANDIDATES
+    rrf_k: int = RRF_K
+
+    def _lexical(self, query: str) -> List[Document]:
+        with stage_prefix("lexical_"):
+            return lexical_documents(self.lexical_agent.current(), query, self.candidates)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        # Carry the request context (e.g. its timing trace) into the worker thread
+        context = contextvars.copy_context()
+        lexical = _lexical_pool.submit(context.run, self._lexical, query)
+        vector = self.vector_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return reciprocal_rank_fusion([vector[:self.candidates], lexical.result()], self.rrf_k)[:self.k]
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        vector, lexical = await asyncio.gather(
+            self.vector_retriever.ainvoke(query, config={"callbacks": run_manager.get_child()}),
+            loop.run_in_executor(_lexical_pool, functools.partial(context.run, self._lexical, query)),
+        )
+        return reciprocal_rank_fusion([vector[:self.candidates], lexical], self.rrf_k)[:self.k]
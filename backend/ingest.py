@@ -1,70 +1,96 @@
 import os
-from typing import List
+import json
+import time
+import random
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
 from dotenv import load_dotenv
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
 load_dotenv()
-import os
-from typing import List
-from dotenv import load_dotenv
-
-load_dotenv()
-from langchain_core.documents import Document
 
 # Define base paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data", "raw")
 DB_DIR = os.path.join(BASE_DIR, "data", "chroma_db")
 
-def ingest_documents():
+# Per-file and per-chunk content hashes of what is already embedded in the store
+MANIFEST_NAME = "ingest_manifest.json"
+MANIFEST_VERSION = 1
+
+SUPPORTED_EXTENSIONS = (".txt", ".pdf")
+
+# Pipeline tuning
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "5"))
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_ids(source: str, chunks: List[Document]) -> List[str]:
     """
-    Ingests documents from backend/data/raw. 
-    Supports .txt and .pdf files.
+    Content-addressed ids for a file's chunks. Identical text within one file gets
+    an occurrence counter so ids stay unique.
     """
+    ids = []
+    seen: Dict[str, int] = {}
+    for chunk in chunks:
+        key = hashlib.sha256(f"{source}\0{chunk.page_content}".encode("utf-8")).hexdigest()
+        seen[key] = seen.get(key, 0) + 1
+        ids.append(f"{key[:32]}-{seen[key]}")
+    return ids
+
+def load_manifest(db_dir: str) -> dict:
+    path = os.path.join(db_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"version": MANIFEST_VERSION, "files": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "files": {}}
+    return manifest
+
+def save_manifest(db_dir: str, manifest: dict):
+    os.makedirs(db_dir, exist_ok=True)
+    path = os.path.join(db_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+
+def scan_files(data_dir: str) -> Dict[str, str]:
+    """Relative path -> absolute path for every supported file under data_dir."""
+    files = {}
+    for root, _, names in os.walk(data_dir):
+        for name in names:
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                path = os.path.join(root, name)
+                files[os.path.relpath(path, data_dir).replace(os.sep, "/")] = path
+    return files
+
+def load_and_split(path: str) -> List[Document]:
+    """Loads one .txt or .pdf file and splits it into chunks."""
     # Lazy imports
-    from langchain_community.document_loaders import TextLoader, DirectoryLoader, PyPDFLoader
+    from langchain_community.document_loaders import TextLoader, PyPDFLoader
     try:
         from langchain.text_splitter import RecursiveCharacterTextSplitter
     except ImportError:
         from langchain_text_splitters import RecursiveCharacterTextSplitter
-    from langchain_community.vectorstores import Chroma
-    from langchain_openai import OpenAIEmbeddings
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
-        print(f"Created {DATA_DIR}. Please add documents.")
-        return
-
-    documents: List[Document] = []
-
-    # 1. Load Text Files
-    try:
-        txt_loader = DirectoryLoader(DATA_DIR, glob="**/*.txt", loader_cls=TextLoader)
-        txt_docs = txt_loader.load()
-        print(f"Loaded {len(txt_docs)} text documents.")
-        documents.extend(txt_docs)
-    except Exception as e:
-        print(f"Error loading text files: {e}")
-
-    # 2. Load PDF Files
-    try:
-        # DirectoryLoader for PDFs
-        pdf_loader = DirectoryLoader(DATA_DIR, glob="**/*.pdf", loader_cls=PyPDFLoader)
-        pdf_docs = pdf_loader.load()
-        print(f"Loaded {len(pdf_docs)} PDF documents.")
-        documents.extend(pdf_docs)
-    except Exception as e:
-        print(f"Error loading PDF files: {e}")
 
-    if not documents:
-        print("No documents found to ingest.")
-        return
+    if path.lower().endswith(".pdf"):
+        documents = PyPDFLoader(path).load()
+    else:
+        documents = TextLoader(path, encoding="utf-8").load()
 
-    # 3. Split Text
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        separators=["\n\n", "\n", ".", " ", ""]
-    )
-    
     # Add metadata for source type if needed
     for doc in documents:
         source = doc.metadata.get("source", "")
@@ -73,19 +99,246 @@ def ingest_documents():
         else:
              doc.metadata["type"] = "General/Oral"
 
-    chunks = text_splitter.split_documents(documents)
-    print(f"Split into {len(chunks)} chunks.")
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        separators=["\n\n", "\n", ".", " ", ""]
+    )
+    return text_splitter.split_documents(documents)
+
+class PrecomputedEmbeddings(Embeddings):
+    """
+    Embedding function handed to the vector store during ingestion: texts embedded
+    by the pipeline are served from memory, anything else goes to the real backend.
+    """
+
+    def __init__(self, base: Embeddings):
+        self.base = base
+        self.vectors: Dict[str, List[float]] = {}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        missing = [t for t in texts if t not in self.vectors]
+        if missing:
+            self.vectors.update(zip(missing, self.base.embed_documents(missing)))
+        return [self.vectors[t] for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
+
+def embed_with_retry(embeddings: Embeddings, texts: List[str], max_retries: int = INGEST_MAX_RETRIES) -> List[List[float]]:
+    """Embeds one batch, retrying failures with exponential backoff and jitter."""
+    for attempt in range(max_retries + 1):
+        try:
+            return embeddings.embed_documents(texts)
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = min(30.0, 0.5 * 2 ** attempt) * (0.5 + random.random())
+            print(f"Embedding batch failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def _load_or_none(path: str) -> Optional[List[Document]]:
+    try:
+        return load_and_split(path)
+    except Exception as e:
+        print(f"Error loading {path}: {e}")
+        return None
+
+def load_files(paths: Sequence[str], workers: int) -> List[Optional[List[Document]]]:
+    """Loads and splits files in a process pool (PDF parsing is CPU-bound). None marks a failure."""
+    if workers <= 1 or len(paths) <= 1:
+        return [_load_or_none(path) for path in paths]
+    # Spawned, not forked: ingestion runs inside the threaded server, and a forked
+    # child could inherit locks held by other threads at the time of the fork
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths)), mp_context=context) as pool:
+        return list(pool.map(_load_or_none, paths))
 
-    # 4. Embed and Store
-    embeddings = OpenAIEmbeddings()
-    vectorstore = Chroma(
-        persist_directory=DB_DIR, 
+def default_db_dir() -> str:
+    """The live store directory of the configured backend (see vector_index.live_store_dir)."""
+    from .vector_index import INDEX_DIR, live_store_dir, store_backend
+    return live_store_dir(INDEX_DIR if store_backend() == "numpy" else DB_DIR)
+
+def store_base_dir() -> str:
+    """The configured backend's store directory, which holds its generations."""
+    from .vector_index import INDEX_DIR, store_backend
+    return INDEX_DIR if store_backend() == "numpy" else DB_DIR
+
+def open_vectorstore(db_dir: Optional[str] = None, embeddings=None):
+    """Opens the configured store (VECTOR_STORE=chroma|numpy) for writing."""
+    from .vector_index import NumpyVectorStore, store_backend
+    if embeddings is None:
+        from .embeddings import get_embeddings
+        embeddings = get_embeddings()
+    if store_backend() == "numpy":
+        return NumpyVectorStore(db_dir or default_db_dir(), embeddings)
+
+    from langchain_community.vectorstores import Chroma
+    return Chroma(
+        persist_directory=db_dir or default_db_dir(),
         embedding_function=embeddings
     )
-    
-    vectorstore.add_documents(chunks)
-    vectorstore.persist()
-    print("Ingestion complete. Database updated.")
+
+def ingest_documents(data_dir: str = DATA_DIR, db_dir: Optional[str] = None, embeddings: Optional[Embeddings] = None,
+                     vectorstore_factory: Optional[Callable[[Embeddings], object]] = None,
+                     batch_size: int = INGEST_BATCH_SIZE, concurrency: int = INGEST_CONCURRENCY,
+                     workers: int = INGEST_WORKERS,
+                     progress: Optional[Callable[[str, int, int], None]] = None) -> dict:
+    """
+    Ingests documents from backend/data/raw.
+    Supports .txt and .pdf files. Embeddings default to the configured backend
+    (see embeddings.get_embeddings), which caches vectors on disk.
+
+    Ingestion is incremental: a manifest of file and chunk content hashes in the
+    store directory records what is already embedded. Unchanged files are skipped
+    without being re-read, only new chunks are embedded, and the vectors of
+    changed or removed chunks are deleted. Returns a report of the counts.
+
+    It runs as a staged pipeline: changed files are loaded and split in a process
+    pool, new chunks are embedded in batches of `batch_size` with at most
+    `concurrency` requests in flight (retrying with backoff), and vector store
+    writes happen batch by batch as embeddings complete. Stage timings and
+    throughput are included in the report. `progress(stage, chunks_done, chunks_total)`
+    is called as each stage starts and after every written batch.
+    """
+    def report_progress(stage: str, done: int = 0, total: int = 0):
+        if progress is not None:
+            progress(stage, done, total)
+
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+        print(f"Created {data_dir}. Please add documents.")
+        return {}
+
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    db_dir = db_dir or default_db_dir()
+
+    if embeddings is None:
+        from .embeddings import get_embeddings
+        embeddings = get_embeddings()
+    model_name = getattr(embeddings, "model_name", type(embeddings).__name__)
+
+    manifest = load_manifest(db_dir)
+    if manifest["files"] and manifest.get("embedding_model", model_name) != model_name:
+        # Vectors from another model live in a different space; re-embed everything
+        print(f"Embedding model changed ({manifest['embedding_model']} -> {model_name}); rebuilding the store.")
+        manifest = {"version": MANIFEST_VERSION, "files": {}}
+    manifest["embedding_model"] = model_name
+    known: Dict[str, dict] = manifest["files"]
+    files = scan_files(data_dir)
+    report = {
+        "files_added": 0, "files_updated": 0, "files_removed": 0, "files_skipped": 0,
+        "chunks_added": 0, "chunks_deleted": 0, "chunks_skipped": 0,
+    }
+
+    # 1. Scan: hash every file and decide what needs loading
+    report_progress("scan")
+    to_load: Dict[str, str] = {}
+    hashes: Dict[str, str] = {}
+    for rel_path, path in sorted(files.items()):
+        hashes[rel_path] = file_hash(path)
+        entry = known.get(rel_path)
+        if entry and entry["hash"] == hashes[rel_path]:
+            report["files_skipped"] += 1
+            report["chunks_skipped"] += len(entry["chunks"])
+        else:
+            to_load[rel_path] = path
+    timings["scan"] = time.perf_counter() - started
+
+    # 2. Load and split
+    report_progress("load_split")
+    stage = time.perf_counter()
+    new_chunks: List[Document] = []
+    new_ids: List[str] = []
+    stale_ids: List[str] = []
+    updated_files: Dict[str, dict] = {}
+
+    for (rel_path, path), chunks in zip(to_load.items(), load_files(list(to_load.values()), workers)):
+        if chunks is None:
+            continue
+        entry = known.get(rel_path)
+        ids = chunk_ids(rel_path, chunks)
+        old_ids = set(entry["chunks"]) if entry else set()
+        for chunk_id, chunk in zip(ids, chunks):
+            if chunk_id in old_ids:
+                report["chunks_skipped"] += 1
+            else:
+                new_ids.append(chunk_id)
+                new_chunks.append(chunk)
+        stale_ids.extend(old_ids - set(ids))
+        report["files_updated" if entry else "files_added"] += 1
+        updated_files[rel_path] = {"hash": hashes[rel_path], "chunks": ids}
+
+    for rel_path in set(known) - set(files):
+        stale_ids.extend(known[rel_path]["chunks"])
+        report["files_removed"] += 1
+    timings["load_split"] = time.perf_counter() - stage
+
+    if not new_chunks and not stale_ids:
+        print(f"Nothing to ingest: {report['files_skipped']} files unchanged.")
+        report["timings"] = {k: round(v, 3) for k, v in timings.items()}
+        return report
+
+    # 3. Embed and Store
+    report_progress("embed", 0, len(new_chunks))
+    precomputed = PrecomputedEmbeddings(embeddings)
+    if vectorstore_factory is None:
+        vectorstore = open_vectorstore(db_dir, precomputed)
+    else:
+        vectorstore = vectorstore_factory(precomputed)
+
+    if not known:
+        # A store built before the manifest existed has vectors with unknown ids; start clean
+        existing = vectorstore.get(include=[]).get("ids", []) if hasattr(vectorstore, "get") else []
+        if existing:
+            print(f"No ingest manifest found; clearing {len(existing)} untracked vectors.")
+            vectorstore.delete(ids=existing)
+
+    write_time = 0.0
+    if stale_ids:
+        stage = time.perf_counter()
+        vectorstore.delete(ids=stale_ids)
+        write_time += time.perf_counter() - stage
+        report["chunks_deleted"] = len(stale_ids)
+
+    stage = time.perf_counter()
+    batches = [range(i, min(i + batch_size, len(new_chunks))) for i in range(0, len(new_chunks), batch_size)]
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(embed_with_retry, embeddings, [new_chunks[i].page_content for i in batch])
+                   for batch in batches]
+        # Write each batch as soon as its embeddings are in, while later batches are still embedding
+        for batch, future in zip(batches, futures):
+            precomputed.vectors.update(zip((new_chunks[i].page_content for i in batch), future.result()))
+            write_start = time.perf_counter()
+            vectorstore.add_documents([new_chunks[i] for i in batch], ids=[new_ids[i] for i in batch])
+            write_time += time.perf_counter() - write_start
+            for i in batch:
+                precomputed.vectors.pop(new_chunks[i].page_content, None)
+            report["chunks_added"] += len(batch)
+            report_progress("embed", report["chunks_added"], len(new_chunks))
+    timings["embed"] = time.perf_counter() - stage - write_time
+    timings["write"] = write_time
+    report_progress("persist", report["chunks_added"], len(new_chunks))
+    if hasattr(vectorstore, "persist"):
+        vectorstore.persist()
+
+    for rel_path in set(known) - set(files):
+        del known[rel_path]
+    known.update(updated_files)
+    save_manifest(db_dir, manifest)
+
+    total = time.perf_counter() - started
+    timings["total"] = total
+    report["timings"] = {k: round(v, 3) for k, v in timings.items()}
+    report["chunks_per_second"] = round(report["chunks_added"] / total, 1) if total > 0 else 0.0
+    print(f"Ingestion complete. Database updated: {report}")
+    return report
 
 if __name__ == "__main__":
+    if not __package__:
+        # Run as a script (python backend/ingest.py): go through the package so the relative imports resolve
+        import sys
+        sys.path.insert(0, os.path.dirname(BASE_DIR))
+        from backend.ingest import ingest_documents
     ingest_documents()
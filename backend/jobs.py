@@ -0,0 +1,97 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+class IngestJob:
+    """
+    Progress of one background ingestion run. The worker thread calls `update` as
+    the pipeline moves through its stages; the status endpoint reads `to_dict`.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.state = "queued"  # queued -> running -> succeeded | failed
+        self.stage = "queued"
+        self.chunks_processed = 0
+        self.chunks_total = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.report: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.state = "running"
+            self.started_at = time.time()
+
+    def update(self, stage: str, processed: int = 0, total: int = 0):
+        """Matches ingest_documents' `progress` callback."""
+        with self._lock:
+            self.stage = stage
+            self.chunks_processed = processed
+            self.chunks_total = total
+
+    def finish(self, report: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        with self._lock:
+            self.state = "failed" if error else "succeeded"
+            self.stage = "failed" if error else "done"
+            self.report = report
+            self.error = error
+            self.finished_at = time.time()
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("queued", "running")
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            end = self.finished_at or time.time()
+            elapsed = end - self.started_at if self.started_at else 0.0
+            return {
+                "job_id": self.id,
+                "state": self.state,
+                "stage": self.stage,
+                "chunks_processed": self.chunks_processed,
+                "chunks_total": self.chunks_total,
+                "chunks_per_second": round(self.chunks_processed / elapsed, 1) if elapsed > 0 else 0.0,
+                "elapsed_s": round(elapsed, 3),
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+                "report": self.report,
+                "error": self.error,
+            }
+
+class JobRegistry:
+    """The most recent `maxsize` jobs by id; at most one of them runs at a time."""
+
+    def __init__(self, maxsize: int = 20):
+        self.maxsize = maxsize
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self) -> Optional[IngestJob]:
+        """A new queued job, or None when another job is still active."""
+        with self._lock:
+            if self.active() is not None:
+                return None
+            job = IngestJob()
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.maxsize:
+                self._jobs.popitem(last=False)
+            return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def active(self) -> Optional[IngestJob]:
+        for job in reversed(self._jobs.values()):
+            if job.active:
+                return job
+        return None
+
+    def recent(self):
+        return list(reversed(self._jobs.values()))
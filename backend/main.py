@@ -1,18 +1,42 @@
-from fastapi import FastAPI, HTTPException
+import time
+# Reference point for the startup timings reported by /status and /metrics
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 import os
+import sys
+import json
+import shutil
+import asyncio
+import contextvars
+import inspect
+import functools
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from .schemas import NarrativeRequest, NarrativeResponse, TimelineEvent, Source
-try:
-    from .rag import get_qa_chain
-    from .ingest import ingest_documents
-except ImportError:
-    get_qa_chain = None
-    ingest_documents = None
+from .schemas import NarrativeRequest, NarrativeResponse, TimelineEvent, TimelineRangeResponse, Source
+from .shared_agent import SharedSearchAgent
+from .simple_agent import normalize_query
+from .cache import TTLCache
+from .jobs import IngestJob, JobRegistry
+from .coalesce import SingleFlight
+from .metrics import DEBUG_TIMINGS, count_error, count_response, finish_trace, registry, start_trace
+
+# The RAG stack (LangChain, the vector store, the LLM client) is imported and built
+# by warm_rag() in the background after startup. Until it is ready these stay None
+# and /generate answers from the local search agent.
+get_qa_chain = None
+ingest_documents = None
+
+# RAG_WARMUP=background (default) serves local search while RAG warms up;
+# "blocking" finishes the warm-up before the server accepts traffic
+RAG_WARMUP = os.getenv("RAG_WARMUP", "background").lower()
 
 app = FastAPI(title="Owu History GenAI Agent")
 
@@ -28,68 +52,652 @@ app.add_middleware(
 # Global QA Processor
 process_query = None
 
+# Global local search agent (loaded once, reloaded when data/raw changes)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# The index is persisted as a memory-mapped snapshot that worker processes share
+local_agent = SharedSearchAgent(
+    os.path.join(BASE_DIR, "data", "raw"),
+    snapshot_dir=os.getenv("LOCAL_INDEX_DIR", os.path.join(BASE_DIR, "data", "local_index"))
+    if os.getenv("LOCAL_INDEX_SNAPSHOT", "true").lower() in ("1", "true", "yes") else None,
+)
+
+# Finished responses keyed on the normalized query and persona; dropped whenever
+# the raw data reloads or /ingest rebuilds the vector store
+response_cache = TTLCache(
+    maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "600")),
+)
+local_agent.add_reload_listener(response_cache.clear)
+
+# RAG answers reused for near-duplicate questions from the same persona
+# (SEMANTIC_CACHE_SIZE=0 turns it off); created with the RAG stack and
+# invalidated like the response cache
+semantic_cache = None
+
+def clear_semantic_cache():
+    if semantic_cache is not None:
+        semantic_cache.clear()
+
+local_agent.add_reload_listener(clear_semantic_cache)
+
+# Concurrent /generate calls with the same cache key share one computation; later
+# arrivals wait at most this long for it (seconds, 0 turns coalescing off)
+in_flight = SingleFlight(timeout=float(os.getenv("COALESCE_TIMEOUT", "30")))
+
+# Batch /generate limits: requests per batch and LLM calls in flight per batch
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "100"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+# Bounded pool for the synchronous work left on the request path (local search,
+# processors without an async variant) so it never runs on the event loop
+blocking_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BLOCKING_POOL_SIZE", "8")),
+    thread_name_prefix="owu-blocking",
+)
+
+async def run_blocking(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # Carry the request context (e.g. its timing trace) into the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(blocking_pool, functools.partial(context.run, fn, *args, **kwargs))
+
+async def run_query(request: NarrativeRequest) -> NarrativeResponse:
+    """Runs the RAG processor natively async when it offers `aprocess`, else in the blocking pool."""
+    kwargs = dict(query=request.query, age=request.user_age, education=request.education_level, tone=request.tone)
+    # One processor for the whole request, even if an ingest job swaps in a new one meanwhile
+    processor = process_query
+    aprocess = getattr(processor, "aprocess", None)
+    if asyncio.iscoroutinefunction(aprocess):
+        return await aprocess(**kwargs)
+    return await run_blocking(processor, **kwargs)
+
+def metric_mode(mode: str) -> str:
+    return "rag" if mode == "RAG" else "local"
+
+def response_cache_key(request: NarrativeRequest, mode: str) -> tuple:
+    query = " ".join(normalize_query(request.query).split())
+    return (mode, query, request.user_age, request.education_level, request.tone)
+
+# Seconds since IMPORT_STARTED at which each startup phase finished, and the RAG warm-up state
+startup_timings: Dict[str, Optional[float]] = {"import": None, "local_ready": None, "rag_ready": None,
+                                               "first_response": None}
+rag_state = "cold"  # cold -> warming -> ready | unavailable
+rag_warmup: Optional[asyncio.Task] = None
+# A chain factory that produced no RAG processor, and the time.monotonic() after
+# which ensure_processor tries it again
+PROCESSOR_RETRY_INTERVAL = float(os.getenv("PROCESSOR_RETRY_INTERVAL", "60"))
+processor_failure: Optional[Tuple[Any, float]] = None
+# The on-demand processor build in progress, and how long a request waits for it
+# (seconds) before answering from local search while it finishes in the background
+processor_build: Optional[asyncio.Task] = None
+PROCESSOR_BUILD_WAIT = float(os.getenv("PROCESSOR_BUILD_WAIT", "1"))
+
+def since_import() -> float:
+    return round(time.perf_counter() - IMPORT_STARTED, 4)
+
+def import_rag_stack():
+    """
+    Imports the RAG modules and warms the tokenizer used for context budgets.
+    Runs in a worker thread; returns (get_qa_chain, ingest_documents, SemanticCache)
+    or None when the RAG dependencies are not installed.
+    """
+    try:
+        from .rag import get_qa_chain as chain_factory
+        from .ingest import ingest_documents as ingest
+        from .semantic_cache import SemanticCache
+        from .context import count_tokens
+    except ImportError as e:
+        print(f"RAG stack unavailable, staying in local search mode: {e}")
+        return None
+    count_tokens("Owu")
+    return chain_factory, ingest, SemanticCache
+
+def build_semantic_cache(cache_class):
+    if int(os.getenv("SEMANTIC_CACHE_SIZE", "512")) <= 0:
+        return None
+    return cache_class(
+        maxsize=int(os.getenv("SEMANTIC_CACHE_SIZE", "512")),
+        threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+    )
+
+async def warm_rag():
+    """
+    Imports and builds the RAG processor off the event loop, then switches /generate
+    over in one step: the globals are assigned together with no await in between, so
+    every request sees either the complete local setup or the complete RAG one.
+    """
+    global get_qa_chain, ingest_documents, semantic_cache, process_query, rag_state, processor_failure
+    rag_state = "warming"
+    stack = await asyncio.to_thread(import_rag_stack)
+    if stack is None:
+        rag_state = "unavailable"
+        return
+    chain_factory, ingest, cache_class = stack
+    cache = build_semantic_cache(cache_class)
+    processor = None
+    try:
+        # Initialize the RAG processor
+        # This might return None if no DB exists yet
+        processor = await asyncio.to_thread(chain_factory, lexical_agent=local_agent, answer_cache=cache)
+    except Exception as e:
+        print(f"Startup warning: {e}")
+    if not processor:
+        processor_failure = (chain_factory, time.monotonic() + PROCESSOR_RETRY_INTERVAL)
+    semantic_cache = cache
+    ingest_documents = ingest
+    get_qa_chain = chain_factory
+    process_query = processor
+    rag_state = "ready"
+    startup_timings["rag_ready"] = since_import()
+    print(f"RAG stack ready after {startup_timings['rag_ready']:.2f} s "
+          f"({'RAG' if processor else 'Local Search'} mode)")
+
+async def build_processor():
+    """Builds the RAG processor in a worker thread: opening the store and the LLM client blocks."""
+    global process_query, processor_failure
+    factory = get_qa_chain
+    processor = None
+    try:
+        processor = await asyncio.to_thread(factory, lexical_agent=local_agent, answer_cache=semantic_cache)
+    except Exception as e:
+        print(f"RAG processor unavailable, using local search: {e}")
+        count_error("rag_init")
+    # An ingest job may have swapped a processor in meanwhile; keep that one
+    if process_query or factory is not get_qa_chain:
+        return
+    if processor:
+        process_query = processor
+    else:
+        processor_failure = (factory, time.monotonic() + PROCESSOR_RETRY_INTERVAL)
+
+async def ensure_processor():
+    """
+    The RAG processor, built on demand once the RAG stack is loaded. Concurrent
+    requests share one build, which runs off the event loop; a request waits for it
+    at most PROCESSOR_BUILD_WAIT seconds and is answered by local search after that.
+    When there is no vector store or the build fails, the build is retried at most
+    every PROCESSOR_RETRY_INTERVAL seconds, not per request.
+    """
+    global processor_build
+    if process_query or get_qa_chain is None:
+        return process_query
+    if processor_failure is not None and processor_failure[0] is get_qa_chain and time.monotonic() < processor_failure[1]:
+        return process_query
+    loop = asyncio.get_running_loop()
+    if processor_build is None or processor_build.done() or processor_build.get_loop() is not loop:
+        processor_build = loop.create_task(build_processor())
+    # Unlike wait_for, asyncio.wait leaves the build running when the wait times out
+    await asyncio.wait({processor_build}, timeout=PROCESSOR_BUILD_WAIT)
+    return process_query
+
+def ensure_rag_warmup() -> asyncio.Task:
+    """The warm-up task, started on first call."""
+    global rag_warmup
+    if rag_warmup is None:
+        rag_warmup = asyncio.get_running_loop().create_task(warm_rag())
+    return rag_warmup
+
 @app.on_event("startup")
 async def startup_event():
-    global process_query
-    if get_qa_chain:
-        try:
-            # Initialize the RAG processor
-            # This might return None if no DB exists yet
-            process_query = get_qa_chain()
-        except Exception as e:
-            print(f"Startup warning: {e}")
+    try:
+        await asyncio.to_thread(local_agent.refresh)
+    except Exception as e:
+        print(f"Local agent warning: {e}")
+    startup_timings["local_ready"] = since_import()
+    warmup = ensure_rag_warmup()
+    if RAG_WARMUP == "blocking":
+        await warmup
 
 @app.post("/generate", response_model=NarrativeResponse)
-async def generate_narrative(request: NarrativeRequest):
-    global process_query
-    
-    # Lazy initialization or re-initialization attempt
-    if not process_query and get_qa_chain:
-         process_query = get_qa_chain()
+async def generate_narrative(request: NarrativeRequest, debug: bool = False):
+    """
+    Answers one request. With ?debug=true (or DEBUG_TIMINGS set) the per-stage
+    timings in milliseconds are returned in metadata["timings_ms"].
+    """
+    start = time.perf_counter()
+    token = start_trace() if debug or DEBUG_TIMINGS else None
+    try:
+        response = await answer_request(request)
+    finally:
+        trace = finish_trace(token) if token is not None else None
+        elapsed = time.perf_counter() - start
+        registry.observe("owu_request_seconds", elapsed, (("endpoint", "/generate"),))
+    if trace is not None:
+        response.metadata["timings_ms"] = dict(trace, total=round(elapsed * 1000, 3))
+    if startup_timings["first_response"] is None:
+        startup_timings["first_response"] = since_import()
+    return response
+
+def cached_response(key: tuple, mode: str) -> Optional[NarrativeResponse]:
+    """A private copy of the cached answer for `key`, marked and counted as a cache hit; None on a miss."""
+    cached = response_cache.get(key)
+    if cached is None:
+        return None
+    # Copy so per-request metadata never leaks back into the cache
+    response = cached.model_copy(deep=True)
+    response.metadata["cache"] = "hit"
+    count_response(metric_mode(mode))
+    return response
+
+def remember_response(key: tuple, response: NarrativeResponse, generation: int):
+    """
+    Caches a copy of a freshly computed answer. `generation` is the response cache's
+    when the request started: an answer from before a data reload or store swap
+    cleared the cache is not stored.
+    """
+    # Answers that failed to parse are retried rather than served for the whole TTL
+    if "error" not in response.metadata:
+        response_cache.set(key, response.model_copy(deep=True), generation)
+
+def with_local_stats(response: NarrativeResponse) -> NarrativeResponse:
+    response.metadata.update(local_agent.stats())
+    return response
+
+def local_failed(error: Exception):
+    """Records a local search failure; callers fall back to mock answers."""
+    print(f"Local Agent Error: {error}")
+    count_error("local")
+
+async def answer_request(request: NarrativeRequest) -> NarrativeResponse:
+    await ensure_processor()
 
+    generation = response_cache.generation
+    mode = "RAG" if process_query else "Local Search"
+    key = response_cache_key(request, mode)
+    cached = cached_response(key, mode)
+    if cached is not None:
+        return cached
+
+    # Identical requests already being answered wait for that answer instead
+    (response, served_as), shared = await in_flight.run(key, lambda: compute_response(request, key, generation))
+    count_response(served_as)
+    # Every caller gets its own copy; the shared result stays untouched
+    response = response.model_copy(deep=True)
+    if shared:
+        response.metadata["coalesced"] = True
+    return response
+
+async def compute_response(request: NarrativeRequest, key: tuple, generation: int) -> Tuple[NarrativeResponse, str]:
+    """Answers a response cache miss. Returns the response and the mode it counts as in metrics."""
     # Fallback to SimpleSearchAgent if RAG is unavailable
     if not process_query:
         print("Using SimpleSearchAgent (Local Mode)")
         try:
-             # Lazy load global agent to avoid re-initializing on every request if we can help it, 
-             # but for now simple instantiation is safer to ensure data freshness or we can make it global too.
-             # Let's make it a global for performance if data grows, but local for now is fine.
-             from .simple_agent import SimpleSearchAgent
-             base_dir = os.path.dirname(os.path.abspath(__file__))
-             data_dir = os.path.join(base_dir, "data", "raw")
-             local_agent = SimpleSearchAgent(data_dir)
-             
-             return local_agent.generate(request.query, request.user_age, request.education_level, request.tone)
+             agent = await local_agent.get()
+             response = with_local_stats(await run_blocking(agent.generate, request.query, request.user_age, request.education_level, request.tone))
         except Exception as e:
-            print(f"Local Agent Error: {e}")
-            return mock_response(request)
+            local_failed(e)
+            return mock_response(request), "mock"
+        remember_response(key, response, generation)
+        return response, "local"
 
+    # Raw data changes also invalidate cached RAG answers
+    local_agent.poll()
     try:
-        response = process_query(
-            query=request.query,
-            age=request.user_age,
-            education=request.education_level,
-            tone=request.tone
-        )
-        return response
+        response = await run_query(request)
     except Exception as e:
         print(f"Generation Error: {e}")
+        count_error("rag")
         raise HTTPException(status_code=500, detail=str(e))
+    remember_response(key, response, generation)
+    return response, "rag"
 
-@app.post("/ingest")
-async def trigger_ingest():
-    if ingest_documents:
+def response_events(response: NarrativeResponse, narrative_streamed: bool = False) -> Iterator[Tuple[str, Any]]:
+    """The trailing stream events for a finished response."""
+    if not narrative_streamed:
+        yield "narrative", {"delta": response.narrative}
+    yield "timeline", {"timeline": [t.model_dump() for t in response.timeline]}
+    yield "sources", {"sources": [s.model_dump() for s in response.sources]}
+    yield "done", {"response": response.model_dump()}
+
+async def stream_narrative(request: NarrativeRequest) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Event stream behind /generate/stream: narrative deltas as soon as they exist,
+    then timeline, sources and the complete response.
+    """
+    await ensure_processor()
+
+    generation = response_cache.generation
+    mode = "RAG" if process_query else "Local Search"
+    key = response_cache_key(request, mode)
+    cached = cached_response(key, mode)
+    if cached is not None:
+        for event in response_events(cached):
+            yield event
+        return
+
+    if not process_query:
         try:
-            ingest_documents()
-            # Re-initialize chain to pick up new data
-            global process_query
-            if get_qa_chain:
-                process_query = get_qa_chain()
-            return {"status": "Ingestion triggered and database updated"}
+            agent = await local_agent.get()
+            if agent.documents:
+                # Paragraphs go out as soon as they are ranked
+                top_docs = await run_blocking(agent.rank, request.query, 3)
+                for i, (_, doc) in enumerate(top_docs):
+                    yield "narrative", {"delta": ("\n\n" if i else "") + doc["content"]}
+                response = await run_blocking(agent.build_response, top_docs)
+                streamed = bool(top_docs)
+            else:
+                response = await run_blocking(agent.generate, request.query, request.user_age, request.education_level, request.tone)
+                streamed = False
+            with_local_stats(response)
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Ingestion failed: {e}")
+            local_failed(e)
+            count_response("mock")
+            for event in response_events(mock_response(request)):
+                yield event
+            return
     else:
+        local_agent.poll()
+        astream = getattr(process_query, "astream", None)
+        try:
+            if inspect.isasyncgenfunction(astream):
+                streamed = False
+                async for kind, payload in astream(query=request.query, age=request.user_age,
+                                                   education=request.education_level, tone=request.tone):
+                    if kind == "narrative":
+                        streamed = True
+                        yield "narrative", {"delta": payload}
+                    else:
+                        response = payload
+            else:
+                response = await run_query(request)
+                streamed = False
+        except Exception as e:
+            print(f"Generation Error: {e}")
+            count_error("rag")
+            yield "error", {"detail": str(e)}
+            return
+
+    remember_response(key, response, generation)
+    count_response(metric_mode(mode))
+    for event in response_events(response, narrative_streamed=streamed):
+        yield event
+
+@app.post("/generate/stream")
+async def generate_narrative_stream(request: NarrativeRequest):
+    """
+    Streaming /generate as newline-delimited JSON. Each line is an object with an
+    "event" of narrative (with a text "delta"), timeline, sources, done (with the full
+    response) or error.
+    """
+    async def body():
+        start = time.perf_counter()
+        async for event, payload in stream_narrative(request):
+            yield json.dumps(dict(payload, event=event), ensure_ascii=False) + "\n"
+        registry.observe("owu_request_seconds", time.perf_counter() - start, (("endpoint", "/generate/stream"),))
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+async def batch_results(requests: List[NarrativeRequest]) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Answers a batch of requests, yielding (index, NarrativeResponse or Exception) in
+    request order as soon as each result and all the ones before it are ready.
+    Identical requests (same cache key) are answered once. In local mode the whole
+    batch is ranked in one pass; in RAG mode the queries are embedded together up
+    front and at most BATCH_CONCURRENCY chains run at a time.
+    """
+    await ensure_processor()
+
+    generation = response_cache.generation
+    mode = "RAG" if process_query else "Local Search"
+    keys = [response_cache_key(request, mode) for request in requests]
+    loop = asyncio.get_running_loop()
+    results: Dict[tuple, asyncio.Future] = {}
+    pending: List[Tuple[tuple, NarrativeRequest]] = []
+    for key, request in zip(keys, requests):
+        if key in results:
+            continue
+        results[key] = loop.create_future()
+        cached = cached_response(key, mode)
+        if cached is not None:
+            results[key].set_result(cached)
+        else:
+            pending.append((key, request))
+
+    tasks = []
+    if pending and not process_query:
+        try:
+            agent = await local_agent.get()
+            responses = await run_blocking(agent.generate_many, [request.query for _, request in pending])
+            for (key, _), response in zip(pending, responses):
+                remember_response(key, with_local_stats(response), generation)
+                results[key].set_result(response)
+                count_response("local")
+        except Exception as e:
+            local_failed(e)
+            for key, request in pending:
+                if not results[key].done():
+                    results[key].set_result(mock_response(request))
+                    count_response("mock")
+    elif pending:
+        local_agent.poll()
+        prefetch = getattr(process_query, "prefetch", None)
+        if prefetch:
+            try:
+                await run_blocking(prefetch, [request.query for _, request in pending])
+            except Exception as e:
+                # Each query is embedded again on its own below
+                print(f"Batch embedding failed: {e}")
+                count_error("embed")
+        limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def answer(key: tuple, request: NarrativeRequest):
+            async with limit:
+                try:
+                    response = await run_query(request)
+                except Exception as e:
+                    print(f"Generation Error: {e}")
+                    count_error("rag")
+                    results[key].set_result(e)
+                    return
+            remember_response(key, response, generation)
+            results[key].set_result(response)
+            count_response("rag")
+
+        tasks = [asyncio.ensure_future(answer(key, request)) for key, request in pending]
+
+    try:
+        seen = set()
+        for i, key in enumerate(keys):
+            result = await results[key]
+            if key in seen and not isinstance(result, Exception):
+                # Duplicates get their own copy of the shared answer
+                result = result.model_copy(deep=True)
+            seen.add(key)
+            yield i, result
+    finally:
+        # A client that disconnects mid-batch should not keep LLM calls running
+        for task in tasks:
+            task.cancel()
+
+@app.post("/generate/batch")
+async def generate_narrative_batch(requests: List[NarrativeRequest]):
+    """
+    Batch /generate for worksheets and bulk jobs, as newline-delimited JSON. One line
+    per request, in request order, each streamed as soon as it is ready:
+    {"index": i, "response": {...}} or {"index": i, "error": "..."}.
+    """
+    if len(requests) > BATCH_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_SIZE} requests per batch")
+
+    async def body():
+        start = time.perf_counter()
+        async for index, result in batch_results(requests):
+            if isinstance(result, Exception):
+                line = {"index": index, "error": str(result)}
+            else:
+                line = {"index": index, "response": result.model_dump()}
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+        registry.observe("owu_request_seconds", time.perf_counter() - start, (("endpoint", "/generate/batch"),))
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+@app.get("/timeline", response_model=TimelineRangeResponse)
+async def timeline_range(start: int, end: int, limit: int = Query(100, ge=1, le=1000)):
+    """
+    Events the archive mentions between two years inclusive, e.g. /timeline?start=1800&end=1850.
+    Answered from the local timeline index without an LLM call; eras such as
+    "19th century" or "1820s" are included when they overlap the range.
+    """
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    request_start = time.perf_counter()
+    agent = await local_agent.get()
+    total, events = await run_blocking(agent.events_between, start, end, limit)
+    registry.observe("owu_request_seconds", time.perf_counter() - request_start, (("endpoint", "/timeline"),))
+    return TimelineRangeResponse(start=start, end=end, total=total, events=events)
+
+ingest_jobs = JobRegistry()
+# Strong references to running job tasks so they are not garbage collected
+ingest_tasks = set()
+
+def build_store(job: IngestJob):
+    """
+    The blocking part of an ingest job, run in a worker thread. Ingests into a new
+    store generation seeded from the live one, publishes it, and builds a processor
+    over it; if that fails the previous generation is made live again. Returns (report, processor, directories to keep), or (report, None, None)
+    when nothing changed and the live store stays as it is.
+    """
+    from .ingest import store_base_dir
+    from .vector_index import new_store_dir, publish_store_dir, restore_store_dir
+
+    base = store_base_dir()
+    job.update("seed")
+    path = new_store_dir(base, job.id)
+    try:
+        report = ingest_documents(db_dir=path, progress=job.update)
+    except Exception:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    if not (report.get("chunks_added") or report.get("chunks_deleted")):
+        shutil.rmtree(path, ignore_errors=True)
+        return report, None, None
+    job.update("swap", job.chunks_processed, job.chunks_total)
+    previous = publish_store_dir(base, path)
+    try:
+        processor = get_qa_chain(lexical_agent=local_agent, answer_cache=semantic_cache) if get_qa_chain else None
+    except Exception:
+        # A generation no processor can be built over must not stay live
+        restore_store_dir(base, previous)
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    return report, processor, (path, previous)
+
+async def run_ingest_job(job: IngestJob):
+    """
+    Runs an ingest job off the event loop while /generate keeps answering from the
+    current processor, then swaps the new processor in and drops cached answers in
+    one step on the loop.
+    """
+    global process_query
+    job.start()
+    try:
+        report, processor, keep = await asyncio.to_thread(build_store, job)
+    except Exception as e:
+        print(f"Ingest job {job.id} failed: {e}")
+        count_error("ingest")
+        job.finish(error=str(e))
+        return
+    if keep is not None:
+        process_query = processor
+        response_cache.clear()
+        clear_semantic_cache()
+        from .ingest import store_base_dir
+        from .vector_index import prune_store_dirs
+        await asyncio.to_thread(prune_store_dirs, store_base_dir(), keep)
+    job.finish(report)
+
+def job_status(job: IngestJob) -> dict:
+    return dict(job.to_dict(), status_url=f"/ingest/{job.id}")
+
+@app.post("/ingest", status_code=202)
+async def trigger_ingest():
+    """Starts a background ingestion job; poll GET /ingest/{job_id} for its progress."""
+    if ingest_documents is None:
+        # Ingestion needs the RAG stack; finish warming it up first
+        await asyncio.shield(ensure_rag_warmup())
+    if not ingest_documents:
         raise HTTPException(status_code=503, detail="Ingestion module unavailable")
+    job = ingest_jobs.create()
+    if job is None:
+        active = ingest_jobs.active()
+        raise HTTPException(status_code=409, detail={"message": "An ingestion job is already running",
+                                                     "job_id": active.id if active else None})
+    task = asyncio.get_running_loop().create_task(run_ingest_job(job))
+    ingest_tasks.add(task)
+    task.add_done_callback(ingest_tasks.discard)
+    return job_status(job)
+
+@app.get("/ingest")
+async def list_ingest_jobs():
+    return {"jobs": [job_status(job) for job in ingest_jobs.recent()]}
+
+@app.get("/ingest/{job_id}")
+async def ingest_job_status(job_id: str):
+    """Stage, chunks processed and throughput of an ingest job."""
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingest job {job_id}")
+    return job_status(job)
+
+@app.get("/status")
+async def status():
+    """Reports which mode /generate is serving from and the local index state."""
+    active_job = ingest_jobs.active()
+    return {
+        "mode": "RAG" if process_query else "Local Search",
+        "rag_state": rag_state,
+        "ingest_job": job_status(active_job) if active_job else None,
+        # Seconds after the app module started importing
+        "startup": startup_timings,
+        "local_agent": local_agent.stats(),
+        "response_cache": response_cache.stats(),
+        "semantic_cache": semantic_cache.stats() if semantic_cache is not None else None,
+        "coalescing": in_flight.stats(),
+    }
+
+def cache_metrics():
+    """Scrape-time values for /metrics from the caches and the local index."""
+    caches = [("response", response_cache.stats())]
+    if semantic_cache is not None:
+        caches.append(("semantic", semantic_cache.stats()))
+    embeddings_module = sys.modules.get(f"{__package__}.embeddings")
+    if embeddings_module is not None:
+        for name, embeddings in list(embeddings_module._instances.items()):
+            caches.append((f"embedding:{name}", embeddings.stats()))
+    for cache, stats in caches:
+        labels = (("cache", cache),)
+        yield "owu_cache_hits_total", "counter", "Cache hits", labels, stats["hits"]
+        yield "owu_cache_misses_total", "counter", "Cache misses", labels, stats["misses"]
+        if "size" in stats:
+            yield "owu_cache_entries", "gauge", "Entries held", labels, stats["size"]
+    if semantic_cache is not None:
+        yield "owu_saved_llm_calls_total", "counter", "LLM calls answered by the semantic cache", (), semantic_cache.hits
+    coalescing = in_flight.stats()
+    yield ("owu_coalesced_requests_total", "counter", "Requests that waited for an identical request in flight", (),
+           coalescing["coalesced"])
+    yield ("owu_coalesce_timeouts_total", "counter", "Coalesced requests that gave up waiting and computed their own",
+           (), coalescing["timeouts"])
+    yield "owu_requests_in_flight", "gauge", "Distinct /generate computations running", (), coalescing["in_flight"]
+    agent_stats = local_agent.stats()
+    yield "owu_local_documents", "gauge", "Paragraphs in the local search index", (), agent_stats["documents"]
+    yield "owu_local_reloads_total", "counter", "Local index (re)loads", (), agent_stats["reloads"]
+    yield "owu_rag_enabled", "gauge", "1 when /generate is serving from RAG", (), 1 if process_query else 0
+    for phase, seconds in startup_timings.items():
+        if seconds is not None:
+            yield ("owu_startup_seconds", "gauge", "Seconds from app import to each startup phase",
+                   (("phase", phase),), seconds)
+
+registry.add_collector(cache_metrics)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of stage latencies, response modes, errors and caches."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    blocking_pool.shutdown(wait=False)
 
 def mock_response(request: NarrativeRequest) -> NarrativeResponse:
     """Provides a safe fallback response when RAG is offline."""
@@ -114,3 +722,5 @@ elif os.path.exists(os.path.join(os.path.dirname(__file__), "../frontend")):
      raw_frontend_path = os.path.join(os.path.dirname(__file__), "../frontend")
      print(f"Serving frontend from: {os.path.abspath(raw_frontend_path)}")
      app.mount("/", StaticFiles(directory=raw_frontend_path, html=True), name="frontend")
+
+startup_timings["import"] = since_import()
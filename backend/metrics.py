@@ -0,0 +1,196 @@
+import os
+import time
+import bisect
+import threading
+import contextlib
+import contextvars
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Aggregation for /metrics; METRICS_ENABLED=false turns recording into a no-op
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Per-request stage timings in NarrativeResponse.metadata for every request (or per request with ?debug=true)
+DEBUG_TIMINGS = os.getenv("DEBUG_TIMINGS", "").lower() in ("1", "true", "yes")
+
+# Seconds; covers in-memory lookups through slow LLM calls
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+class Registry:
+    """
+    Process-wide counters and histograms rendered in the Prometheus text format.
+    Collectors are callbacks that contribute values owned elsewhere (cache stats)
+    at scrape time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Labels, float]]]] = []
+
+    def describe(self, name: str, kind: str, help_text: str):
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0.0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = ()):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = Histogram()
+            histogram.observe(value)
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Labels, float]]]):
+        """`collector()` yields (name, kind, help, labels, value) tuples."""
+        self._collectors.append(collector)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _labels(labels: Labels, extra: Labels = ()) -> str:
+        pairs = labels + extra
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def render(self) -> str:
+        samples: Dict[str, List[str]] = {}
+        kinds: Dict[str, Tuple[str, str]] = {}
+
+        def add(name: str, line: str, kind: str, help_text: str = ""):
+            kinds.setdefault(name, self._help.get(name, (kind, help_text)))
+            samples.setdefault(name, []).append(line)
+
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = [(key, list(h.counts), h.sum, h.buckets) for key, h in self._histograms.items()]
+        for (name, labels), value in sorted(counters):
+            add(name, f"{name}{self._labels(labels)} {value:g}", "counter")
+        for (name, labels), counts, total, buckets in sorted(histograms, key=lambda item: item[0]):
+            cumulative = 0
+            for bound, count in zip(buckets, counts):
+                cumulative += count
+                add(name, f"{name}_bucket{self._labels(labels, (('le', f'{bound:g}'),))} {cumulative}", "histogram")
+            cumulative += counts[-1]
+            add(name, f"{name}_bucket{self._labels(labels, (('le', '+Inf'),))} {cumulative}", "histogram")
+            add(name, f"{name}_sum{self._labels(labels)} {total:.6f}", "histogram")
+            add(name, f"{name}_count{self._labels(labels)} {cumulative}", "histogram")
+        for collector in self._collectors:
+            for name, kind, help_text, labels, value in collector():
+                add(name, f"{name}{self._labels(labels)} {value:g}", kind, help_text)
+
+        lines = []
+        for name, entries in samples.items():
+            kind, help_text = kinds[name]
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(entries)
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+registry.describe("owu_stage_seconds", "histogram", "Time spent per request stage")
+registry.describe("owu_request_seconds", "histogram", "End-to-end request latency per endpoint")
+registry.describe("owu_responses_total", "counter",
+                  "Responses served, by mode (rag, local, mock); cache hits count under the mode that answered")
+registry.describe("owu_errors_total", "counter", "Errors, by stage")
+
+# Stage -> milliseconds for the request being traced, or None when not tracing
+_trace: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("owu_trace", default=None)
+# Prefix for the stages of work done inside another stage, e.g. "lexical_" for the
+# local search run by hybrid retrieval, so it is not counted as local requests
+_stage_prefix: contextvars.ContextVar[str] = contextvars.ContextVar("owu_stage_prefix", default="")
+
+@contextlib.contextmanager
+def stage_prefix(prefix: str):
+    """Records the stages of the enclosed block as `prefix` + stage."""
+    token = _stage_prefix.set(prefix)
+    try:
+        yield
+    finally:
+        _stage_prefix.reset(token)
+
+def record(stage: str, seconds: float):
+    """Adds a finished stage to the histograms and to the current trace, if any."""
+    stage = _stage_prefix.get() + stage
+    if METRICS_ENABLED:
+        registry.observe("owu_stage_seconds", seconds, (("stage", stage),))
+    trace = _trace.get()
+    if trace is not None:
+        trace[stage] = round(trace.get(stage, 0.0) + seconds * 1000, 3)
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.start)
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def span(stage: str):
+    """
+    Times a block as one request stage: `with span("score"): ...`. With metrics off
+    and no trace active this is a shared no-op object.
+    """
+    if not METRICS_ENABLED and _trace.get() is None:
+        return _NO_SPAN
+    return _Span(stage)
+
+def active() -> bool:
+    """Whether stage timings are wanted at all, so callers can skip setting up timers."""
+    return METRICS_ENABLED or _trace.get() is not None
+
+def start_trace() -> contextvars.Token:
+    """Begins collecting stage timings for the current request (and tasks/threads it starts)."""
+    return _trace.set({})
+
+def finish_trace(token: contextvars.Token) -> Dict[str, float]:
+    trace = _trace.get() or {}
+    _trace.reset(token)
+    return trace
+
+def count_response(mode: str):
+    registry.inc("owu_responses_total", (("mode", mode),))
+
+def count_error(stage: str):
+    registry.inc("owu_errors_total", (("stage", stage),))
@@ -0,0 +1,171 @@
+import os
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from .text_buffer import TextBuffer
+
+# Lines that end a paragraph, i.e. the second newline of a "\n\n"
+BLANK_LINES = (b"\n", b"\r\n")
+# Paragraphs read back per batch when iterating a store whose text is on disk
+READ_BATCH = 1024
+
+def clean_paragraph(raw: bytes) -> str:
+    return raw.decode("utf-8").replace("\r\n", "\n").strip()
+
+def iter_paragraphs(path: str) -> Iterator[Tuple[str, int, int]]:
+    """
+    Streams the non-empty paragraphs of a UTF-8 text file as (text, byte offset,
+    byte length), reading one line at a time. Paragraphs are the blocks between
+    blank lines, i.e. the same pieces `text.split("\\n\\n")` produces once stripped.
+    """
+    with open(path, "rb") as f:
+        lines: List[bytes] = []
+        start = position = 0
+        for line in f:
+            if line in BLANK_LINES:
+                if lines:
+                    raw = b"".join(lines)
+                    text = clean_paragraph(raw)
+                    if text:
+                        yield text, start, len(raw)
+                    lines = []
+                position += len(line)
+                start = position
+                continue
+            lines.append(line)
+            position += len(line)
+        if lines:
+            raw = b"".join(lines)
+            text = clean_paragraph(raw)
+            if text:
+                yield text, start, len(raw)
+
+def file_stamp(path: str) -> Tuple[int, int]:
+    """(size, mtime_ns) of a file, to tell whether it changed since it was read."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def read_paragraphs(path: str, spans: Sequence[Tuple[int, int]], stamp: Optional[Tuple[int, int]] = None) -> List[str]:
+    """
+    Reads back several paragraphs located by iter_paragraphs, as (offset, length)
+    spans, under one open handle. With the file's `stamp` from when it was read,
+    raises OSError instead of returning garbage if it has changed since.
+    """
+    with open(path, "rb") as f:
+        if stamp is not None:
+            stat = os.fstat(f.fileno())
+            if (stat.st_size, stat.st_mtime_ns) != stamp:
+                raise OSError(f"{path} changed since it was indexed")
+        texts = []
+        for offset, length in spans:
+            f.seek(offset)
+            texts.append(clean_paragraph(f.read(length)))
+        return texts
+
+def read_paragraph(path: str, offset: int, length: int) -> str:
+    """Reads back one paragraph located by iter_paragraphs."""
+    return read_paragraphs(path, [(offset, length)])[0]
+
+class ParagraphStore:
+    """
+    Compact replacement for a list of paragraph dicts. Each paragraph is a row in
+    flat arrays (interned source id, oriki flag, byte offset and length in its
+    file); the text itself lives in one TextBuffer or, with `in_memory=False`,
+    stays on disk and is read back when a paragraph is accessed. Indexing returns
+    the same {"source", "content", "is_oriki"} dicts callers already use, built on
+    access (plus the paragraph's "id"), so only the paragraphs a response actually
+    shows are materialized. Files read back from disk must be unchanged since
+    they were loaded; otherwise reads raise OSError until the agent is reloaded.
+    """
+
+    def __init__(self, in_memory: bool = True):
+        self.sources: List[str] = []
+        # File each source id was read from (None for paragraphs added from memory)
+        self.paths: List[Optional[str]] = []
+        # (size, mtime_ns) of each path when its paragraphs were located, for text kept on disk
+        self.stamps: List[Optional[Tuple[int, int]]] = []
+        self._source_ids: Dict[Tuple[str, Optional[str]], int] = {}
+        self.source_ids = array("i")
+        self.flags = array("B")
+        self.offsets = array("q")
+        self.lengths = array("q")
+        self.text: Optional[TextBuffer] = TextBuffer() if in_memory else None
+
+    @property
+    def in_memory(self) -> bool:
+        return self.text is not None
+
+    def intern(self, source: str, path: Optional[str] = None) -> int:
+        """Id of `source`, stored once however many paragraphs it has."""
+        key = (source, path)
+        if key not in self._source_ids:
+            self._source_ids[key] = len(self.sources)
+            self.sources.append(source)
+            self.paths.append(path)
+            self.stamps.append(file_stamp(path) if path is not None and self.text is None else None)
+        return self._source_ids[key]
+
+    def add(self, source_id: int, content: str, is_oriki: bool, offset: int = -1, length: int = 0) -> int:
+        """Stores a paragraph of an interned source and returns its id."""
+        if self.text is not None:
+            self.text.append(content)
+        elif self.paths[source_id] is None:
+            raise ValueError("Paragraphs kept on disk need the file they were read from")
+        self.source_ids.append(source_id)
+        self.flags.append(1 if is_oriki else 0)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        return len(self.source_ids) - 1
+
+    def append(self, doc: dict):
+        """list.append for a paragraph dict, e.g. when a corpus is assembled in memory."""
+        self.add(self.intern(doc["source"]), doc["content"], doc["is_oriki"])
+
+    def content(self, index: int) -> str:
+        if self.text is not None:
+            return self.text[index]
+        return self.contents([index])[0]
+
+    def contents(self, indices: Sequence[int]) -> List[str]:
+        """Texts of several paragraphs; text on disk is read with one open per file."""
+        if self.text is not None:
+            return [self.text[i] for i in indices]
+        by_source: Dict[int, List[int]] = {}
+        for i in indices:
+            by_source.setdefault(self.source_ids[i], []).append(i)
+        texts: Dict[int, str] = {}
+        for source_id, rows in by_source.items():
+            rows.sort(key=self.offsets.__getitem__)
+            spans = [(self.offsets[i], self.lengths[i]) for i in rows]
+            texts.update(zip(rows, read_paragraphs(self.paths[source_id], spans, self.stamps[source_id])))
+        return [texts[i] for i in indices]
+
+    def take(self, indices: Sequence[int]) -> List[dict]:
+        """The paragraph dicts for several ids, e.g. a ranking's top k, read back together."""
+        return [self._row(i, content) for i, content in zip(indices, self.contents(indices))]
+
+    def __len__(self) -> int:
+        return len(self.source_ids)
+
+    def __getitem__(self, index: int) -> dict:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ParagraphStore index out of range")
+        return self._row(index, self.content(index))
+
+    def _row(self, index: int, content: str) -> dict:
+        return {
+            "id": index,
+            "source": self.sources[self.source_ids[index]],
+            "content": content,
+            "is_oriki": bool(self.flags[index]),
+        }
+
+    def __iter__(self) -> Iterator[dict]:
+        for start in range(0, len(self), READ_BATCH):
+            yield from self.take(range(start, min(start + READ_BATCH, len(self))))
+
+    @property
+    def nbytes(self) -> int:
+        rows = sum(a.itemsize * len(a) for a in (self.source_ids, self.flags, self.offsets, self.lengths))
+        return rows + (self.text.nbytes if self.text is not None else 0)
@@ -1,15 +1,42 @@
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+
+AUDIENCES = {
+    "child": "Children under 12",
+    "teen": "Teenagers (12-17 years old)",
+    "adult": "Adults (18+)",
+}
+
+def age_band(age: int) -> str:
+    """Buckets an age into the bands the prompt distinguishes."""
+    if age < 12:
+        return "child"
+    elif age < 18:
+        return "teen"
+    return "adult"
+
+def persona_key(age: int, education: str, tone: str) -> Tuple[str, str, str]:
+    """
+    The (age band, education, tone) triple that fully determines adjust_prompt's output.
+    Unrecognised education levels and tones collapse onto the default branch they get.
+    """
+    if education not in ("Academic", "General"):
+        education = "Child"
+    if tone not in ("Storyteller", "Formal"):
+        tone = "Neutral"
+    return age_band(age), education, tone
 
 def adjust_prompt(query: str, age: int, education: str, tone: str) -> str:
     """
     Constructs a sophisticated system prompt based on user demographics and preferences.
+    The result depends only on persona_key(age, education, tone), so it can be compiled once per persona.
     """
-    
+    band, education, tone = persona_key(age, education, tone)
+
     # 1. Age-Based Adaptation
-    if age < 12:
+    if band == "child":
         complexity = "Simple language, short sentences, focus on exciting stories."
         perspective = "Like a wise elder telling a bedtime story."
-    elif age < 18:
+    elif band == "teen":
         complexity = "Moderate complexity, relatable analogies, focus on cause and effect."
         perspective = "Engaging history teacher."
     else:
@@ -35,7 +62,7 @@ def adjust_prompt(query: str, age: int, education: str, tone: str) -> str:
     # Construct the System Instruction
     system_instruction = f"""
     You are an expert historian of the Owu people. 
-    Target Audience: {age} years old.
+    Target Audience: {AUDIENCES[band]}.
     Persona: {perspective}
     Language Style: {complexity}
     
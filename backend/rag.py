@@ -1,135 +1,421 @@
 import os
+import re
 import json
-from typing import List, Dict, Any
+import time
+import threading
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+from pydantic import ValidationError
 from .schemas import NarrativeResponse, TimelineEvent, Source
-from .personalization import adjust_prompt
+from .personalization import adjust_prompt, persona_key
+from .metrics import active, count_error, record, span
 
 # Setup Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_DIR = os.path.join(BASE_DIR, "data", "chroma_db")
 
+# We ask for JSON output explicitly in the prompt to ensure parsing check.
+# Although PydanticOutputParser is good, for complex narrative + timeline,
+# a two-step or well-prompted single step is often more robust.
+PROMPT_TEMPLATE = """
+{system_instruction}
+
+Context from Owu Archives:
+{context}
+
+User Query: {question}
+
+OUTPUT FORMAT INSTRUCTIONS:
+You must output a valid JSON object matching this structure:
+{{
+    "narrative": "The historical narrative text...",
+    "timeline": [
+        {{"year": "1821", "event": "Owu War begins"}},
+        ...
+    ],
+    "sources": [
+        {{"title": "Oral Tradition", "type": "Oral", "confidence_score": 0.9}},
+        ...
+    ]
+}}
+
+Ensure the 'narrative' field contains the full response.
+The 'sources' field should list the documents you used from the context.
+If you don't know the answer, set 'narrative' to "I could not find information on that in the archives."
+"""
+
 def get_vectorstore():
     # Lazy import to avoid startup overhead
+    try:
+        from .embeddings import get_embeddings
+        from .vector_index import INDEX_DIR, NumpyVectorStore, live_store_dir, store_backend
+    except ImportError:
+        return None
+
+    if store_backend() == "numpy":
+        directory = live_store_dir(INDEX_DIR)
+        if not os.path.exists(directory):
+            return None
+        try:
+            return NumpyVectorStore(directory, get_embeddings())
+        except Exception as e:
+            print(f"VectorStore Init Error: {e}")
+            return None
+
     try:
         from langchain_community.vectorstores import Chroma
-        from langchain_openai import OpenAIEmbeddings
     except ImportError:
         return None
 
-    if not os.path.exists(DB_DIR):
+    directory = live_store_dir(DB_DIR)
+    if not os.path.exists(directory):
         # Return empty or handle gracefully if no DB yet
         return None
-    
+
     try:
-        embeddings = OpenAIEmbeddings()
-        return Chroma(persist_directory=DB_DIR, embedding_function=embeddings)
+        embeddings = get_embeddings()
+        return Chroma(persist_directory=directory, embedding_function=embeddings)
     except Exception as e:
         print(f"VectorStore Init Error: {e}")
         return None
 
-def get_qa_chain():
+def get_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"), temperature=0.3)
+
+def parse_output(raw_output: str, source_docs: List[Any]) -> NarrativeResponse:
+    """Turns the LLM's JSON answer into a NarrativeResponse, falling back to the raw text."""
+    try:
+        # Clean up potential markdown code blocks
+        json_str = raw_output.strip()
+        if json_str.startswith("```json"):
+            json_str = json_str[7:]
+        if json_str.endswith("```"):
+            json_str = json_str[:-3]
+
+        data = json.loads(json_str)
+
+        # Enrich sources from actual retrieved docs if the LLM didn't do a perfect job
+        # or to ensure accuracy.
+        # For this implementation, we'll merge them.
+        if not data.get("sources"):
+            data["sources"] = []
+            for doc in source_docs:
+                data["sources"].append({
+                    "title": doc.metadata.get("source", "Unknown"),
+                    "type": doc.metadata.get("type", "General"),
+                    "confidence_score": 0.85 # Placeholder confidence
+                })
+
+        return NarrativeResponse(**data)
+
+    except (json.JSONDecodeError, ValidationError) as e:
+        print(f"Parsing Error: {e}")
+        # Fallback for parsing failures
+        return NarrativeResponse(
+            narrative=raw_output, # Return raw text if JSON fails
+            timeline=[],
+            sources=[Source(title="System", type="Error", confidence_score=0.0)],
+            metadata={"error": "Output parsing failed"}
+        )
+
+class NarrativeExtractor:
+    """
+    Incrementally pulls the value of the "narrative" field out of a JSON answer that
+    is still being generated, decoding JSON string escapes, so the text can be
+    streamed before the whole object (and its timeline/sources) has arrived.
+    """
+    KEY = re.compile(r'"narrative"\s*:\s*"')
+    ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = None  # Next unread index inside the narrative string
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """Adds generated text and returns the newly completed part of the narrative."""
+        self.buffer += chunk
+        if self.done:
+            return ""
+        if self.pos is None:
+            match = self.KEY.search(self.buffer)
+            if not match:
+                return ""
+            self.pos = match.end()
+
+        out = []
+        buffer, i = self.buffer, self.pos
+        while i < len(buffer):
+            c = buffer[i]
+            if c == '"':
+                self.done = True
+                i += 1
+                break
+            if c != '\\':
+                out.append(c)
+                i += 1
+                continue
+            # Escapes may be split across chunks; wait until they are complete
+            if i + 1 >= len(buffer):
+                break
+            if buffer[i + 1] != 'u':
+                out.append(self.ESCAPES.get(buffer[i + 1], buffer[i + 1]))
+                i += 2
+                continue
+            if i + 6 > len(buffer):
+                break
+            try:
+                codepoint = int(buffer[i + 2:i + 6], 16)
+            except ValueError:
+                # Malformed escape; pass it through rather than stall the stream
+                out.append(buffer[i])
+                i += 1
+                continue
+            if 0xD800 <= codepoint < 0xDC00:
+                # High surrogate: combine with the following \uXXXX low surrogate
+                if i + 12 > len(buffer):
+                    break
+                low = int(buffer[i + 8:i + 12], 16) if re.fullmatch(r'\\u[0-9a-fA-F]{4}', buffer[i + 6:i + 12]) else 0
+                if 0xDC00 <= low < 0xE000:
+                    out.append(chr(0x10000 + ((codepoint - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
+                    continue
+            out.append(chr(codepoint))
+            i += 6
+        self.pos = i
+        return ''.join(out)
+
+def get_retriever(lexical_agent=None, k: int = 5):
     """
-    Returns a function that takes a query and user params, 
+    The vector store retriever, or a HybridRetriever fusing it with the lexical
+    scorer when `lexical_agent` (a SharedSearchAgent) is given and RETRIEVAL_MODE
+    is "hybrid" (the default). Returns None when there is no vector store.
+    """
+    vectorstore = get_vectorstore()
+    if not vectorstore:
+        return None
+    if lexical_agent is None or os.getenv("RETRIEVAL_MODE", "hybrid").lower() != "hybrid":
+        return vectorstore.as_retriever(search_kwargs={"k": k})
+
+    from .hybrid import HybridRetriever, HYBRID_CANDIDATES
+    candidates = max(k, HYBRID_CANDIDATES)
+    return HybridRetriever(
+        vector_retriever=vectorstore.as_retriever(search_kwargs={"k": candidates}),
+        lexical_agent=lexical_agent,
+        k=k,
+        candidates=candidates,
+    )
+
+def get_qa_chain(llm=None, retriever=None, lexical_agent=None, answer_cache=None, embeddings=None):
+    """
+    Returns a function that takes a query and user params,
     and returns a structured NarrativeResponse.
+
+    The LLM client and retriever are created once here, and one RetrievalQA chain is
+    compiled per persona (age band, education, tone) on first use, so a request only
+    pays for retrieval and generation. Retrieved chunks pass through the context
+    assembly stage (context.py), which deduplicates them and fits them to the persona's
+    token budget; the resulting prompt size is reported in the response metadata. The coroutine `process_query.aprocess` runs the
+    same pipeline without blocking the event loop, and `process_query.astream` also
+    yields the narrative as the LLM produces it. `process_query.prefetch` embeds a
+    batch of queries in one call ahead of processing them.
+
+    With an `answer_cache` (a SemanticCache) the query is embedded first and a
+    close enough earlier question from the same persona is answered from the cache
+    without running the chain.
     """
     # Lazy imports
     from langchain.prompts import PromptTemplate
     from langchain.chains import RetrievalQA
-    from langchain_openai import ChatOpenAI
-    
-    vectorstore = get_vectorstore()
-    if not vectorstore:
-        return None
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+    from langchain_core.callbacks import BaseCallbackHandler
+    from .context import ContextAssemblyRetriever, context_budget, count_tokens
+
+    class LLMTimer(BaseCallbackHandler):
+        """Records the "llm" stage; runs inline so the timestamps are exact."""
+        run_inline = True
+
+        def __init__(self):
+            self.starts: Dict[Any, float] = {}
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self.starts[run_id] = time.perf_counter()
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self.starts[run_id] = time.perf_counter()
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            start = self.starts.pop(run_id, None)
+            if start is not None:
+                record("llm", time.perf_counter() - start)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self.starts.pop(run_id, None)
+            count_error("llm")
+
+    llm_timer = LLMTimer()
+
+    def run_config() -> Optional[dict]:
+        # No callback at all when neither metrics nor a debug trace want the timing
+        return {"callbacks": [llm_timer]} if active() else None
+
+    store_retriever = retriever is None
+    if store_retriever:
+        retriever = get_retriever(lexical_agent)
+        if retriever is None:
+            return None
+    if llm is None:
+        try:
+            llm = get_llm()
+        except Exception as e:
+            # e.g. no OPENAI_API_KEY while local embeddings opened the store
+            print(f"LLM unavailable, staying in local search mode: {e}")
+            return None
+    if answer_cache is not None and embeddings is None:
+        from .embeddings import get_embeddings
+        embeddings = get_embeddings()
+
+    chains: Dict[Tuple[str, str, str], Any] = {}
+    chains_lock = threading.Lock()
+
+    def chain_for(age: int, education: str, tone: str):
+        """The persona's (chain, prompt, context budget), built on first use."""
+        persona = persona_key(age, education, tone)
+        entry = chains.get(persona)
+        if entry is None:
+            with chains_lock:
+                entry = chains.get(persona)
+                if entry is None:
+                    # The system instruction is fixed per persona, so bake it in as a partial
+                    prompt = PromptTemplate(
+                        template=PROMPT_TEMPLATE,
+                        input_variables=["context", "question"],
+                        partial_variables={"system_instruction": adjust_prompt("", age, education, tone)}
+                    )
+                    budget = context_budget(age, education, tone)
+                    chain = RetrievalQA.from_chain_type(
+                        llm=llm,
+                        chain_type="stuff",
+                        retriever=ContextAssemblyRetriever(retriever=retriever, budget=budget),
+                        return_source_documents=True,
+                        chain_type_kwargs={"prompt": prompt}
+                    )
+                    entry = chains[persona] = (chain, prompt, budget)
+        return entry
+
+    def finish(raw_output: str, source_docs: List[Any], query: str, prompt, budget: int) -> NarrativeResponse:
+        """Parses the answer and records the size of the prompt that produced it."""
+        with span("parse"):
+            response = parse_output(raw_output, source_docs)
+        # The "stuff" chain joins the documents with blank lines
+        context = "\n\n".join(doc.page_content for doc in source_docs)
+        response.metadata.update({
+            "prompt_tokens": count_tokens(prompt.format(context=context, question=query)),
+            "context_tokens": count_tokens(context),
+            "context_budget": budget,
+            "context_chunks": len(source_docs),
+        })
+        return response
+
+    def cache_hit(hit) -> NarrativeResponse:
+        response, similarity = hit
+        response.metadata.update({"cache": "semantic", "similarity": round(similarity, 4)})
+        return response
+
+    def remember(persona, query: str, vector, response: NarrativeResponse, generation: int):
+        # Answers that failed to parse are not worth repeating; answers computed before
+        # an ingest job cleared the cache are dropped by add()
+        if "error" not in response.metadata:
+            answer_cache.add(persona, query, vector, response, generation)
 
     def process_query(query: str, age: int, education: str, tone: str) -> NarrativeResponse:
-        # 1. Generate Personalized Instruction
-        system_instruction = adjust_prompt(query, age, education, tone)
-        
-        # 2. Construct Prompt
-        # We ask for JSON output explicitly in the prompt to ensure parsing check.
-        # Although PydanticOutputParser is good, for complex narrative + timeline, 
-        # a two-step or well-prompted single step is often more robust.
-        
-        template = """
-        {system_instruction}
-        
-        Context from Owu Archives:
-        {context}
-        
-        User Query: {question}
-        
-        OUTPUT FORMAT INSTRUCTIONS:
-        You must output a valid JSON object matching this structure:
-        {{
-            "narrative": "The historical narrative text...",
-            "timeline": [
-                {{"year": "1821", "event": "Owu War begins"}},
-                ...
-            ],
-            "sources": [
-                {{"title": "Oral Tradition", "type": "Oral", "confidence_score": 0.9}},
-                ...
-            ]
-        }}
-        
-        Ensure the 'narrative' field contains the full response.
-        The 'sources' field should list the documents you used from the context.
-        If you don't know the answer, set 'narrative' to "I could not find information on that in the archives."
+        if answer_cache is not None:
+            persona = persona_key(age, education, tone)
+            generation = answer_cache.generation
+            with span("embed"):
+                vector = embeddings.embed_query(query)
+            hit = answer_cache.lookup(persona, vector)
+            if hit:
+                return cache_hit(hit)
+        chain, prompt, budget = chain_for(age, education, tone)
+        result = chain.invoke({"query": query}, config=run_config())
+        response = finish(result["result"], result["source_documents"], query, prompt, budget)
+        if answer_cache is not None:
+            remember(persona, query, vector, response, generation)
+        return response
+
+    async def aprocess_query(query: str, age: int, education: str, tone: str) -> NarrativeResponse:
+        """Same as process_query, but retrieval and the LLM call go through the async APIs."""
+        if answer_cache is not None:
+            persona = persona_key(age, education, tone)
+            generation = answer_cache.generation
+            with span("embed"):
+                vector = await embeddings.aembed_query(query)
+            hit = answer_cache.lookup(persona, vector)
+            if hit:
+                return cache_hit(hit)
+        chain, prompt, budget = chain_for(age, education, tone)
+        result = await chain.ainvoke({"query": query}, config=run_config())
+        response = finish(result["result"], result["source_documents"], query, prompt, budget)
+        if answer_cache is not None:
+            remember(persona, query, vector, response, generation)
+        return response
+
+    async def astream_query(query: str, age: int, education: str, tone: str) -> AsyncIterator[Tuple[str, Any]]:
         """
-        
-        prompt = PromptTemplate(
-            template=template,
-            input_variables=["context", "question"],
-            partial_variables={"system_instruction": system_instruction}
-        )
-        
-        chain = RetrievalQA.from_chain_type(
-            llm=llm,
-            chain_type="stuff",
-            retriever=retriever,
-            return_source_documents=True,
-            chain_type_kwargs={"prompt": prompt}
-        )
-        
-        # 3. Execute Chain
-        result = chain({"query": query})
-        raw_output = result["result"]
-        source_docs = result["source_documents"]
-        
-        # 4. Parse Output
-        try:
-            # Clean up potential markdown code blocks
-            json_str = raw_output.strip()
-            if json_str.startswith("```json"):
-                json_str = json_str[7:]
-            if json_str.endswith("```"):
-                json_str = json_str[:-3]
-            
-            data = json.loads(json_str)
-            
-            # Enrich sources from actual retrieved docs if the LLM didn't do a perfect job
-            # or to ensure accuracy.
-            # For this implementation, we'll merge them.
-            if not data.get("sources"):
-                data["sources"] = []
-                for doc in source_docs:
-                    data["sources"].append({
-                        "title": doc.metadata.get("source", "Unknown"),
-                        "type": doc.metadata.get("type", "General"),
-                        "confidence_score": 0.85 # Placeholder confidence
-                    })
-            
-            return NarrativeResponse(**data)
-            
-        except (json.JSONDecodeError, ValidationError) as e:
-            print(f"Parsing Error: {e}")
-            # Fallback for parsing failures
-            return NarrativeResponse(
-                narrative=raw_output, # Return raw text if JSON fails
-                timeline=[],
-                sources=[Source(title="System", type="Error", confidence_score=0.0)],
-                metadata={"error": "Output parsing failed"}
-            )
+        Streams ("narrative", text delta) pairs while the LLM is generating, then a final
+        ("response", NarrativeResponse) once the full JSON answer has been parsed.
+        A semantic cache hit yields only the final response.
+        """
+        if answer_cache is not None:
+            persona = persona_key(age, education, tone)
+            generation = answer_cache.generation
+            with span("embed"):
+                vector = await embeddings.aembed_query(query)
+            hit = answer_cache.lookup(persona, vector)
+            if hit:
+                yield "response", cache_hit(hit)
+                return
+        chain, prompt, budget = chain_for(age, education, tone)
+        extractor = NarrativeExtractor()
+        raw_parts: List[str] = []
+        source_docs: List[Any] = []
+        final_output = None
+        async for event in chain.astream_events({"query": query}, config=run_config(), version="v2"):
+            kind = event["event"]
+            if kind in ("on_chat_model_stream", "on_llm_stream"):
+                chunk = event["data"]["chunk"]
+                text = chunk.content if hasattr(chunk, "content") else getattr(chunk, "text", str(chunk))
+                raw_parts.append(text)
+                delta = extractor.feed(text)
+                if delta:
+                    yield "narrative", delta
+            elif kind == "on_retriever_end":
+                source_docs = event["data"].get("output") or []
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                final_output = event["data"].get("output")
+
+        # LLMs that do not stream still produce a final chain output
+        raw_output = "".join(raw_parts) or (final_output or {}).get("result", "")
+        if final_output and final_output.get("source_documents"):
+            source_docs = final_output["source_documents"]
+        response = finish(raw_output, source_docs, query, prompt, budget)
+        if answer_cache is not None:
+            remember(persona, query, vector, response, generation)
+        yield "response", response
+
+    def prefetch(queries: List[str]):
+        """
+        Embeds a batch of queries in one backend call, so the per-query semantic cache
+        and retriever lookups that follow are served from the embedding cache.
+        """
+        target = embeddings
+        if target is None and store_retriever:
+            from .embeddings import get_embeddings
+            target = get_embeddings()
+        if hasattr(target, "embed_queries"):
+            target.embed_queries(queries)
 
+    process_query.aprocess = aprocess_query
+    process_query.prefetch = prefetch
+    process_query.astream = astream_query
     return process_query
@@ -0,0 +1,87 @@
+import re
+from collections import Counter
+from typing import Dict, List, Sequence
+import numpy as np
+from .fuzzy import FuzzyIndex
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text)
+
+class BM25Index:
+    """
+    Sparse term-document matrix over the normalized paragraphs, stored term by term
+    (one contiguous slice of doc ids per term, CSC style). The BM25 weight of every
+    posting is computed once at load time, so scoring a query is one vectorized
+    addition per query term over the whole corpus.
+    """
+
+    def __init__(self, texts: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        counts = [Counter(tokenize(text)) for text in texts]
+        self.doc_count = len(counts)
+        self.doc_lengths = np.array([sum(c.values()) for c in counts], dtype=np.float32)
+        avg_length = float(self.doc_lengths.mean()) if self.doc_count else 1.0
+
+        postings: Dict[str, List[int]] = {}
+        frequencies: Dict[str, List[int]] = {}
+        for doc_id, doc_counts in enumerate(counts):
+            for term, tf in doc_counts.items():
+                postings.setdefault(term, []).append(doc_id)
+                frequencies.setdefault(term, []).append(tf)
+
+        self.vocabulary: Dict[str, int] = {term: i for i, term in enumerate(postings)}
+        df = np.array([len(postings[term]) for term in postings], dtype=np.int64)
+        self.offsets = np.zeros(len(df) + 1, dtype=np.int64)
+        np.cumsum(df, out=self.offsets[1:])
+        self.doc_ids = np.fromiter((d for term in postings for d in postings[term]),
+                                   dtype=np.int32, count=int(self.offsets[-1]))
+        tf = np.fromiter((f for term in postings for f in frequencies[term]),
+                         dtype=np.float32, count=int(self.offsets[-1]))
+
+        self.idf = np.log1p((self.doc_count - df + 0.5) / (df + 0.5)).astype(np.float32)
+        length_norm = k1 * (1 - b + b * self.doc_lengths[self.doc_ids] / avg_length)
+        self.weights = (np.repeat(self.idf, df) * tf * (k1 + 1) / (tf + length_norm)).astype(np.float32)
+        self.fuzzy = FuzzyIndex(self.vocabulary)
+
+    def query_terms(self, keywords: Sequence[str], fuzzy_weight: float = 0.5) -> Dict[str, float]:
+        """
+        Maps normalized query keywords to vocabulary terms and their query weight.
+        Words missing from the vocabulary fall back to their close spellings at a
+        reduced weight, mirroring the exact (+2) / fuzzy (+1) split of keyword mode.
+        """
+        weights: Dict[str, float] = {}
+        for keyword in keywords:
+            for token in tokenize(keyword):
+                if token in self.vocabulary:
+                    weights[token] = weights.get(token, 0.0) + 1.0
+                else:
+                    for term in self.fuzzy.close_terms(token):
+                        weights[term] = weights.get(term, 0.0) + fuzzy_weight
+        return weights
+
+    def score(self, term_weights: Dict[str, float]) -> np.ndarray:
+        """BM25 score of every paragraph for the weighted query terms."""
+        scores = np.zeros(self.doc_count, dtype=np.float32)
+        for term, weight in term_weights.items():
+            term_id = self.vocabulary[term]
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # Doc ids are unique within a posting slice, so fancy-index += is safe
+            scores[self.doc_ids[start:end]] += weight * self.weights[start:end]
+        return scores
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest positive scores, best first, ties in index order.
+    Uses argpartition so the cost stays linear in the corpus size.
+    """
+    positive = np.flatnonzero(scores > 0)
+    if len(positive) > k:
+        kth = np.argpartition(-scores[positive], k - 1)[k - 1]
+        threshold = scores[positive[kth]]
+        # Keep every tie at the threshold so the cut matches a stable full sort
+        positive = positive[scores[positive] >= threshold]
+    order = np.lexsort((positive, -scores[positive]))
+    return positive[order][:k]
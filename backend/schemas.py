@@ -5,6 +5,17 @@ class TimelineEvent(BaseModel):
     year: str = Field(..., description="The year or era of the event")
     event: str = Field(..., description="Description of the historical event")
 
+class TimelineRangeEvent(TimelineEvent):
+    start_year: int = Field(..., description="First year the mention covers")
+    end_year: int = Field(..., description="Last year the mention covers (later than start_year for eras)")
+    source: str = Field(..., description="File the paragraph comes from")
+
+class TimelineRangeResponse(BaseModel):
+    start: int
+    end: int
+    total: int = Field(..., description="Mentions in the range, of which the first `limit` are returned")
+    events: List[TimelineRangeEvent] = Field(default_factory=list)
+
 class Source(BaseModel):
     title: str = Field(..., description="Title of the document or source")
     type: str = Field(..., description="Type of source (e.g., 'Oral Tradition', 'Academic Paper')")
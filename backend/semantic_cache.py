@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+import numpy as np
+from .schemas import NarrativeResponse
+
+class SemanticCache:
+    """
+    Answer cache keyed on query meaning rather than spelling. Entries are grouped by
+    persona (see personalization.persona_key) and a lookup returns the response of the
+    most similar cached query for that persona, if its cosine similarity reaches
+    `threshold`. Bounded to `maxsize` entries overall with LRU eviction; thread-safe.
+    Like TTLCache, add() drops answers computed before the last clear() when given
+    the `generation` read before computing them.
+    """
+
+    def __init__(self, maxsize: int = 512, threshold: float = 0.92):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._next_id = 0
+        # entry id -> (persona, query, response), in LRU order
+        self._entries: "OrderedDict[int, Tuple[Hashable, str, NarrativeResponse]]" = OrderedDict()
+        # persona -> entry id -> normalized query vector
+        self._vectors: Dict[Hashable, Dict[int, np.ndarray]] = {}
+        # persona -> (entry ids, stacked vectors), rebuilt lazily after changes
+        self._matrices: Dict[Hashable, Tuple[List[int], np.ndarray]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, persona: Hashable, vector) -> Optional[Tuple[NarrativeResponse, float]]:
+        """Returns (response copy, similarity) for the nearest cached query above the threshold."""
+        query = self._normalize(vector)
+        with self._lock:
+            vectors = self._vectors.get(persona)
+            if vectors:
+                if persona not in self._matrices:
+                    ids = list(vectors)
+                    self._matrices[persona] = (ids, np.stack([vectors[i] for i in ids]))
+                ids, matrix = self._matrices[persona]
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry_id = ids[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return self._entries[entry_id][2].model_copy(deep=True), float(scores[best])
+            self.misses += 1
+            return None
+
+    @property
+    def generation(self) -> int:
+        """Changes with every clear(); see add()."""
+        return self.invalidations
+
+    def add(self, persona: Hashable, query: str, vector, response: NarrativeResponse,
+            generation: Optional[int] = None):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.invalidations:
+                return
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (persona, query, response.model_copy(deep=True))
+            self._vectors.setdefault(persona, {})[entry_id] = self._normalize(vector)
+            self._matrices.pop(persona, None)
+            while len(self._entries) > self.maxsize:
+                old_id, (old_persona, _, _) = self._entries.popitem(last=False)
+                del self._vectors[old_persona][old_id]
+                self._matrices.pop(old_persona, None)
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every entry, e.g. after /ingest changed what the answers are based on."""
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+            self._matrices.clear()
+            self.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            # Every hit is a RetrievalQA LLM call that did not happen
+            "saved_llm_calls": self.hits,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
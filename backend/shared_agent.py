@@ -0,0 +1,142 @@
+import os
+import time
+import asyncio
+import threading
+from typing import Callable, List, Optional, Tuple
+from .simple_agent import SimpleSearchAgent
+from .metrics import record
+
+class SharedSearchAgent:
+    """
+    Process-wide holder for a SimpleSearchAgent.
+    The corpus is loaded once and only reloaded when the .txt files under the
+    data directory change (path, mtime or size). Reloads run in a worker thread
+    and the new agent is swapped in with a single assignment, so requests already
+    holding the old agent finish against it undisturbed.
+
+    With a `snapshot_dir` the index is persisted there as an IndexSnapshot keyed by
+    that fingerprint and memory-mapped, so later starts and other worker processes
+    skip the raw load and share one read-only copy of the index.
+    """
+
+    def __init__(self, data_dir: str, check_interval: float = 5.0, ranking: Optional[str] = None,
+                 snapshot_dir: Optional[str] = None):
+        self.data_dir = data_dir
+        self.ranking = ranking or os.getenv("LOCAL_SEARCH_RANKING", "keyword")
+        self.compact = os.getenv("LOCAL_SEARCH_COMPACT", "").lower() in ("1", "true", "yes")
+        # Archives larger than this keep paragraph text on disk (MB; unset keeps everything in memory)
+        max_memory_mb = os.getenv("LOCAL_SEARCH_MAX_MEMORY_MB")
+        self.max_memory = int(float(max_memory_mb) * 1024 * 1024) if max_memory_mb else None
+        self.check_interval = check_interval
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_path: Optional[str] = None
+        self._agent: Optional[SimpleSearchAgent] = None
+        self._fingerprint: Optional[Tuple] = None
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self.load_time_ms = 0.0
+        self.loaded_at: Optional[float] = None
+        self.reloads = 0
+        self._reload_listeners: List[Callable[[], None]] = []
+
+    def add_reload_listener(self, listener: Callable[[], None]):
+        """Registers a callback run whenever a reload replaces the agent, e.g. to drop cached responses."""
+        self._reload_listeners.append(listener)
+
+    def fingerprint(self) -> Tuple:
+        """Snapshot of (relative path, mtime, size) for every file load_data would read."""
+        entries = []
+        if not os.path.exists(self.data_dir):
+            return tuple(entries)
+        for root, _, files in os.walk(self.data_dir):
+            for file in files:
+                if file.endswith(".txt"):
+                    path = os.path.join(root, file)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((os.path.relpath(path, self.data_dir), stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(entries))
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reloads the agent if the data directory changed. Returns True when a new agent was swapped in."""
+        with self._lock:
+            self._last_check = time.monotonic()
+            fingerprint = self.fingerprint()
+            if not force and self._agent is not None and fingerprint == self._fingerprint:
+                return False
+
+            start = time.perf_counter()
+            agent = self._load(fingerprint)
+            self.load_time_ms = (time.perf_counter() - start) * 1000
+            record("load", self.load_time_ms / 1000)
+            self.loaded_at = time.time()
+            replaced = self._agent is not None
+            self._fingerprint = fingerprint
+            self._agent = agent  # Atomic swap
+            self.reloads += 1
+            print(f"Local search agent loaded {len(agent.documents)} paragraphs in {self.load_time_ms:.1f} ms")
+        # The first load changes no data, so there is nothing to invalidate yet
+        if replaced:
+            for listener in self._reload_listeners:
+                listener()
+        return True
+
+    def _load(self, fingerprint: Tuple) -> SimpleSearchAgent:
+        if self.snapshot_dir is None:
+            return self._load_raw()
+        from .snapshot import open_snapshot
+        try:
+            snapshot = open_snapshot(self.snapshot_dir, self.data_dir, fingerprint,
+                                     lambda: SimpleSearchAgent(self.data_dir, compact=True, max_memory=self.max_memory))
+        except OSError as e:
+            print(f"Index snapshot unavailable, loading raw files: {e}")
+            self.snapshot_path = None
+            return self._load_raw()
+        self.snapshot_path = snapshot.path
+        return SimpleSearchAgent(self.data_dir, ranking=self.ranking, snapshot=snapshot)
+
+    def _load_raw(self) -> SimpleSearchAgent:
+        return SimpleSearchAgent(self.data_dir, ranking=self.ranking, compact=self.compact, max_memory=self.max_memory)
+
+    async def get(self) -> SimpleSearchAgent:
+        """
+        Returns the current agent. The first call waits for the initial load;
+        afterwards staleness is checked at most every `check_interval` seconds
+        in the background while the current agent keeps serving.
+        """
+        if self._agent is None:
+            await asyncio.to_thread(self.refresh)
+        else:
+            self.poll()
+        return self._agent
+
+    def current(self) -> SimpleSearchAgent:
+        """Synchronous access for worker threads (e.g. hybrid retrieval); loads on first use."""
+        if self._agent is None:
+            self.refresh()
+        return self._agent
+
+    def poll(self):
+        """Schedules a background staleness check if one is due. Must be called from the event loop."""
+        if time.monotonic() - self._last_check >= self.check_interval and not self._lock.locked():
+            self._last_check = time.monotonic()
+            asyncio.get_running_loop().run_in_executor(None, self._background_refresh)
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Local agent reload failed, keeping previous index: {e}")
+
+    def stats(self) -> dict:
+        """Load statistics suitable for response metadata or a status endpoint."""
+        return {
+            "documents": len(self._agent.documents) if self._agent else 0,
+            "ranking": self.ranking,
+            "load_time_ms": round(self.load_time_ms, 2),
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "snapshot": self.snapshot_path,
+        }
@@ -1,117 +1,329 @@
 import os
-import re
 import unicodedata
-import difflib
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Set, Tuple, Sequence
 from typing import Optional
 from .schemas import NarrativeResponse, TimelineEvent, Source
+from .fuzzy import FuzzyIndex
+from .text_buffer import TextBuffer
+from .paragraphs import ParagraphStore, iter_paragraphs
+from .timeline import TimelineIndex, extract_mentions, snippet
+from .metrics import span
+
+# Additive score boosts shared by every ranking mode
+ORIKI_BOOST = 5
+PHRASE_BOOST = 3
+
+RANKING_MODES = ("keyword", "bm25")
+
+class _StripMarksTable(dict):
+    """
+    str.translate table mapping each character to its NFD decomposition without
+    combining marks (category Mn). Entries are filled on first sight, so after
+    warm-up normalization runs entirely inside str.translate.
+    """
+    def __missing__(self, codepoint: int) -> str:
+        value = ''.join(c for c in unicodedata.normalize('NFD', chr(codepoint))
+                        if unicodedata.category(c) != 'Mn')
+        self[codepoint] = value
+        return value
+
+_STRIP_MARKS = _StripMarksTable()
+
+def normalize(text: str) -> str:
+    """Removes accents and diacritics for easier searching."""
+    if text.isascii():
+        return text.lower()
+    return text.translate(_STRIP_MARKS).lower()
+
+@lru_cache(maxsize=4096)
+def normalize_query(text: str) -> str:
+    """normalize() with a bounded cache for the short, repetitive query strings."""
+    return normalize(text)
 
 class SimpleSearchAgent:
-    def __init__(self, data_dir: str):
+    def __init__(self, data_dir: str, ranking: str = "keyword", compact: bool = False, snapshot=None,
+                 max_memory: Optional[int] = None):
+        if ranking not in RANKING_MODES:
+            raise ValueError(f"Unknown ranking mode '{ranking}'. Expected one of {RANKING_MODES}.")
         self.data_dir = data_dir
-        self.documents = []
-        self.load_data()
+        self.ranking = ranking
+        self.compact = compact
+        self.max_memory = max_memory
+        self.bm25 = None
+        self.documents: Sequence[dict] = ParagraphStore()
+        # Normalized paragraph text, parallel to self.documents
+        self.normalized: Sequence[str] = []
+        self.index: Dict[str, List[int]] = {}
+        self.oriki_doc_ids: List[int] = []
+        self.available_topics: Set[str] = set()
+        self.fuzzy = FuzzyIndex([])
+        # Year and era mentions per paragraph, extracted while loading
+        self.timeline = TimelineIndex()
+        if snapshot is not None:
+            self.attach_snapshot(snapshot)
+        else:
+            self.load_data()
 
     def load_data(self):
-        """Reads all .txt files in the data directory."""
-        self.documents = []
+        """
+        Streams all .txt files in the data directory into a ParagraphStore, one
+        paragraph at a time. Paragraphs are normalized once here; with `compact` the
+        normalized copies live in a single UTF-8 TextBuffer instead of one str per
+        paragraph. When the files add up to more than `max_memory` bytes the full
+        text stays on disk and is read back only for the paragraphs a response shows.
+        """
+        paths = []
+        if os.path.exists(self.data_dir):
+            for root, _, files in os.walk(self.data_dir):
+                paths.extend(os.path.join(root, file) for file in files if file.endswith(".txt"))
+        on_disk = self.max_memory is not None and sum(os.path.getsize(path) for path in paths) > self.max_memory
+        self.documents = ParagraphStore(in_memory=not on_disk)
+        self.normalized = TextBuffer() if self.compact or on_disk else []
+        self.timeline = TimelineIndex()
         if not os.path.exists(self.data_dir):
             print(f"Data directory {self.data_dir} not found.")
             return
 
-        for root, _, files in os.walk(self.data_dir):
-            for file in files:
-                if file.endswith(".txt"):
-                    path = os.path.join(root, file)
-                    try:
-                        with open(path, "r", encoding="utf-8") as f:
-                            text = f.read()
-                            # Split by double newlines to get paragraphs roughly
-                            paragraphs = text.split("\n\n")
-                            for p in paragraphs:
-                                if p.strip():
-                                    self.documents.append({
-                                        "source": file,
-                                        "content": p.strip()
-                                    })
-                    except Exception as e:
-                        print(f"Error reading {file}: {e}")
+        for path in paths:
+            file = os.path.basename(path)
+            try:
+                source_id = self.documents.intern(file, path)
+                for content, offset, length in iter_paragraphs(path):
+                    self.normalized.append(normalize(content))
+                    self.timeline.add(content)
+                    # Likely Oriki if the file or the paragraph heading says so
+                    is_oriki = "oriki" in file.lower() or "oriki" in content.lower()[:50]
+                    self.documents.add(source_id, content, is_oriki, offset, length)
+            except Exception as e:
+                print(f"Error reading {file}: {e}")
+        self.build_index()
         print(f"Loaded {len(self.documents)} paragraphs from local files.")
 
+    def build_index(self):
+        """Builds the normalized token -> paragraph id posting lists used at query time."""
+        self.index = {}
+        self.oriki_doc_ids = []
+        flags = self.documents.flags
+        for doc_id, normalized in enumerate(self.normalized):
+            for token in set(normalized.split()):
+                # doc ids are appended in load order, so every posting list stays sorted
+                self.index.setdefault(token, []).append(doc_id)
+            if flags[doc_id]:
+                self.oriki_doc_ids.append(doc_id)
+        self.available_topics = self.topics_for(self.documents.sources)
+        # Paragraphs appended after load_data still need their mentions extracted
+        for doc_id in range(self.timeline.documents, len(self.documents)):
+            self.timeline.add(self.documents.content(doc_id))
+        self.timeline.finish()
+        self.fuzzy = FuzzyIndex(self.index)
+        self.build_ranking()
+
+    def attach_snapshot(self, snapshot):
+        """
+        Serves from a memory-mapped IndexSnapshot instead of loading the raw files:
+        the documents, normalized text, posting lists and fuzzy buckets all stay in
+        the shared mapping.
+        """
+        self.documents = snapshot.documents
+        self.normalized = snapshot.normalized
+        self.index = snapshot.index
+        self.oriki_doc_ids = snapshot.oriki_doc_ids
+        self.available_topics = self.topics_for(snapshot.sources)
+        self.fuzzy = snapshot.fuzzy
+        self.timeline = snapshot.timeline
+        self.build_ranking()
+
+    @staticmethod
+    def topics_for(sources) -> Set[str]:
+        # Use filename as topic hint, removing extension
+        return {source.replace(".txt", "").replace("_", " ").title() for source in sources}
+
+    def build_ranking(self):
+        """BM25 statistics for the loaded paragraphs, when that ranking mode is selected."""
+        self.bm25 = None
+        if self.ranking == "bm25":
+            try:
+                from .ranking import BM25Index
+                self.bm25 = BM25Index(self.normalized)
+            except ImportError:
+                print("NumPy is not installed; falling back to keyword ranking.")
+
     def normalize_text(self, text: str) -> str:
         """Removes accents and diacritics for easier searching."""
-        return ''.join(c for c in unicodedata.normalize('NFD', text)
-                      if unicodedata.category(c) != 'Mn').lower()
+        return normalize_query(text)
 
-    def generate(self, query: str, age: int, education: str, tone: str) -> NarrativeResponse:
+    def _docs_containing(self, fragment: str) -> Set[int]:
         """
-        Generates a response based on keyword matching.
+        Returns the ids of paragraphs whose normalized content contains `fragment`.
+        A fragment without whitespace can only occur inside a single token, so it is
+        answered from the vocabulary; longer phrases are verified on the intersection
+        of their pieces' candidates.
         """
-        if not self.documents:
-             self.load_data() # Try loading again just in case
-             if not self.documents:
-                return NarrativeResponse(
-                    narrative="I currently have no historical data loaded. Please add text files to the data directory.",
-                    timeline=[],
-                    sources=[],
-                    metadata={"info": "No data found"}
-                )
-
-        normalized_query = self.normalize_text(query)
-        keywords = [self.normalize_text(k) for k in query.split() if len(k) >= 3] # simple stopword filtering
-        if not keywords:
-            keywords = [normalized_query]
+        if not fragment:
+            return set(range(len(self.documents)))
+
+        pieces = fragment.split()
+        if len(pieces) == 1 and pieces[0] == fragment:
+            doc_ids = set()
+            if not isinstance(self.index, dict):
+                # A mapped vocabulary is searched in one pass over its term buffer
+                for postings in self.index.postings_containing(fragment):
+                    doc_ids.update(postings)
+                return doc_ids
+            for term, postings in self.index.items():
+                if fragment in term:
+                    doc_ids.update(postings)
+            return doc_ids
+
+        if pieces:
+            candidates = self._docs_containing(pieces[0])
+            for piece in pieces[1:]:
+                if not candidates:
+                    break
+                candidates &= self._docs_containing(piece)
+        else:
+            candidates = range(len(self.documents))
+        return {d for d in candidates if fragment in self.normalized[d]}
+
+    def _close_terms(self, keyword: str) -> List[str]:
+        """Vocabulary terms similar enough to `keyword` to count as a fuzzy match."""
+        return self.fuzzy.close_terms(keyword)
+
+    def rank(self, query: str, top_k: int = 3, lookups: Optional[Tuple[dict, dict]] = None) -> List[Tuple[float, dict]]:
+        """
+        Returns the best (score, paragraph) pairs for a query, highest score first.
+        `lookups` is a pair of (exact, fuzzy) match caches that rank_many shares across a batch.
+        """
+        with span("normalize"):
+            normalized_query = self.normalize_text(query)
+            keywords = [self.normalize_text(k) for k in query.split() if len(k) >= 3] # simple stopword filtering
+            if not keywords:
+                keywords = [normalized_query]
 
         # Custom logic to handle "Oriki" or "Praise" queries
         is_oriki_query = "oriki" in normalized_query or "praise" in normalized_query
 
-        # Score paragraphs
-        scored_docs = []
-        for doc in self.documents:
-            score = 0
-            content_lower = doc["content"].lower()
-            content_normalized = self.normalize_text(doc["content"])
-            
-            # Boost if document is likely Oriki and query asks for it
-            is_oriki_doc = "oriki" in doc["source"].lower() or "oriki" in content_lower[:50]
-            
-            if is_oriki_query and is_oriki_doc:
-                score += 5 # Significant boost for intended content type
-            
-            # Tokenize content for fuzzy matching
-            content_tokens = content_normalized.split()
-
-            for k in keywords:
-                # Exact match
-                if k in content_normalized:
-                    score += 2
-                else:
-                    # Fuzzy match check
-                    # Check if 'k' is similar to any word in the content
-                    matches = difflib.get_close_matches(k, content_tokens, n=1, cutoff=0.8)
-                    if matches:
-                        score += 1  # Moderate boost for fuzzy match
-            
-            # Extra boost for exact phrase match
-            if normalized_query in content_normalized:
-                score += 3
-                
-            if score > 0:
-                scored_docs.append((score, doc))
-
-        # Sort by score
-        scored_docs.sort(key=lambda x: x[0], reverse=True)
-        
+        exact_cache, fuzzy_cache = lookups if lookups is not None else ({}, {})
+        with span("score"):
+            if self.bm25 is not None:
+                return self._rank_bm25(normalized_query, keywords, is_oriki_query, top_k, exact_cache)
+            return self._rank_keywords(normalized_query, keywords, is_oriki_query, top_k, exact_cache, fuzzy_cache)
+
+    def rank_many(self, queries: List[str], top_k: int = 3) -> List[List[Tuple[float, dict]]]:
+        """Ranks a batch of queries in one pass; keywords they share are looked up once."""
+        lookups: Tuple[dict, dict] = ({}, {})
+        return [self.rank(query, top_k, lookups) for query in queries]
+
+    def _rank_keywords(self, normalized_query: str, keywords: List[str], is_oriki_query: bool,
+                       top_k: int, exact_cache: Dict[str, Set[int]],
+                       fuzzy_cache: Dict[str, Set[int]]) -> List[Tuple[float, dict]]:
+        # Score only the paragraphs reachable from the index
+        scores: Dict[int, int] = {}
+
+        # Boost if document is likely Oriki and query asks for it
+        if is_oriki_query:
+            for doc_id in self.oriki_doc_ids:
+                scores[doc_id] = scores.get(doc_id, 0) + ORIKI_BOOST # Significant boost for intended content type
+
+        for k in keywords:
+            if k not in exact_cache:
+                exact_cache[k] = self._docs_containing(k)
+            # Checked on its own: a phrase lookup may already have filled exact_cache[k]
+            if k not in fuzzy_cache:
+                # Fuzzy match check: paragraphs without the exact keyword but with a similar word
+                fuzzy_docs = set()
+                for term in self._close_terms(k):
+                    fuzzy_docs.update(self.index[term])
+                fuzzy_cache[k] = fuzzy_docs - exact_cache[k]
+
+            for doc_id in exact_cache[k]:
+                scores[doc_id] = scores.get(doc_id, 0) + 2
+            for doc_id in fuzzy_cache[k]:
+                scores[doc_id] = scores.get(doc_id, 0) + 1  # Moderate boost for fuzzy match
+
+        # Extra boost for exact phrase match
+        if normalized_query not in exact_cache:
+            exact_cache[normalized_query] = self._docs_containing(normalized_query)
+        for doc_id in exact_cache[normalized_query]:
+            scores[doc_id] = scores.get(doc_id, 0) + PHRASE_BOOST
+
+        # Ties keep load order, matching a stable sort over the full corpus. Only the
+        # top_k paragraphs are materialized (their text may have to come from disk).
+        ranked = sorted(((doc_id, score) for doc_id, score in scores.items() if score > 0),
+                        key=lambda item: (-item[1], item[0]))
+        top = ranked[:top_k]
+        docs = self.documents.take([doc_id for doc_id, _ in top])
+        return [(score, doc) for (_, score), doc in zip(top, docs)]
+
+    def _rank_bm25(self, normalized_query: str, keywords: List[str], is_oriki_query: bool,
+                   top_k: int, exact_cache: Dict[str, Set[int]]) -> List[Tuple[float, dict]]:
+        from .ranking import top_k as top_k_indices
+
+        scores = self.bm25.score(self.bm25.query_terms(keywords))
+
+        # The oriki and phrase boosts stay additive on top of BM25
+        if is_oriki_query and self.oriki_doc_ids:
+            scores[self.oriki_doc_ids] += ORIKI_BOOST
+        if normalized_query not in exact_cache:
+            exact_cache[normalized_query] = self._docs_containing(normalized_query)
+        phrase_docs = exact_cache[normalized_query]
+        if phrase_docs:
+            scores[list(phrase_docs)] += PHRASE_BOOST
+
+        doc_ids = top_k_indices(scores, top_k)
+        return [(float(scores[doc_id]), doc) for doc_id, doc in zip(doc_ids, self.documents.take(doc_ids))]
+
+    def generate(self, query: str, age: int, education: str, tone: str) -> NarrativeResponse:
+        """
+        Generates a response based on keyword matching.
+        """
+        # Reloading is SharedSearchAgent.refresh's job: it is serialized and swaps a
+        # whole new agent in, where reloading this one in place would race other requests
+        if not self.documents:
+            return NarrativeResponse(
+                narrative="I currently have no historical data loaded. Please add text files to the data directory.",
+                timeline=[],
+                sources=[],
+                metadata={"info": "No data found"}
+            )
+
         # Take top 3
-        top_docs = scored_docs[:3]
-        
+        top_docs = self.rank(query, top_k=3)
+        with span("build"):
+            return self.build_response(top_docs)
+
+    def generate_many(self, queries: List[str]) -> List[NarrativeResponse]:
+        """generate() for a batch of queries, ranked together with rank_many."""
+        if not self.documents:
+            return [self.generate(query, 0, "", "") for query in queries]
+        ranked = self.rank_many(queries, top_k=3)
+        with span("build"):
+            return [self.build_response(top_docs) for top_docs in ranked]
+
+    def events_between(self, start: int, end: int, limit: int) -> Tuple[int, List[dict]]:
+        """
+        Year and era mentions overlapping start..end, straight from the timeline
+        index: the number found and the first `limit`, ordered by year.
+        """
+        rows = list(self.timeline.between(start, end))
+        docs = self.documents.take([self.timeline.row_docs[row] for row in rows[:limit]])
+        events = []
+        for row, doc in zip(rows, docs):
+            events.append({
+                "year": self.timeline.labels[row],
+                "start_year": self.timeline.starts[row],
+                "end_year": self.timeline.ends[row],
+                "event": snippet(doc["content"], self.timeline.offsets[row]),
+                "source": doc["source"],
+            })
+        return len(rows), events
+
+    def build_response(self, top_docs: List[Tuple[float, dict]]) -> NarrativeResponse:
+        """Assembles the narrative, timeline and sources from ranked paragraphs."""
         if not top_docs:
              # Construct a list of available topics from source filenames or content
-             available_topics = set()
-             for d in self.documents:
-                 # Use filename as topic hint, removing extension
-                 topic = d["source"].replace(".txt", "").replace("_", " ").title()
-                 available_topics.add(topic)
+             available_topics = self.available_topics
              
              topics_str = ", ".join(sorted(list(available_topics)))
              
@@ -126,19 +338,21 @@ class SimpleSearchAgent:
         narrative_parts = [d[1]["content"] for d in top_docs]
         narrative = "\n\n".join(narrative_parts)
         
-        # Construct Timeline (Simple year extraction)
+        # Construct Timeline from the years precomputed for each paragraph. A year's
+        # snippet comes from the first paragraph containing it at all, which may only
+        # have it inside a longer token such as "1830s"
+        mentioned = set()
+        for _, doc in top_docs:
+            mentioned.update(self.timeline.years(doc["id"]) if "id" in doc else
+                             (label for label, start, end, offset in extract_mentions(doc["content"])
+                              if label.isdigit()))
         timeline = []
-        years = re.findall(r'\b(1[0-9]{3}|20[0-2][0-9])\b', narrative)
-        years = sorted(list(set(years)))
-        for year in years:
-             # Find context for year
-             for part in narrative_parts:
-                 if year in part:
-                     # Grab a snippet
-                     snippet_idx = part.find(year)
-                     snippet = part[snippet_idx:snippet_idx+50] + "..."
-                     timeline.append(TimelineEvent(year=year, event=snippet))
-                     break
+        for year in sorted(mentioned):
+            for _, doc in top_docs:
+                offset = self.timeline.first_occurrence(doc["id"], year) if "id" in doc else doc["content"].find(year)
+                if offset >= 0:
+                    timeline.append(TimelineEvent(year=year, event=snippet(doc["content"], offset)))
+                    break
 
         # Sourced
         sources = []
@@ -152,5 +366,5 @@ class SimpleSearchAgent:
             narrative=narrative,
             timeline=timeline,
             sources=sources,
-            metadata={"mode": "Local Search"}
+            metadata={"mode": "Local Search", "ranking": "bm25" if self.bm25 is not None else "keyword"}
         )
@@ -0,0 +1,317 @@
+import os
+import sys
+import json
+import mmap
+import bisect
+import hashlib
+from array import array
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+from .fuzzy import FuzzyIndex, bigrams
+from .timeline import TimelineIndex
+
+MAGIC = b"OWUIDX01"
+SNAPSHOT_VERSION = 3
+# Every section starts on an 8 byte boundary so typed views over it are aligned
+ALIGN = 8
+
+class MappedStrings:
+    """
+    Read-only sequence of strings stored back to back as UTF-8 in a mapped file and
+    addressed by an int64 offsets array, like a TextBuffer that lives on disk.
+    """
+
+    def __init__(self, buffer: mmap.mmap, start: int, offsets: memoryview):
+        self._buffer = buffer
+        self._start = start
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, index: int) -> bytes:
+        return self._buffer[self._start + self._offsets[index]:self._start + self._offsets[index + 1]]
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("MappedStrings index out of range")
+        return str(self.raw(index), "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def containing(self, fragment: str) -> List[int]:
+        """Ids of the strings containing `fragment`, found by searching the whole buffer at once."""
+        needle = fragment.encode("utf-8")
+        end = self._start + self._offsets[len(self)]
+        found: List[int] = []
+        position = self._buffer.find(needle, self._start, end)
+        while position != -1:
+            relative = position - self._start
+            index = bisect.bisect_right(self._offsets, relative) - 1
+            # A match running into the next string is not a match
+            if relative + len(needle) <= self._offsets[index + 1]:
+                found.append(index)
+                position = self._buffer.find(needle, self._start + self._offsets[index + 1], end)
+            else:
+                position = self._buffer.find(needle, position + 1, end)
+        return found
+
+class MappedPostings:
+    """
+    Sorted term -> posting list mapping over mapped arrays: the snapshot form of
+    SimpleSearchAgent.index (and of FuzzyIndex.by_bigram). Lookups binary search
+    the UTF-8 terms, whose byte order is their code point order.
+    """
+
+    def __init__(self, terms: MappedStrings, offsets: memoryview, postings: memoryview):
+        self.terms = terms
+        self._offsets = offsets
+        self._postings = postings
+
+    def _find(self, term: str) -> int:
+        key = term.encode("utf-8")
+        low, high = 0, len(self.terms)
+        while low < high:
+            middle = (low + high) // 2
+            if self.terms.raw(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < len(self.terms) and self.terms.raw(low) == key else -1
+
+    def postings(self, term_id: int) -> memoryview:
+        return self._postings[self._offsets[term_id]:self._offsets[term_id + 1]]
+
+    def __getitem__(self, term: str) -> memoryview:
+        term_id = self._find(term)
+        if term_id < 0:
+            raise KeyError(term)
+        return self.postings(term_id)
+
+    def get(self, term: str, default=None):
+        term_id = self._find(term)
+        return self.postings(term_id) if term_id >= 0 else default
+
+    def __contains__(self, term: str) -> bool:
+        return self._find(term) >= 0
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def items(self) -> Iterator[Tuple[str, memoryview]]:
+        for term_id, term in enumerate(self.terms):
+            yield term, self.postings(term_id)
+
+    def postings_containing(self, fragment: str) -> Iterator[memoryview]:
+        """Posting lists of every term that contains `fragment`."""
+        for term_id in self.terms.containing(fragment):
+            yield self.postings(term_id)
+
+class MappedDocuments:
+    """The paragraph dicts SimpleSearchAgent.documents holds, assembled on access."""
+
+    def __init__(self, contents: MappedStrings, source_ids: memoryview, flags: memoryview, sources: List[str]):
+        self.contents = contents
+        self.source_ids = source_ids
+        self.flags = flags
+        self.sources = sources
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def content(self, index: int) -> str:
+        return self.contents[index]
+
+    def take(self, indices: Sequence[int]) -> List[dict]:
+        return [self[i] for i in indices]
+
+    def __getitem__(self, index: int) -> dict:
+        if index < 0:
+            index += len(self)
+        return {
+            "id": index,
+            "source": self.sources[self.source_ids[index]],
+            "content": self.contents[index],
+            "is_oriki": bool(self.flags[index]),
+        }
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(len(self)):
+            yield self[i]
+
+class IndexSnapshot:
+    """
+    A SimpleSearchAgent index persisted as flat arrays in one file and memory-mapped
+    read-only: paragraph text and normalized text with their offsets, interned
+    sources, oriki flags, the sorted vocabulary with its posting lists, the
+    FuzzyIndex buckets and the TimelineIndex rows. Opening one costs a header parse; every worker process
+    mapping the same file shares its pages through the OS page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a local index snapshot")
+        header_size = int.from_bytes(self._buffer[len(MAGIC):len(MAGIC) + 8], "little")
+        header = json.loads(self._buffer[len(MAGIC) + 8:len(MAGIC) + 8 + header_size])
+        if header["version"] != SNAPSHOT_VERSION or header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written by an incompatible version")
+        self.fingerprint = header["fingerprint"]
+        self.sources: List[str] = header["sources"]
+        prefix = len(MAGIC) + 8 + header_size
+        self._data_start = prefix + (-prefix) % ALIGN
+        self._sections: Dict[str, List] = header["sections"]
+        self._view = memoryview(self._buffer)
+
+        self.normalized = self._strings("normalized")
+        self.documents = MappedDocuments(self._strings("content"), self._array("source_ids"), self._array("flags"),
+                                         self.sources)
+        self.oriki_doc_ids: List[int] = self._array("oriki_ids").tolist()
+        self.index = MappedPostings(self._strings("terms"), self._array("posting_offsets"), self._array("postings"))
+        self.bigrams = MappedPostings(self._strings("bigrams"), self._array("bigram_offsets"),
+                                      self._array("bigram_terms"))
+        by_length = self._array("length_terms")
+        self.fuzzy = FuzzyIndex.from_parts(self.index.terms, {int(length): by_length[start:end]
+                                                              for length, (start, end) in header["lengths"].items()},
+                                           self.bigrams)
+        self.timeline = TimelineIndex(self._strings("timeline_labels"),
+                                      **{name: self._array("timeline_" + name) for name, _ in TimelineIndex.ARRAYS})
+
+    def _array(self, name: str) -> memoryview:
+        offset, size, typecode = self._sections[name]
+        start = self._data_start + offset
+        return self._view[start:start + size].cast(typecode)
+
+    def _strings(self, name: str) -> MappedStrings:
+        offset, _, _ = self._sections[name]
+        return MappedStrings(self._buffer, self._data_start + offset, self._array(name + "_offsets"))
+
+def _string_sections(name: str, strings: Sequence[str]) -> List[Tuple[str, bytes, str]]:
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = array("q", [0])
+    total = 0
+    for data in encoded:
+        total += len(data)
+        offsets.append(total)
+    return [(name, b"".join(encoded), "B"), (name + "_offsets", offsets.tobytes(), "q")]
+
+def write_snapshot(path: str, agent, fingerprint) -> str:
+    """Writes the index of a loaded SimpleSearchAgent to `path` (via a temporary file)."""
+    documents = agent.documents
+    terms = sorted(agent.index)
+
+    # Each file name is stored once; paragraphs refer to it by position
+    source_index: Dict[str, int] = {}
+    source_ids = array("i")
+    flags = array("B")
+    for doc in documents:
+        source_ids.append(source_index.setdefault(doc["source"], len(source_index)))
+        flags.append(1 if doc["is_oriki"] else 0)
+    sources = list(source_index)
+
+    posting_offsets = array("q", [0])
+    postings = array("i")
+    for term in terms:
+        postings.extend(agent.index[term])
+        posting_offsets.append(len(postings))
+
+    # FuzzyIndex buckets, by term id in the sorted vocabulary
+    by_bigram: Dict[str, List[int]] = {}
+    by_length: Dict[int, List[int]] = {}
+    for term_id, term in enumerate(terms):
+        by_length.setdefault(len(term), []).append(term_id)
+        for gram in bigrams(term):
+            by_bigram.setdefault(gram, []).append(term_id)
+    grams = sorted(by_bigram)
+    bigram_offsets = array("q", [0])
+    bigram_terms = array("i")
+    for gram in grams:
+        bigram_terms.extend(by_bigram[gram])
+        bigram_offsets.append(len(bigram_terms))
+    length_terms = array("i")
+    lengths = {}
+    for length in sorted(by_length):
+        lengths[str(length)] = [len(length_terms), len(length_terms) + len(by_length[length])]
+        length_terms.extend(by_length[length])
+
+    sections = (
+        _string_sections("content", [doc["content"] for doc in documents])
+        + _string_sections("normalized", list(agent.normalized))
+        + [("source_ids", source_ids.tobytes(), "i"), ("flags", flags.tobytes(), "B"),
+           ("oriki_ids", array("i", agent.oriki_doc_ids).tobytes(), "i")]
+        + _string_sections("terms", terms)
+        + [("posting_offsets", posting_offsets.tobytes(), "q"), ("postings", postings.tobytes(), "i")]
+        + _string_sections("bigrams", grams)
+        + [("bigram_offsets", bigram_offsets.tobytes(), "q"), ("bigram_terms", bigram_terms.tobytes(), "i"),
+           ("length_terms", length_terms.tobytes(), "i")]
+        + _string_sections("timeline_labels", list(agent.timeline.labels))
+        + [("timeline_" + name, array(typecode, getattr(agent.timeline, name)).tobytes(), typecode)
+           for name, typecode in TimelineIndex.ARRAYS]
+    )
+    layout = {}
+    offset = 0
+    for name, data, typecode in sections:
+        layout[name] = [offset, len(data), typecode]
+        offset += len(data) + (-len(data)) % ALIGN
+
+    header = json.dumps({"version": SNAPSHOT_VERSION, "byteorder": sys.byteorder, "fingerprint": fingerprint,
+                         "sources": sources, "lengths": lengths, "sections": layout},
+                        ensure_ascii=False).encode("utf-8")
+    prefix = len(MAGIC) + 8 + len(header)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        f.write(b"\0" * ((-prefix) % ALIGN))
+        for name, data, _ in sections:
+            f.write(data)
+            f.write(b"\0" * ((-len(data)) % ALIGN))
+    os.replace(tmp, path)
+    return path
+
+def snapshot_path(directory: str, data_dir: str, fingerprint) -> str:
+    """
+    Snapshots are named after their data directory and its fingerprint, so a file
+    never changes once written: workers agree on it without locking and an update
+    to data/raw simply produces a new name.
+    """
+    folder = hashlib.sha256(os.path.abspath(data_dir).encode("utf-8")).hexdigest()[:12]
+    version = hashlib.sha256(json.dumps([SNAPSHOT_VERSION, fingerprint]).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(directory, f"local_index-{folder}-{version}.snap")
+
+def open_snapshot(directory: str, data_dir: str, fingerprint, build: Callable[[], object]) -> IndexSnapshot:
+    """
+    Maps the snapshot for `fingerprint`, first writing it from `build()` (a loaded
+    SimpleSearchAgent) if no worker has yet. Older snapshots of the same data
+    directory are removed where the platform allows it.
+    """
+    path = snapshot_path(directory, data_dir, fingerprint)
+    fingerprint = json.loads(json.dumps(fingerprint))
+    if os.path.exists(path):
+        try:
+            snapshot = IndexSnapshot(path)
+            if snapshot.fingerprint == fingerprint:
+                return snapshot
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Rebuilding unreadable index snapshot {path}: {e}")
+    write_snapshot(path, build(), fingerprint)
+    prefix = os.path.basename(path).rsplit("-", 1)[0] + "-"
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(".snap") and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                # Still mapped by a worker on a platform that forbids removing it
+                pass
+    return IndexSnapshot(path)
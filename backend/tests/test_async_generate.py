@@ -0,0 +1,83 @@
+from fastapi.testclient import TestClient
+import sys
+import os
+import asyncio
+import threading
+import httpx
+from unittest.mock import MagicMock
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.main import app
+from backend.schemas import NarrativeResponse
+
+client = TestClient(app)
+
+def test_generate_prefers_async_processor():
+    import backend.main as main_module
+
+    calls = []
+
+    def process_query(query, age, education, tone):
+        raise AssertionError("The blocking variant should not be used when aprocess exists")
+
+    async def aprocess(query, age, education, tone):
+        calls.append(query)
+        return NarrativeResponse(narrative="Async answer", metadata={})
+
+    process_query.aprocess = aprocess
+
+    original_get_qa_chain = main_module.get_qa_chain
+    main_module.get_qa_chain = MagicMock(return_value=process_query)
+    main_module.process_query = None
+    main_module.response_cache.clear()
+
+    try:
+        response = client.post("/generate", json={"query": "Owu-Ipole"})
+        assert response.status_code == 200
+        assert response.json()["narrative"] == "Async answer"
+        assert calls == ["Owu-Ipole"]
+    finally:
+        main_module.get_qa_chain = original_get_qa_chain
+        main_module.process_query = None
+        main_module.response_cache.clear()
+
+def test_slow_processor_build_runs_off_the_event_loop():
+    import backend.main as main_module
+
+    release = threading.Event()
+    processor = MagicMock(return_value=NarrativeResponse(narrative="RAG answer", metadata={}))
+
+    def slow_factory(**kwargs):
+        # Stands in for opening the vector store and building the LLM client
+        release.wait(5)
+        return processor
+
+    factory = MagicMock(side_effect=slow_factory)
+    original = (main_module.get_qa_chain, main_module.PROCESSOR_BUILD_WAIT)
+    main_module.get_qa_chain = factory
+    main_module.PROCESSOR_BUILD_WAIT = 0.05
+    main_module.process_query = None
+    main_module.response_cache.clear()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # Served by local search while the shared build is still running; the loop stays free
+            responses = await asyncio.gather(*(client.post("/generate", json={"query": q}) for q in ["Abeokuta", "Owu Wars"]))
+            assert [r.json()["metadata"]["mode"] for r in responses] == ["Local Search"] * 2
+            assert (await client.get("/metrics")).status_code == 200
+            release.set()
+            await main_module.processor_build
+            response = await client.post("/generate", json={"query": "Abeokuta"})
+            assert response.json()["narrative"] == "RAG answer"
+
+    try:
+        asyncio.run(scenario())
+        assert factory.call_count == 1
+    finally:
+        release.set()
+        main_module.get_qa_chain, main_module.PROCESSOR_BUILD_WAIT = original
+        main_module.process_query = None
+        main_module.response_cache.clear()
@@ -0,0 +1,91 @@
+from fastapi.testclient import TestClient
+import sys
+import os
+import json
+import asyncio
+from unittest.mock import MagicMock
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.main import app
+from backend.schemas import NarrativeResponse
+
+client = TestClient(app)
+
+def read_lines(payload):
+    with client.stream("POST", "/generate/batch", json=payload) as response:
+        assert response.status_code == 200
+        return [json.loads(line) for line in response.iter_lines() if line]
+
+def test_local_batch_matches_single_requests():
+    import backend.main as main_module
+    original_get_qa_chain = main_module.get_qa_chain
+    main_module.get_qa_chain = MagicMock(return_value=None)
+    main_module.process_query = None
+    main_module.response_cache.clear()
+
+    try:
+        queries = ["Tell me about the Owu Wars", "Oriki Owu", "Tell me about the Owu Wars", "Abeokuta"]
+        lines = read_lines([{"query": q} for q in queries])
+        assert [line["index"] for line in lines] == [0, 1, 2, 3]
+        main_module.response_cache.clear()
+        for query, line in zip(queries, lines):
+            single = client.post("/generate", json={"query": query}).json()
+            assert line["response"]["narrative"] == single["narrative"]
+    finally:
+        main_module.get_qa_chain = original_get_qa_chain
+        main_module.process_query = None
+        main_module.response_cache.clear()
+
+def test_rag_batch_dedupes_bounds_concurrency_and_reports_errors():
+    import backend.main as main_module
+
+    calls, prefetched, in_flight = [], [], []
+    running = [0]
+
+    def process_query(query, age, education, tone):
+        raise AssertionError("The async variant should be used")
+
+    async def aprocess(query, age, education, tone):
+        calls.append(query)
+        running[0] += 1
+        in_flight.append(running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        if query == "broken":
+            raise RuntimeError("LLM unavailable")
+        return NarrativeResponse(narrative=f"Answer to {query}")
+
+    process_query.aprocess = aprocess
+    process_query.prefetch = prefetched.append
+
+    original_get_qa_chain = main_module.get_qa_chain
+    original_concurrency = main_module.BATCH_CONCURRENCY
+    main_module.get_qa_chain = MagicMock(return_value=process_query)
+    main_module.BATCH_CONCURRENCY = 2
+    main_module.process_query = None
+    main_module.response_cache.clear()
+
+    try:
+        queries = ["q0", "q1", "q0", "broken", "q2", "q3", "q1"]
+        lines = read_lines([{"query": q} for q in queries])
+        assert [line["index"] for line in lines] == list(range(len(queries)))
+        assert sorted(calls) == ["broken", "q0", "q1", "q2", "q3"]
+        assert prefetched == [["q0", "q1", "broken", "q2", "q3"]]
+        assert max(in_flight) == 2
+        assert lines[2]["response"]["narrative"] == "Answer to q0"
+        assert lines[3]["error"] == "LLM unavailable"
+
+        # Answered requests are now cached; only the failed one runs again
+        calls.clear()
+        read_lines([{"query": "q0"}, {"query": "broken"}])
+        assert calls == ["broken"]
+
+        response = client.post("/generate/batch", json=[{"query": "q"}] * (main_module.BATCH_MAX_SIZE + 1))
+        assert response.status_code == 413
+    finally:
+        main_module.get_qa_chain = original_get_qa_chain
+        main_module.BATCH_CONCURRENCY = original_concurrency
+        main_module.process_query = None
+        main_module.response_cache.clear()
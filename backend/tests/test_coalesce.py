@@ -0,0 +1,101 @@
+import sys
+import os
+import asyncio
+import httpx
+from unittest.mock import MagicMock
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+import backend.main as main_module
+from backend.coalesce import SingleFlight
+from backend.schemas import NarrativeResponse
+
+def with_processor(aprocess):
+    def process_query(query, age, education, tone):
+        raise AssertionError("The blocking variant should not be used when aprocess exists")
+    process_query.aprocess = aprocess
+    return process_query
+
+async def post_all(payloads):
+    transport = httpx.ASGITransport(app=main_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.post("/generate", json=payload) for payload in payloads))
+
+def test_identical_concurrent_requests_share_one_llm_call():
+    calls = []
+
+    async def aprocess(query, age, education, tone):
+        calls.append((query, education))
+        await asyncio.sleep(0.05)
+        return NarrativeResponse(narrative=f"Answer for {education}", metadata={})
+
+    original_get_qa_chain = main_module.get_qa_chain
+    main_module.get_qa_chain = MagicMock(return_value=with_processor(aprocess))
+    main_module.process_query = None
+    main_module.response_cache.clear()
+    before = main_module.in_flight.stats()
+    try:
+        # 30 students send the same question (modulo case and spacing); one asks as an academic
+        payloads = [{"query": "Owu  wars" if i % 2 else "owu wars"} for i in range(30)]
+        payloads.append({"query": "Owu wars", "education_level": "Academic"})
+        responses = asyncio.run(post_all(payloads))
+
+        assert all(r.status_code == 200 for r in responses)
+        assert sorted(calls) == [("Owu wars", "Academic"), ("owu wars", "General")]
+        assert [r.json()["narrative"] for r in responses[:30]] == ["Answer for General"] * 30
+        assert sum(bool(r.json()["metadata"].get("coalesced")) for r in responses) == 29
+
+        stats = main_module.in_flight.stats()
+        assert stats["coalesced"] - before["coalesced"] == 29
+        assert stats["in_flight"] == 0
+        metrics = main_module.registry.render()
+        assert "owu_coalesced_requests_total" in metrics
+    finally:
+        main_module.get_qa_chain = original_get_qa_chain
+        main_module.process_query = None
+        main_module.response_cache.clear()
+
+def test_waiters_share_failures_and_give_up_after_the_timeout():
+    flight = SingleFlight(timeout=0.05)
+    calls = []
+
+    async def failing():
+        calls.append("fail")
+        await asyncio.sleep(0.01)
+        raise RuntimeError("LLM unavailable")
+
+    async def slow():
+        calls.append("slow")
+        await asyncio.sleep(0.2)
+        return "slow answer"
+
+    async def scenario():
+        failures = await asyncio.gather(flight.run("q", failing), flight.run("q", failing), return_exceptions=True)
+        assert [str(f) for f in failures] == ["LLM unavailable"] * 2
+        assert calls == ["fail"]
+
+        # The second caller stops waiting after 50 ms and computes its own answer
+        results = await asyncio.gather(flight.run("slow", slow), flight.run("slow", slow))
+        assert results == [("slow answer", False), ("slow answer", False)]
+        assert flight.timeouts == 1
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+def test_disconnected_leader_does_not_cancel_the_shared_work():
+    flight = SingleFlight(timeout=1.0)
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.run("q", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.run("q", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await follower == ("answer", True)
+
+    asyncio.run(scenario())
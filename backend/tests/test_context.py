@@ -0,0 +1,81 @@
+import sys
+import os
+import tempfile
+import unittest
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+try:
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from langchain_community.llms.fake import FakeListLLM
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from backend.context import assemble_context, context_budget, count_tokens, deduplicate
+    from backend.vector_index import NumpyVectorStore
+    from backend.rag import get_qa_chain
+except ImportError:
+    assemble_context = None
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "../data/raw")
+
+@unittest.skipIf(assemble_context is None, "LangChain is not installed")
+class TestContextAssembly(unittest.TestCase):
+    def chunks(self):
+        # One long paragraph, so the splitter has to overlap neighbouring chunks
+        with open(os.path.join(DATA_DIR, "owu_history.txt"), encoding="utf-8") as f:
+            text = " ".join(f.read().split())
+        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200,
+                                                  separators=["\n\n", "\n", ".", " ", ""])
+        return [Document(page_content=c, metadata={"source": "/data/raw/owu_history.txt"})
+                for c in splitter.split_text(text)]
+
+    def test_splitter_overlap_is_removed(self):
+        chunks = self.chunks()[:4]
+        deduped, removed = deduplicate(chunks)
+        self.assertGreater(removed, 0)
+        self.assertLess(sum(len(d.page_content) for d in deduped), sum(len(c.page_content) for c in chunks))
+        # Nothing but the overlap goes: every chunk's words are still present
+        joined = " ".join(" ".join(d.page_content for d in deduped).split())
+        for chunk in chunks:
+            self.assertIn(" ".join(chunk.page_content.split()[5:-5])[:100], joined)
+
+    def test_contained_chunks_are_dropped(self):
+        full = Document(page_content="The Owu Wars began in 1821 and lasted five years.", metadata={"source": "wars.txt"})
+        part = Document(page_content="The Owu Wars began in 1821", metadata={"source": "/abs/wars.txt"})
+        other = Document(page_content="The Owu Wars began in 1821", metadata={"source": "notes.txt"})
+        deduped, _ = deduplicate([full, part, other])
+        self.assertEqual([d.metadata["source"] for d in deduped], ["wars.txt", "notes.txt"])
+
+    def test_budget_trims_lowest_ranked_first(self):
+        docs = [Document(page_content=f"Chunk {i}. " + "word " * 200, metadata={"source": f"{i}.txt"}) for i in range(5)]
+        per_chunk = count_tokens(docs[0].page_content)
+        assembled = assemble_context(docs, per_chunk * 2 + 100)
+        self.assertEqual([d.metadata["source"] for d in assembled], ["0.txt", "1.txt", "2.txt"])
+        self.assertLessEqual(sum(count_tokens(d.page_content) for d in assembled), per_chunk * 2 + 100)
+        self.assertTrue(assembled[-1].page_content.endswith("..."))
+        # The best chunk always survives, cut down if needed
+        self.assertLessEqual(count_tokens(assemble_context(docs, 60)[0].page_content), 60)
+
+    def test_budgets_follow_audience_and_education(self):
+        self.assertLess(context_budget(8, "Child", "Storyteller"), context_budget(30, "General", "Neutral"))
+        self.assertLess(context_budget(30, "General", "Neutral"), context_budget(30, "Academic", "Formal"))
+        self.assertLessEqual(context_budget(15, "Academic", "Formal"), context_budget(30, "Academic", "Formal"))
+
+    def test_chain_reports_prompt_tokens(self):
+        chunks = self.chunks()
+        answer = '{"narrative": "Owu.", "timeline": [], "sources": []}'
+        with tempfile.TemporaryDirectory() as tmp:
+            store = NumpyVectorStore.from_texts([c.page_content for c in chunks], DeterministicFakeEmbedding(size=8),
+                                                metadatas=[c.metadata for c in chunks], directory=tmp)
+            process = get_qa_chain(llm=FakeListLLM(responses=[answer] * 2),
+                                   retriever=store.as_retriever(search_kwargs={"k": 5}))
+            child = process("Owu", 8, "Child", "Storyteller")
+            academic = process("Owu", 30, "Academic", "Formal")
+        for response in (child, academic):
+            self.assertLessEqual(response.metadata["context_tokens"], response.metadata["context_budget"])
+            self.assertGreater(response.metadata["prompt_tokens"], response.metadata["context_tokens"])
+        self.assertLess(child.metadata["context_tokens"], academic.metadata["context_tokens"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import sys
+import os
+import tempfile
+import unittest
+import multiprocessing
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+try:
+    import numpy as np
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from backend.embeddings import CachedEmbeddings
+
+    class CountingEmbedding(DeterministicFakeEmbedding):
+        embedded: int = 0
+
+        def embed_documents(self, texts):
+            self.embedded += len(texts)
+            return super().embed_documents(texts)
+
+        def embed_query(self, text):
+            self.embedded += 1
+            return super().embed_query(text)
+except ImportError:
+    CachedEmbeddings = None
+
+def write_batches(cache_dir, worker):
+    """One worker process adding its own texts to a shared cache, a few at a time."""
+    embeddings = CachedEmbeddings(DeterministicFakeEmbedding(size=16), "fake", cache_dir=cache_dir)
+    for batch in range(30):
+        embeddings.embed_documents([f"worker {worker} text {batch} {i}" for i in range(10)])
+
+@unittest.skipIf(CachedEmbeddings is None, "langchain/numpy not installed")
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def make(self, base=None, model="fake"):
+        return CachedEmbeddings(base or CountingEmbedding(size=16), model, cache_dir=self.tmp.name)
+
+    def test_repeated_texts_are_embedded_once(self):
+        embeddings = self.make()
+        first = embeddings.embed_documents(["Owu", "Egba", "Owu"])
+        second = embeddings.embed_documents(["Egba", "Owu"])
+        self.assertEqual(embeddings.base.embedded, 2)
+        self.assertEqual(first[0], first[2])
+        self.assertEqual(second, [first[1], first[0]])
+        self.assertEqual(embeddings.stats()["hits"], 3)
+
+    def test_cache_persists_across_instances(self):
+        expected = self.make().embed_documents(["Olowu of Owu", "Abeokuta"])
+        expected_query = self.make().embed_query("Who founded Owu?")
+
+        reopened = self.make()
+        self.assertEqual(len(reopened.cache), 3)
+        self.assertEqual(reopened.embed_documents(["Abeokuta", "Olowu of Owu"]), expected[::-1])
+        self.assertEqual(reopened.embed_query("Who founded Owu?"), expected_query)
+        self.assertEqual(reopened.base.embedded, 0)
+        # Vectors come back through float32
+        self.assertAlmostEqual(expected[0][0], CountingEmbedding(size=16).embed_documents(["Olowu of Owu"])[0][0], places=5)
+
+    def test_models_do_not_share_entries(self):
+        self.make(model="model-a").embed_documents(["Owu"])
+        other = self.make(model="model-b")
+        other.embed_documents(["Owu"])
+        self.assertEqual(other.base.embedded, 1)
+
+    def test_interrupted_write_is_ignored(self):
+        embeddings = self.make()
+        embeddings.embed_documents(["one", "two"])
+        # Simulate a crash after the vectors were written but before the index caught up
+        with open(embeddings.cache.vectors_path, "r+b") as f:
+            f.truncate(os.path.getsize(embeddings.cache.vectors_path) - 4)
+        reopened = self.make()
+        self.assertEqual(len(reopened.cache), 1)
+        reopened.embed_documents(["one", "two", "three"])
+        self.assertEqual(reopened.base.embedded, 2)
+
+    def test_concurrent_writer_processes_keep_rows_consistent(self):
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=write_batches, args=(self.tmp.name, w)) for w in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+
+        reopened = self.make()
+        self.assertEqual(len(reopened.cache), 4 * 30 * 10)
+        texts = [f"worker {w} text {b} {i}" for w in range(4) for b in range(30) for i in range(10)]
+        expected = DeterministicFakeEmbedding(size=16).embed_documents(texts)
+        cached = [reopened.cache.get(reopened.cache.key(t)) for t in texts]
+        self.assertEqual(cached, np.asarray(expected, dtype=np.float32).tolist())
+        self.assertEqual(reopened.base.embedded, 0)
+
+if __name__ == "__main__":
+    unittest.main()
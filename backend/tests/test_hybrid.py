@@ -0,0 +1,73 @@
+import sys
+import os
+import asyncio
+import tempfile
+import unittest
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.shared_agent import SharedSearchAgent
+from backend.simple_agent import normalize
+from backend.metrics import finish_trace, start_trace
+
+try:
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from backend.hybrid import HybridRetriever, reciprocal_rank_fusion
+    from backend.vector_index import NumpyVectorStore
+except ImportError:
+    HybridRetriever = None
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "../data/raw")
+
+@unittest.skipIf(HybridRetriever is None, "LangChain is not installed")
+class TestHybridRetrieval(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.agent = SharedSearchAgent(DATA_DIR)
+        # Fake embeddings are random, so the vector branch alone never finds the name
+        texts = ["Unrelated chunk number %d about farming." % i for i in range(30)]
+        self.store = NumpyVectorStore.from_texts(texts, DeterministicFakeEmbedding(size=16), directory=self.tmp.name)
+
+    def retriever(self, **kwargs):
+        return HybridRetriever(vector_retriever=self.store.as_retriever(search_kwargs={"k": 10}),
+                               lexical_agent=self.agent, candidates=10, **kwargs)
+
+    def test_rrf_rewards_documents_found_by_both_branches(self):
+        a, b, c = (Document(page_content=t, metadata={"source": "x.txt"}) for t in "abc")
+        fused = reciprocal_rank_fusion([[a, b], [c, Document(page_content="b", metadata={"source": "/data/x.txt"})]])
+        self.assertEqual([doc.page_content for doc in fused], ["b", "a", "c"])
+
+    def test_exact_names_come_from_the_lexical_branch(self):
+        docs = self.retriever(k=5).invoke("Ajibosin")
+        self.assertEqual(len(docs), 5)
+        # The archive spells it with tone marks (Ajíbọ̀sìn)
+        self.assertTrue(any("ajibosin" in normalize(doc.page_content) for doc in docs[:2]))
+        self.assertTrue(any("farming" in doc.page_content for doc in docs))
+
+    def test_async_path_matches_sync_path(self):
+        retriever = self.retriever(k=5)
+        sync_docs = retriever.invoke("Owu wars 1821")
+        async_docs = asyncio.run(retriever.ainvoke("Owu wars 1821"))
+        self.assertEqual([d.page_content for d in sync_docs], [d.page_content for d in async_docs])
+
+    def test_lexical_spans_join_the_callers_trace(self):
+        retriever = self.retriever(k=5)
+        self.agent.current()
+
+        async def traced_ainvoke():
+            token = start_trace()
+            await retriever.ainvoke("Owu wars 1821")
+            return finish_trace(token)
+
+        token = start_trace()
+        retriever.invoke("Owu wars 1821")
+        for trace in (finish_trace(token), asyncio.run(traced_ainvoke())):
+            self.assertIn("lexical_score", trace)
+            # Counted under its own stage, not as a local search request's
+            self.assertNotIn("score", trace)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+try:
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from langchain_core.vectorstores import InMemoryVectorStore
+    from backend.ingest import ingest_documents
+
+    class CountingEmbedding(DeterministicFakeEmbedding):
+        embedded: int = 0
+
+        def embed_documents(self, texts):
+            self.embedded += len(texts)
+            return super().embed_documents(texts)
+except ImportError:
+    ingest_documents = None
+
+@unittest.skipIf(ingest_documents is None, "LangChain is not installed")
+class TestIncrementalIngest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.db_dir = tempfile.mkdtemp()
+        self.embeddings = CountingEmbedding(size=8)
+        self.store = None
+        self.write("wars.txt", "The Owu Wars began in 1821.\n\nOwu-Ipole fell around 1825.")
+        self.write("culture.txt", "The Aro festival celebrates Owu heritage.")
+
+    def write(self, name, text):
+        with open(os.path.join(self.data_dir, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def open_store(self, embedding_function):
+        # Keep one in-memory store across runs, like a persisted Chroma directory
+        if self.store is None:
+            self.store = InMemoryVectorStore(embedding=embedding_function)
+        self.store.embedding = embedding_function
+        return self.store
+
+    def ingest(self, **kwargs):
+        return ingest_documents(data_dir=self.data_dir, db_dir=self.db_dir, embeddings=self.embeddings,
+                                vectorstore_factory=self.open_store, **kwargs)
+
+    def test_reingest_unchanged_archive_embeds_nothing(self):
+        first = self.ingest()
+        self.assertEqual(first["files_added"], 2)
+        embedded = self.embeddings.embedded
+        second = self.ingest()
+        self.assertEqual(second["files_skipped"], 2)
+        self.assertEqual(second["chunks_added"], 0)
+        self.assertEqual(self.embeddings.embedded, embedded)
+        self.assertEqual(len(self.store.store), first["chunks_added"])
+
+    def test_changed_and_removed_files_replace_their_vectors(self):
+        self.ingest()
+        self.write("wars.txt", "The Owu Wars began in 1821 and lasted five years.")
+        os.remove(os.path.join(self.data_dir, "culture.txt"))
+        report = self.ingest()
+        self.assertEqual(report["files_updated"], 1)
+        self.assertEqual(report["files_removed"], 1)
+        self.assertGreaterEqual(report["chunks_deleted"], 2)
+        contents = [doc["text"] for doc in self.store.store.values()]
+        self.assertEqual(contents, ["The Owu Wars began in 1821 and lasted five years."])
+
+    def test_batched_pipeline_embeds_each_chunk_once(self):
+        for i in range(20):
+            self.write(f"record_{i}.txt", f"Record {i} of the Owu archive.")
+        report = self.ingest(batch_size=3, concurrency=2, workers=2)
+        self.assertEqual(report["chunks_added"], 22)
+        self.assertEqual(self.embeddings.embedded, 22)
+        self.assertEqual(len(self.store.store), 22)
+        self.assertIn("embed", report["timings"])
+        self.assertGreater(report["chunks_per_second"], 0)
+
+    def test_failed_batches_are_retried(self):
+        failures = []
+        original = self.embeddings.embed_documents
+
+        def flaky(texts):
+            if not failures:
+                failures.append(texts)
+                raise ConnectionError("stub outage")
+            return original(texts)
+
+        object.__setattr__(self.embeddings, "embed_documents", flaky)
+        with patch("backend.ingest.time.sleep"):
+            report = self.ingest()
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(report["chunks_added"], 2)
+
+    def test_changing_embedding_model_rebuilds_the_store(self):
+        self.ingest()
+        object.__setattr__(self.embeddings, "model_name", "another-model")
+        report = self.ingest()
+        self.assertEqual(report["files_added"], 2)
+        self.assertEqual(report["chunks_added"], 2)
+        self.assertEqual(len(self.store.store), 2)
+
+if __name__ == "__main__":
+    unittest.main()
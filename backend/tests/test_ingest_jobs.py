@@ -0,0 +1,176 @@
+from fastapi.testclient import TestClient
+import sys
+import os
+import shutil
+import asyncio
+import tempfile
+import httpx
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+import backend.main as main_module
+from backend.jobs import JobRegistry
+from backend.schemas import NarrativeResponse
+
+try:
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from backend.ingest import ingest_documents
+    from backend import vector_index
+except ImportError:
+    ingest_documents = None
+
+client = TestClient(main_module.app)
+
+@unittest.skipIf(ingest_documents is None, "LangChain is not installed")
+class TestIngestJobs(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.base = tempfile.mkdtemp()
+        self.write("wars.txt", "The Owu Wars began in 1821.\n\nOwu-Ipole fell around 1825.")
+        self.patches = [patch.dict(os.environ, {"VECTOR_STORE": "numpy"}),
+                        patch.object(vector_index, "INDEX_DIR", self.base)]
+        for p in self.patches:
+            p.start()
+        self.saved = {name: getattr(main_module, name)
+                      for name in ("ingest_documents", "get_qa_chain", "process_query", "ingest_jobs")}
+        self.old_processor = MagicMock(name="old")
+        # Each built processor remembers which store generation was live when it was built
+        self.factory = MagicMock(side_effect=lambda **kwargs: MagicMock(store=vector_index.live_store_dir(self.base)))
+        self.stages = []
+        main_module.ingest_documents = self.ingest
+        main_module.get_qa_chain = self.factory
+        main_module.process_query = self.old_processor
+        main_module.ingest_jobs = JobRegistry()
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(main_module, name, value)
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+        shutil.rmtree(self.base, ignore_errors=True)
+
+    def write(self, name, text):
+        with open(os.path.join(self.data_dir, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def ingest(self, db_dir, progress):
+        def spy(stage, done, total):
+            # Which processor /generate would use at this point of the job
+            self.stages.append((stage, main_module.process_query is self.old_processor))
+            progress(stage, done, total)
+        return ingest_documents(data_dir=self.data_dir, db_dir=db_dir, embeddings=DeterministicFakeEmbedding(size=8),
+                                progress=spy, workers=1)
+
+    def run_job(self):
+        job = main_module.ingest_jobs.create()
+        asyncio.run(main_module.run_ingest_job(job))
+        return job
+
+    def test_job_builds_a_new_generation_and_swaps_it_in(self):
+        job = self.run_job()
+        self.assertEqual(job.state, "succeeded", job.error)
+        self.assertIn(("embed", True), self.stages)
+        self.assertTrue(all(old for _, old in self.stages))
+
+        live = vector_index.live_store_dir(self.base)
+        self.assertEqual(os.path.basename(live), job.id)
+        self.assertIsNot(main_module.process_query, self.old_processor)
+        self.assertEqual(main_module.process_query.store, live)
+
+        status = client.get(f"/ingest/{job.id}").json()
+        self.assertEqual(status["stage"], "done")
+        self.assertEqual(status["chunks_processed"], status["report"]["chunks_added"])
+        self.assertEqual(status["chunks_total"], status["chunks_processed"])
+        self.assertGreater(status["chunks_per_second"], 0)
+
+    def test_unchanged_archive_keeps_the_live_store(self):
+        self.run_job()
+        live, processor = vector_index.live_store_dir(self.base), main_module.process_query
+        job = self.run_job()
+        self.assertEqual(job.report["chunks_added"], 0)
+        self.assertEqual(vector_index.live_store_dir(self.base), live)
+        self.assertIs(main_module.process_query, processor)
+        self.assertEqual(os.listdir(os.path.join(self.base, vector_index.BUILDS_NAME)), [os.path.basename(live)])
+
+    def test_new_generations_are_incremental_and_old_ones_pruned(self):
+        first = self.run_job()
+        self.write("culture.txt", "The Aro festival celebrates Owu heritage.")
+        second = self.run_job()
+        self.assertEqual(second.report["files_skipped"], 1)
+        self.assertEqual(second.report["chunks_added"], 1)
+        self.write("culture.txt", "The Aro festival is held every year.")
+        third = self.run_job()
+        builds = sorted(os.listdir(os.path.join(self.base, vector_index.BUILDS_NAME)))
+        self.assertEqual(builds, sorted([second.id, third.id]))
+        self.assertNotIn(first.id, builds)
+
+    def test_failed_job_leaves_the_live_store_serving(self):
+        main_module.ingest_documents = MagicMock(side_effect=RuntimeError("embedding API down"))
+        job = self.run_job()
+        self.assertEqual(job.state, "failed")
+        self.assertIn("embedding API down", job.error)
+        self.assertIs(main_module.process_query, self.old_processor)
+        self.assertEqual(vector_index.live_store_dir(self.base), self.base)
+        self.assertEqual(os.listdir(os.path.join(self.base, vector_index.BUILDS_NAME)), [])
+
+    def test_failed_processor_build_restores_the_previous_generation(self):
+        first = self.run_job()
+        processor = main_module.process_query
+        self.write("culture.txt", "The Aro festival celebrates Owu heritage.")
+        self.factory.side_effect = RuntimeError("chain build failed")
+        job = self.run_job()
+        self.assertEqual(job.state, "failed")
+        self.assertIn("chain build failed", job.error)
+        self.assertIs(main_module.process_query, processor)
+        self.assertEqual(os.path.basename(vector_index.live_store_dir(self.base)), first.id)
+        self.assertEqual(os.listdir(os.path.join(self.base, vector_index.BUILDS_NAME)), [first.id])
+
+    def test_failed_first_build_leaves_no_live_generation(self):
+        self.factory.side_effect = RuntimeError("chain build failed")
+        self.assertEqual(self.run_job().state, "failed")
+        self.assertEqual(vector_index.live_store_dir(self.base), self.base)
+        self.assertFalse(os.path.exists(os.path.join(self.base, vector_index.CURRENT_NAME)))
+        self.assertEqual(os.listdir(os.path.join(self.base, vector_index.BUILDS_NAME)), [])
+
+    def test_answers_from_the_old_generation_are_not_cached_after_the_swap(self):
+        async def scenario():
+            started, release = asyncio.Event(), asyncio.Event()
+
+            def old_processor(**kwargs):
+                raise AssertionError("The async variant should be used")
+
+            async def aprocess(**kwargs):
+                started.set()
+                await release.wait()
+                return NarrativeResponse(narrative="Answer from the old store", metadata={})
+
+            old_processor.aprocess = aprocess
+            main_module.process_query = old_processor
+            transport = httpx.ASGITransport(app=main_module.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                request = asyncio.ensure_future(http.post("/generate", json={"query": "Owu Wars"}))
+                await started.wait()
+                job = main_module.ingest_jobs.create()
+                await main_module.run_ingest_job(job)
+                self.assertEqual(job.state, "succeeded", job.error)
+                release.set()
+                response = await request
+            self.assertEqual(response.json()["narrative"], "Answer from the old store")
+
+        main_module.response_cache.clear()
+        try:
+            asyncio.run(scenario())
+            self.assertEqual(len(main_module.response_cache), 0)
+        finally:
+            main_module.response_cache.clear()
+
+    def test_second_job_is_rejected_while_one_runs(self):
+        running = main_module.ingest_jobs.create()
+        response = client.post("/ingest")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["detail"]["job_id"], running.id)
+        self.assertEqual(client.get("/ingest/unknown").status_code, 404)
@@ -0,0 +1,81 @@
+from fastapi.testclient import TestClient
+import sys
+import os
+import tempfile
+from unittest.mock import MagicMock
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.main import app
+from backend import metrics
+
+client = TestClient(app)
+
+def local_mode(main_module):
+    original = main_module.get_qa_chain
+    main_module.get_qa_chain = MagicMock(return_value=None)
+    main_module.process_query = None
+    main_module.response_cache.clear()
+    return original
+
+def test_debug_flag_adds_stage_timings():
+    import backend.main as main_module
+    original = local_mode(main_module)
+    try:
+        plain = client.post("/generate", json={"query": "Owu Wars"}).json()
+        assert "timings_ms" not in plain["metadata"]
+
+        main_module.response_cache.clear()
+        traced = client.post("/generate?debug=true", json={"query": "Owu Wars"}).json()
+        timings = traced["metadata"]["timings_ms"]
+        assert {"normalize", "score", "build", "total"} <= set(timings)
+        assert timings["total"] >= timings["score"]
+    finally:
+        main_module.get_qa_chain = original
+        main_module.process_query = None
+        main_module.response_cache.clear()
+
+def test_metrics_endpoint_exposes_histograms_modes_and_caches():
+    import backend.main as main_module
+    original = local_mode(main_module)
+    try:
+        client.post("/generate", json={"query": "Oriki Owu"})
+        client.post("/generate", json={"query": "Oriki Owu"})
+        text = client.get("/metrics").text
+        assert "# TYPE owu_stage_seconds histogram" in text
+        assert 'owu_stage_seconds_bucket{stage="score",le="+Inf"}' in text
+        assert 'owu_request_seconds_count{endpoint="/generate"}' in text
+        assert 'owu_responses_total{mode="local"}' in text
+        assert 'owu_cache_hits_total{cache="response"}' in text
+        assert "owu_rag_enabled 0" in text
+    finally:
+        main_module.get_qa_chain = original
+        main_module.process_query = None
+        main_module.response_cache.clear()
+
+def test_spans_are_no_ops_when_disabled(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", False)
+    assert metrics.span("score") is metrics._NO_SPAN
+    token = metrics.start_trace()
+    with metrics.span("score"):
+        pass
+    assert set(metrics.finish_trace(token)) == {"score"}
+
+def test_rag_trace_covers_chain_stages():
+    try:
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from langchain_community.llms.fake import FakeListLLM
+        from backend.rag import get_qa_chain
+        from backend.vector_index import NumpyVectorStore
+    except ImportError:
+        return
+    answer = '{"narrative": "Owu.", "timeline": [], "sources": []}'
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NumpyVectorStore.from_texts(["The Owu Wars began in 1821."], DeterministicFakeEmbedding(size=8),
+                                            directory=tmp)
+        process = get_qa_chain(llm=FakeListLLM(responses=[answer]), retriever=store.as_retriever())
+        token = metrics.start_trace()
+        process("Owu Wars", 25, "General", "Neutral")
+        trace = metrics.finish_trace(token)
+    assert {"retrieve", "prompt", "llm", "parse"} <= set(trace)
@@ -0,0 +1,83 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend import paragraphs
+from backend.paragraphs import ParagraphStore, iter_paragraphs, read_paragraph, read_paragraphs
+from backend.simple_agent import SimpleSearchAgent
+
+TEXTS = {
+    "wars.txt": "The Owu Wars began in 1821.\n\n\n\nOwu-Ipole fell around 1825.\n  \nIts people scattered.\n",
+    "crlf.txt": "Abeokuta was founded by the Egba.\r\n\r\nThe Owu settled there too.\r\n",
+    "owu_oriki.txt": "\n\nỌ̀wọ́ Ìpọ̀lé, ọmọ Olówu.\n\n   \n\nPraise of the Olowu, the elder of Owu.",
+}
+
+class TestParagraphStore(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        for name, text in TEXTS.items():
+            with open(os.path.join(self.data_dir, name), "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_streamed_paragraphs_match_splitting_the_whole_file(self):
+        for name in TEXTS:
+            path = os.path.join(self.data_dir, name)
+            with open(path, "r", encoding="utf-8") as f:
+                expected = [p.strip() for p in f.read().split("\n\n") if p.strip()]
+            streamed = list(iter_paragraphs(path))
+            self.assertEqual([text for text, _, _ in streamed], expected, name)
+            for text, offset, length in streamed:
+                self.assertEqual(read_paragraph(path, offset, length), text)
+
+    def test_sources_are_interned(self):
+        agent = SimpleSearchAgent(self.data_dir)
+        self.assertIsInstance(agent.documents, ParagraphStore)
+        self.assertEqual(sorted(agent.documents.sources), sorted(TEXTS))
+        self.assertEqual(len(agent.documents.source_ids), len(agent.documents))
+
+    def test_text_kept_on_disk_gives_the_same_answers(self):
+        in_memory = SimpleSearchAgent(self.data_dir)
+        on_disk = SimpleSearchAgent(self.data_dir, max_memory=16)
+        self.assertTrue(in_memory.documents.in_memory)
+        self.assertFalse(on_disk.documents.in_memory)
+        self.assertEqual(list(on_disk.documents), list(in_memory.documents))
+        for query in ["Owu Wars", "Oriki of the Olowu", "Abeokuta", "scatterd"]:
+            self.assertEqual(on_disk.generate(query, 30, "general", "neutral"),
+                             in_memory.generate(query, 30, "general", "neutral"))
+
+    def test_only_top_k_paragraphs_are_read_back(self):
+        agent = SimpleSearchAgent(self.data_dir, max_memory=16)
+        with patch.object(paragraphs, "read_paragraphs", wraps=read_paragraphs) as reads:
+            ranked = agent.rank("Owu", top_k=2)
+        self.assertEqual(len(ranked), 2)
+        self.assertEqual(sum(len(call.args[1]) for call in reads.call_args_list), 2)
+
+    def test_reads_open_each_file_once(self):
+        agent = SimpleSearchAgent(self.data_dir, max_memory=16)
+        with patch.object(paragraphs, "read_paragraphs", wraps=read_paragraphs) as reads:
+            docs = list(agent.documents)
+            total, events = agent.events_between(1800, 1850, limit=10)
+        self.assertEqual(reads.call_count, len(TEXTS) + len({event["source"] for event in events}))
+        self.assertEqual(docs, list(SimpleSearchAgent(self.data_dir).documents))
+        self.assertEqual(total, 2)
+
+    def test_changed_file_is_not_read_back(self):
+        agent = SimpleSearchAgent(self.data_dir, max_memory=16)
+        with open(os.path.join(self.data_dir, "wars.txt"), "w", encoding="utf-8") as f:
+            f.write("Rewritten: Ọ̀wọ́ " * 10)
+        with self.assertRaises(OSError):
+            agent.rank("Owu Wars", top_k=3)
+        # Paragraphs of other files are still served
+        self.assertEqual(agent.rank("Abeokuta", top_k=1)[0][1]["source"], "crlf.txt")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import sys
+import os
+import unittest
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.simple_agent import SimpleSearchAgent
+from backend.ranking import BM25Index, top_k
+
+class TestBM25Ranking(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        cls.agent = SimpleSearchAgent(os.path.join(base_dir, "../data/raw"), ranking="bm25")
+
+    def normalize_text(self, text):
+        return self.agent.normalize_text(text)
+
+    def test_top_k_matches_stable_full_sort(self):
+        rng = np.random.default_rng(0)
+        scores = rng.integers(0, 4, size=500).astype(np.float32)
+        expected = sorted(np.flatnonzero(scores > 0), key=lambda i: (-scores[i], i))[:7]
+        self.assertEqual(list(top_k(scores, 7)), expected)
+
+    def test_rarer_terms_weigh_more(self):
+        index = BM25Index(["owu war", "owu abeokuta", "owu ife"])
+        self.assertGreater(index.idf[index.vocabulary["war"]], index.idf[index.vocabulary["owu"]])
+
+    def test_bm25_retrieves_ajibosin_misspelling(self):
+        response = self.agent.generate("Give me the Oriki of Ajiboshin", 25, "General", "Neutral")
+        self.assertEqual(response.metadata["ranking"], "bm25")
+        self.assertIn("ajibosin", self.normalize_text(response.narrative))
+
+    def test_bm25_retrieves_owu_wars(self):
+        response = self.agent.generate("Tell me about the Owu Wars", 25, "General", "Neutral")
+        normalized_narrative = self.normalize_text(response.narrative)
+        self.assertIn("war", normalized_narrative)
+        self.assertTrue("1821" in normalized_narrative or "1825" in normalized_narrative)
+
+    def test_bm25_keeps_oriki_boost(self):
+        response = self.agent.generate("Give me the Oriki of Owu", 25, "General", "Neutral")
+        self.assertIn("akoda", self.normalize_text(response.narrative))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+from fastapi.testclient import TestClient
+import sys
+import os
+import time
+from unittest.mock import MagicMock
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.main import app
+from backend.cache import TTLCache
+from backend.schemas import NarrativeResponse
+
+client = TestClient(app)
+
+def test_lru_eviction_and_ttl():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+    assert cache.stats()["hits"] == 1
+
+def test_generate_served_from_cache():
+    import backend.main as main_module
+
+    processor = MagicMock(return_value=NarrativeResponse(narrative="The Owu Wars began in 1821.", metadata={}))
+    original_get_qa_chain = main_module.get_qa_chain
+    main_module.get_qa_chain = MagicMock(return_value=processor)
+    main_module.process_query = None
+    main_module.response_cache.clear()
+
+    try:
+        payload = {"query": "Tell me about the  Owu Wars", "user_age": 30, "tone": "Formal"}
+        first = client.post("/generate", json=payload).json()
+        # Same question modulo case and spacing, same persona
+        second = client.post("/generate", json=dict(payload, query="tell me about the owu wars")).json()
+        assert processor.call_count == 1
+        assert "cache" not in first["metadata"]
+        assert second["metadata"]["cache"] == "hit"
+        assert second["narrative"] == first["narrative"]
+
+        # A different persona is a different entry
+        client.post("/generate", json=dict(payload, tone="Storyteller"))
+        assert processor.call_count == 2
+
+        # Invalidated when the data changes
+        main_module.response_cache.clear()
+        client.post("/generate", json=payload)
+        assert processor.call_count == 3
+    finally:
+        main_module.get_qa_chain = original_get_qa_chain
+        main_module.process_query = None
+        main_module.response_cache.clear()
+
+def test_unparsed_answers_are_not_cached():
+    import backend.main as main_module
+
+    processor = MagicMock(return_value=NarrativeResponse(narrative="raw model output", metadata={"error": "Output parsing failed"}))
+    original_get_qa_chain = main_module.get_qa_chain
+    main_module.get_qa_chain = MagicMock(return_value=processor)
+    main_module.process_query = None
+    main_module.response_cache.clear()
+
+    try:
+        payload = {"query": "Tell me about the Owu Wars"}
+        for _ in range(2):
+            assert "cache" not in client.post("/generate", json=payload).json()["metadata"]
+        with client.stream("POST", "/generate/stream", json=payload) as response:
+            response.read()
+        with client.stream("POST", "/generate/batch", json=[payload]) as response:
+            response.read()
+        assert processor.call_count == 4
+        assert len(main_module.response_cache) == 0
+    finally:
+        main_module.get_qa_chain = original_get_qa_chain
+        main_module.process_query = None
+        main_module.response_cache.clear()
@@ -0,0 +1,60 @@
+import sys
+import os
+import difflib
+import unicodedata
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.simple_agent import SimpleSearchAgent, normalize
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.data_dir = os.path.join(base_dir, "../data/raw")
+        self.agent = SimpleSearchAgent(self.data_dir)
+
+    def test_postings_cover_every_token(self):
+        for doc_id, normalized in enumerate(self.agent.normalized):
+            for token in normalized.split():
+                self.assertIn(doc_id, self.agent.index[token])
+
+    def test_oriki_flag_precomputed(self):
+        self.assertTrue(self.agent.oriki_doc_ids, "Should flag the Oriki paragraphs at load time")
+        for doc_id in self.agent.oriki_doc_ids:
+            doc = self.agent.documents[doc_id]
+            self.assertTrue("oriki" in doc["source"].lower() or "oriki" in doc["content"].lower()[:50])
+
+    def test_docs_containing_matches_full_scan(self):
+        # Substrings, whole words and multi-word phrases must agree with a plain `in` scan
+        for fragment in ["war", "owu", "akoda", "abeokuta", "owu wars", "the owu", "ife and ijebu", "zzz", ""]:
+            expected = {i for i, text in enumerate(self.agent.normalized) if fragment in text}
+            self.assertEqual(self.agent._docs_containing(fragment), expected, fragment)
+
+    def test_fuzzy_index_matches_difflib(self):
+        vocabulary = list(self.agent.index)
+        for word in ["ajiboshin", "abeokutta", "olowwu", "lakoda", "wars", "ife", "xyz"]:
+            expected = set(difflib.get_close_matches(word, vocabulary, n=len(vocabulary), cutoff=0.8))
+            self.assertEqual(set(self.agent.fuzzy.close_terms(word)), expected, word)
+
+    def test_translate_normalization_matches_nfd(self):
+        for doc in self.agent.documents:
+            expected = ''.join(c for c in unicodedata.normalize('NFD', doc["content"])
+                               if unicodedata.category(c) != 'Mn').lower()
+            self.assertEqual(normalize(doc["content"]), expected)
+
+    def test_rank_many_matches_single_queries(self):
+        # The first query's phrase lookup normalizes to the second query's keyword
+        queries = ["ó́w u", "ow u", "Owu Wars", "owu wars"]
+        self.assertEqual(self.agent.rank_many(queries), [self.agent.rank(q) for q in queries])
+
+    def test_compact_corpus_gives_same_results(self):
+        compact = SimpleSearchAgent(self.data_dir, compact=True)
+        self.assertEqual(list(compact.normalized), list(self.agent.normalized))
+        for query in ["Ajibosin", "Tell me about the Owu Wars", "Give me the Oriki of Owu"]:
+            self.assertEqual(compact.generate(query, 25, "General", "Neutral"),
+                             self.agent.generate(query, 25, "General", "Neutral"))
+
+if __name__ == "__main__":
+    unittest.main()
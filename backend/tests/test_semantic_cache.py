@@ -0,0 +1,87 @@
+import sys
+import os
+import re
+import asyncio
+import tempfile
+import unittest
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.schemas import NarrativeResponse
+
+try:
+    from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+    from langchain_community.llms.fake import FakeListLLM
+    from backend.semantic_cache import SemanticCache
+    from backend.vector_index import NumpyVectorStore
+    from backend.rag import get_qa_chain
+
+    VOCABULARY = ["tell", "me", "about", "the", "owu", "wars", "please", "aro", "festival"]
+
+    class BagOfWords(Embeddings):
+        """Word counts over a tiny vocabulary, so rewordings land close together."""
+        def embed_documents(self, texts):
+            return [self.embed_query(t) for t in texts]
+
+        def embed_query(self, text):
+            words = re.findall(r"\w+", text.lower())
+            return [float(words.count(w)) for w in VOCABULARY]
+except ImportError:
+    SemanticCache = None
+
+ANSWER = '{"narrative": "The Owu Wars began in 1821.", "timeline": [], "sources": []}'
+
+@unittest.skipIf(SemanticCache is None, "LangChain is not installed")
+class TestSemanticCache(unittest.TestCase):
+    def test_threshold_persona_and_lru(self):
+        cache = SemanticCache(maxsize=2, threshold=0.9)
+        response = NarrativeResponse(narrative="Owu")
+        cache.add("adult", "q1", [1.0, 0.0], response)
+        self.assertIsNotNone(cache.lookup("adult", [0.95, 0.05]))
+        self.assertIsNone(cache.lookup("adult", [0.5, 0.5]))
+        self.assertIsNone(cache.lookup("child", [1.0, 0.0]))
+
+        cache.add("adult", "q2", [0.0, 1.0], response)
+        cache.lookup("adult", [1.0, 0.0])  # q1 is now the most recently used
+        cache.add("child", "q3", [1.0, 0.0], response)
+        self.assertIsNone(cache.lookup("adult", [0.0, 1.0]))
+        self.assertIsNotNone(cache.lookup("adult", [1.0, 0.0]))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        cache.clear()
+        self.assertIsNone(cache.lookup("adult", [1.0, 0.0]))
+        self.assertEqual(cache.stats()["saved_llm_calls"], 3)
+
+        # An answer computed before the clear is not stored after it
+        generation = cache.generation
+        cache.clear()
+        cache.add("adult", "q1", [1.0, 0.0], response, generation)
+        self.assertIsNone(cache.lookup("adult", [1.0, 0.0]))
+        cache.add("adult", "q1", [1.0, 0.0], response, cache.generation)
+        self.assertIsNotNone(cache.lookup("adult", [1.0, 0.0]))
+
+    def test_reworded_question_skips_the_llm(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = NumpyVectorStore.from_texts(["The Owu Wars began in 1821."], DeterministicFakeEmbedding(size=8),
+                                                directory=tmp)
+            llm = FakeListLLM(responses=[ANSWER] * 5)
+            cache = SemanticCache(threshold=0.92)
+            process = get_qa_chain(llm=llm, retriever=store.as_retriever(search_kwargs={"k": 1}),
+                                   answer_cache=cache, embeddings=BagOfWords())
+
+            first = process("Tell me about the Owu wars", 25, "General", "Neutral")
+            again = process("tell me about the Owu Wars please", 30, "General", "Neutral")
+            other_persona = asyncio.run(process.aprocess("Tell me about the Owu wars", 8, "Child", "Storyteller"))
+            other_topic = process("Tell me about the Aro festival", 25, "General", "Neutral")
+
+            self.assertEqual(llm.i, 3)
+            self.assertNotIn("cache", first.metadata)
+            self.assertEqual(again.metadata["cache"], "semantic")
+            self.assertEqual(again.narrative, first.narrative)
+            self.assertNotIn("cache", other_persona.metadata)
+            self.assertNotIn("cache", other_topic.metadata)
+            self.assertEqual(cache.stats()["hits"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
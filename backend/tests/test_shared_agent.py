@@ -0,0 +1,52 @@
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.shared_agent import SharedSearchAgent
+
+class TestSharedSearchAgent(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.write("wars.txt", "The Owu Wars began in 1821.\n\nAbeokuta was founded later.")
+        self.shared = SharedSearchAgent(self.data_dir, check_interval=3600)
+
+    def write(self, name, text):
+        with open(os.path.join(self.data_dir, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_loads_once_and_reuses(self):
+        first = asyncio.run(self.shared.get())
+        second = asyncio.run(self.shared.get())
+        self.assertIs(first, second)
+        self.assertFalse(self.shared.refresh(), "Unchanged data should not trigger a reload")
+        self.assertEqual(self.shared.stats()["documents"], 2)
+
+    def test_reloads_when_data_changes(self):
+        old = asyncio.run(self.shared.get())
+        time.sleep(0.01)
+        self.write("culture.txt", "The Aro festival celebrates Owu heritage.")
+        self.assertTrue(self.shared.refresh())
+        new = asyncio.run(self.shared.get())
+        self.assertIsNot(old, new)
+        self.assertEqual(len(old.documents), 2, "In-flight holders keep the old corpus")
+        self.assertEqual(self.shared.stats()["documents"], 3)
+
+    def test_empty_agent_is_not_reloaded_by_requests(self):
+        for name in os.listdir(self.data_dir):
+            os.remove(os.path.join(self.data_dir, name))
+        empty = asyncio.run(self.shared.get())
+        self.write("wars.txt", "The Owu Wars began in 1821.")
+        response = empty.generate("Owu Wars", 30, "General", "Neutral")
+        self.assertEqual(response.metadata["info"], "No data found")
+        self.assertEqual(len(empty.documents), 0, "Only refresh() loads the new files")
+        self.assertTrue(self.shared.refresh())
+        self.assertEqual(self.shared.stats()["documents"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import sys
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend import snapshot
+from backend.simple_agent import SimpleSearchAgent
+from backend.shared_agent import SharedSearchAgent
+
+QUERIES = ["Owu Wars", "Ọ̀wọ́ Oriki", "praise of the olowu", "Abeokuta founded", "warss", "1821", "ow", "xyzzy"]
+
+class TestIndexSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.snapshot_dir = tempfile.mkdtemp()
+        self.write("wars.txt", "The Owu Wars began in 1821.\n\nAbeokuta was founded later by the Egba.")
+        self.write("owu_oriki.txt", "Ọ̀wọ́ Ìpọ̀lé, ọmọ Olówu.\n\nPraise of the Olowu, the elder of Owu.")
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+        shutil.rmtree(self.snapshot_dir, ignore_errors=True)
+
+    def write(self, name, text):
+        with open(os.path.join(self.data_dir, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_mapped_agent_ranks_like_the_raw_agent(self):
+        shared = SharedSearchAgent(self.data_dir, snapshot_dir=self.snapshot_dir)
+        mapped = shared.current()
+        raw = SimpleSearchAgent(self.data_dir)
+        self.assertIsInstance(mapped.documents, snapshot.MappedDocuments)
+        self.assertEqual(list(mapped.documents), list(raw.documents))
+        self.assertEqual(mapped.available_topics, raw.available_topics)
+        for query in QUERIES:
+            self.assertEqual(mapped.rank(query, top_k=5), raw.rank(query, top_k=5), query)
+            self.assertEqual(mapped.generate(query, 30, "general", "neutral"),
+                             raw.generate(query, 30, "general", "neutral"))
+
+    def test_snapshot_is_rebuilt_only_when_the_data_changes(self):
+        shared = SharedSearchAgent(self.data_dir, snapshot_dir=self.snapshot_dir)
+        with patch.object(snapshot, "write_snapshot", wraps=snapshot.write_snapshot) as writes:
+            shared.refresh()
+            first = shared.stats()["snapshot"]
+            # A fresh process with unchanged data maps the existing file
+            SharedSearchAgent(self.data_dir, snapshot_dir=self.snapshot_dir).refresh()
+            self.assertEqual(writes.call_count, 1)
+
+            time.sleep(0.01)
+            self.write("culture.txt", "The Aro festival celebrates Owu heritage.")
+            self.assertTrue(shared.refresh())
+            self.assertEqual(writes.call_count, 2)
+        self.assertNotEqual(shared.stats()["snapshot"], first)
+        self.assertEqual(os.listdir(self.snapshot_dir), [os.path.basename(shared.stats()["snapshot"])])
+        self.assertEqual(len(shared.current().rank("Aro festival")), 1)
+
+    def test_corrupt_snapshot_is_rebuilt(self):
+        shared = SharedSearchAgent(self.data_dir, snapshot_dir=self.snapshot_dir)
+        path = snapshot.snapshot_path(self.snapshot_dir, self.data_dir, shared.fingerprint())
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"not a snapshot")
+        self.assertEqual(len(shared.current().documents), 4)
+
+if __name__ == "__main__":
+    unittest.main()
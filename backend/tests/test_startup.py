@@ -0,0 +1,71 @@
+from fastapi.testclient import TestClient
+import sys
+import os
+import asyncio
+import subprocess
+from unittest.mock import MagicMock
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.main import app
+from backend.schemas import NarrativeResponse
+from backend.semantic_cache import SemanticCache
+
+client = TestClient(app)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+
+def test_importing_main_leaves_the_rag_stack_unloaded():
+    snippet = ("import sys, backend.main; "
+               "print(sorted(m for m in ('langchain', 'langchain_core', 'backend.rag', 'backend.ingest') "
+               "if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip().splitlines()[-1] == "[]"
+
+def swap_state(main_module, **values):
+    names = ("get_qa_chain", "ingest_documents", "semantic_cache", "process_query", "rag_state", "import_rag_stack")
+    saved = {name: getattr(main_module, name) for name in names}
+    for name, value in values.items():
+        setattr(main_module, name, value)
+    return saved
+
+def test_warm_rag_switches_modes_in_one_step():
+    import backend.main as main_module
+
+    processor = MagicMock(return_value=NarrativeResponse(narrative="RAG answer.", metadata={}))
+    factory = MagicMock(return_value=processor)
+    ingest = MagicMock()
+    saved = swap_state(main_module, get_qa_chain=None, ingest_documents=None, process_query=None,
+                       import_rag_stack=lambda: (factory, ingest, SemanticCache))
+    main_module.response_cache.clear()
+    try:
+        local = client.post("/generate", json={"query": "Owu Wars"}).json()
+        assert local["metadata"]["mode"] == "Local Search"
+
+        asyncio.run(main_module.warm_rag())
+        assert main_module.process_query is processor
+        assert main_module.get_qa_chain is factory
+        assert isinstance(main_module.semantic_cache, SemanticCache)
+
+        status = client.get("/status").json()
+        assert status["mode"] == "RAG"
+        assert status["rag_state"] == "ready"
+        assert status["startup"]["rag_ready"] is not None
+        assert client.post("/generate", json={"query": "Owu Wars"}).json()["narrative"] == "RAG answer."
+    finally:
+        swap_state(main_module, **saved)
+        main_module.response_cache.clear()
+
+def test_missing_rag_dependencies_keep_local_mode():
+    import backend.main as main_module
+
+    saved = swap_state(main_module, get_qa_chain=None, ingest_documents=None, process_query=None,
+                       import_rag_stack=lambda: None)
+    try:
+        asyncio.run(main_module.warm_rag())
+        assert main_module.rag_state == "unavailable"
+        assert main_module.process_query is None
+        assert client.get("/status").json()["mode"] == "Local Search"
+    finally:
+        swap_state(main_module, **saved)
@@ -0,0 +1,71 @@
+from fastapi.testclient import TestClient
+import sys
+import os
+import json
+from unittest.mock import MagicMock
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.main import app
+from backend.rag import NarrativeExtractor
+from backend.schemas import NarrativeResponse, TimelineEvent
+
+client = TestClient(app)
+
+def read_events(payload):
+    with client.stream("POST", "/generate/stream", json=payload) as response:
+        assert response.status_code == 200
+        return [json.loads(line) for line in response.iter_lines() if line]
+
+def test_narrative_extractor_handles_split_escapes():
+    answer = json.dumps({"narrative": "Owu l’ákọ́dá \"first\"\nline", "timeline": []})
+    extractor = NarrativeExtractor()
+    text = "".join(extractor.feed(answer[i:i + 3]) for i in range(0, len(answer), 3))
+    assert text == json.loads(answer)["narrative"]
+
+def test_local_stream_emits_ranked_paragraphs_first():
+    import backend.main as main_module
+    original_get_qa_chain = main_module.get_qa_chain
+    main_module.get_qa_chain = MagicMock(return_value=None)
+    main_module.process_query = None
+    main_module.response_cache.clear()
+
+    try:
+        events = read_events({"query": "Tell me about the Owu Wars"})
+        kinds = [e["event"] for e in events]
+        assert kinds[0] == "narrative"
+        assert kinds[-3:] == ["timeline", "sources", "done"]
+        streamed = "".join(e["delta"] for e in events if e["event"] == "narrative")
+        assert streamed == events[-1]["response"]["narrative"]
+        assert events[-1]["response"]["metadata"]["mode"] == "Local Search"
+    finally:
+        main_module.get_qa_chain = original_get_qa_chain
+        main_module.process_query = None
+        main_module.response_cache.clear()
+
+def test_rag_stream_forwards_deltas():
+    import backend.main as main_module
+
+    async def astream(query, age, education, tone):
+        yield "narrative", "The Owu "
+        yield "narrative", "Wars began."
+        yield "response", NarrativeResponse(narrative="The Owu Wars began.",
+                                            timeline=[TimelineEvent(year="1821", event="Owu War begins")])
+
+    processor = MagicMock()
+    processor.astream = astream
+    original_get_qa_chain = main_module.get_qa_chain
+    main_module.get_qa_chain = MagicMock(return_value=processor)
+    main_module.process_query = None
+    main_module.response_cache.clear()
+
+    try:
+        events = read_events({"query": "Owu Wars"})
+        assert [e["event"] for e in events] == ["narrative", "narrative", "timeline", "sources", "done"]
+        assert events[2]["timeline"][0]["year"] == "1821"
+        processor.assert_not_called()
+    finally:
+        main_module.get_qa_chain = original_get_qa_chain
+        main_module.process_query = None
+        main_module.response_cache.clear()
@@ -0,0 +1,57 @@
+from fastapi.testclient import TestClient
+import sys
+import os
+import re
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from backend.main import app
+from backend.simple_agent import SimpleSearchAgent
+from backend.timeline import extract_mentions
+
+client = TestClient(app)
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data/raw"))
+
+def test_extracts_years_and_eras_with_offsets():
+    text = "Founded in the 14th century, Owu fell in 1821. By the 1830s the Egba held Abeokuta; 1821 again."
+    mentions = {label: (start, end, offset) for label, start, end, offset in extract_mentions(text)}
+    assert mentions["1821"] == (1821, 1821, text.find("1821"))
+    assert mentions["14th century"] == (1300, 1399, text.find("14th"))
+    assert mentions["1830s"] == (1830, 1839, text.find("1830s"))
+    assert len(mentions) == 3
+
+    # The offset is the mention's own, not an earlier occurrence inside a longer number
+    text = "Catalogue no. 18210. Owu fell in 1821."
+    assert extract_mentions(text) == [("1821", 1821, 1821, text.find("in 1821") + 3)]
+
+def test_response_timeline_matches_per_request_extraction():
+    agent = SimpleSearchAgent(DATA_DIR)
+    # The last two pick paragraphs where 1830 first occurs inside "1830s", which supplies its snippet
+    for query in ["Owu Wars", "Abeokuta", "Oriki of Owu", "origins of Owu", "Abeokuta refuge settlement",
+                  "emerged respecx"]:
+        top_docs = agent.rank(query, top_k=3)
+        parts = [doc["content"] for _, doc in top_docs]
+        expected = []
+        for year in sorted(set(re.findall(r'\b(1[0-9]{3}|20[0-2][0-9])\b', "\n\n".join(parts)))):
+            part = next(p for p in parts if year in p)
+            expected.append((year, part[part.find(year):part.find(year) + 50] + "..."))
+        timeline = agent.build_response(top_docs).timeline
+        assert [(event.year, event.event) for event in timeline] == expected, query
+
+def test_timeline_endpoint_answers_ranges_from_the_index():
+    response = client.get("/timeline", params={"start": 1800, "end": 1850})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == len(data["events"]) > 0
+    starts = [event["start_year"] for event in data["events"]]
+    assert starts == sorted(starts)
+    for event in data["events"]:
+        assert event["start_year"] <= 1850 and event["end_year"] >= 1800
+        assert event["source"].endswith(".txt")
+
+    limited = client.get("/timeline", params={"start": 1800, "end": 1850, "limit": 1}).json()
+    assert limited["total"] == data["total"] and len(limited["events"]) == 1
+    assert client.get("/timeline", params={"start": 1850, "end": 1800}).status_code == 400
+    assert client.get("/timeline", params={"start": 3000, "end": 3100}).json()["events"] == []
@@ -0,0 +1,85 @@
+import sys
+import os
+import tempfile
+import unittest
+
+# Add project root to sys path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+try:
+    import numpy as np
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from backend.vector_index import NumpyVectorStore
+    from backend.ingest import ingest_documents
+except ImportError:
+    NumpyVectorStore = None
+
+TEXTS = [
+    "The Owu Kingdom was one of the oldest Yoruba kingdoms.",
+    "The Owu Wars began in 1821.",
+    "Owu-Ipole fell around 1825.",
+    "The Aro festival celebrates Owu heritage.",
+    "Olowu is the title of the king of Owu.",
+    "Many Owu people settled in Abeokuta.",
+    "Oriki Owu praises the ancestors of the kingdom.",
+]
+
+@unittest.skipIf(NumpyVectorStore is None, "numpy/langchain not installed")
+class TestNumpyVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.embedding = DeterministicFakeEmbedding(size=32)
+
+    def brute_force(self, query, k):
+        vectors = np.array(self.embedding.embed_documents(TEXTS))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        q = np.array(self.embedding.embed_query(query))
+        scores = vectors @ (q / np.linalg.norm(q))
+        return [TEXTS[i] for i in np.argsort(-scores)[:k]]
+
+    def test_top_k_matches_brute_force(self):
+        store = NumpyVectorStore.from_texts(TEXTS, self.embedding, directory=self.tmp.name)
+        for query in ["Owu Wars", "festival", "king"]:
+            results = store.similarity_search(query, k=3)
+            self.assertEqual([doc.page_content for doc in results], self.brute_force(query, 3))
+        self.assertEqual(len(store.similarity_search("Owu", k=50)), len(TEXTS))
+
+    def test_persist_and_reload_memory_maps_the_matrix(self):
+        store = NumpyVectorStore.from_texts(TEXTS, self.embedding, metadatas=[{"source": f"{i}.txt"} for i in range(len(TEXTS))],
+                                            ids=[str(i) for i in range(len(TEXTS))], directory=self.tmp.name)
+        store.persist()
+        reopened = NumpyVectorStore(self.tmp.name, self.embedding)
+        self.assertIsInstance(reopened._matrix, np.memmap)
+        results = reopened.similarity_search("Owu Wars", k=5)
+        self.assertEqual([doc.page_content for doc in results], self.brute_force("Owu Wars", 5))
+        self.assertTrue(all(doc.metadata["source"].endswith(".txt") for doc in results))
+
+    def test_delete_and_replace(self):
+        store = NumpyVectorStore.from_texts(TEXTS, self.embedding, ids=[str(i) for i in range(len(TEXTS))],
+                                            directory=self.tmp.name)
+        store.delete(ids=["0", "1"])
+        store.add_texts(["Replacement text."], ids=["2"])
+        store.persist()
+        reopened = NumpyVectorStore(self.tmp.name, self.embedding)
+        self.assertEqual(len(reopened), len(TEXTS) - 2)
+        contents = reopened.get()["documents"]
+        self.assertNotIn(TEXTS[0], contents)
+        self.assertEqual(contents.count("Replacement text."), 1)
+
+    def test_retriever_interface_with_incremental_ingest(self):
+        data_dir = tempfile.mkdtemp(dir=self.tmp.name)
+        db_dir = os.path.join(self.tmp.name, "index")
+        for i, text in enumerate(TEXTS):
+            with open(os.path.join(data_dir, f"{i}.txt"), "w", encoding="utf-8") as f:
+                f.write(text)
+        report = ingest_documents(data_dir=data_dir, db_dir=db_dir, embeddings=self.embedding, workers=1,
+                                  vectorstore_factory=lambda emb: NumpyVectorStore(db_dir, emb))
+        self.assertEqual(report["chunks_added"], len(TEXTS))
+
+        retriever = NumpyVectorStore(db_dir, self.embedding).as_retriever(search_kwargs={"k": 5})
+        docs = retriever.invoke("Owu Wars")
+        self.assertEqual([doc.page_content for doc in docs], self.brute_force("Owu Wars", 5))
+
+if __name__ == "__main__":
+    unittest.main()
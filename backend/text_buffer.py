@@ -0,0 +1,37 @@
+from array import array
+from typing import Iterator
+
+class TextBuffer:
+    """
+    Append-only store for many strings kept in one UTF-8 buffer and addressed by
+    offsets. Avoids a separate str object (and its header) per entry, and stores
+    mostly-ASCII text at one byte per character. Strings are decoded on access.
+    """
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array("q", [0])
+
+    def append(self, text: str) -> int:
+        """Stores `text` and returns its id."""
+        self._data += text.encode("utf-8")
+        self._offsets.append(len(self._data))
+        return len(self._offsets) - 2
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("TextBuffer index out of range")
+        return str(memoryview(self._data)[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._data) + self._offsets.itemsize * len(self._offsets)
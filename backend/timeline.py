@@ -0,0 +1,119 @@
+import re
+import sys
+import bisect
+from array import array
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+YEAR_PATTERN = re.compile(r'\b(1[0-9]{3}|20[0-2][0-9])\b')
+# "14th century", "19th-century", "1820s"
+ERA_PATTERN = re.compile(r'\b(?:([1-9][0-9]?)(?:st|nd|rd|th)[\s-]+centur(?:y|ies)|(1[0-9]{2}0|20[0-2]0)s)\b',
+                         re.IGNORECASE)
+# Widest span a mention can cover (a century), bounding range lookups
+MAX_SPAN = 99
+# Every place a year-like number occurs, including inside longer tokens ("1830s")
+OCCURRENCE_PATTERN = re.compile(r'(?=(1[0-9]{3}|20[0-2][0-9]))')
+
+def extract_mentions(text: str) -> List[Tuple[str, int, int, int]]:
+    """
+    (label, first year, last year, offset) for each distinct year and era mentioned
+    in `text`, the offset being where the first mention starts.
+    """
+    first = {}
+    for match in YEAR_PATTERN.finditer(text):
+        first.setdefault(match.group(1), match.start())
+    mentions = [(year, int(year), int(year), offset) for year, offset in sorted(first.items())]
+    seen = set()
+    for match in ERA_PATTERN.finditer(text):
+        label = match.group(0)
+        if label.lower() in seen:
+            continue
+        seen.add(label.lower())
+        if match.group(1):
+            start = (int(match.group(1)) - 1) * 100
+            end = start + 99
+        else:
+            start = int(match.group(2))
+            end = start + 9
+        mentions.append((label, start, end, match.start()))
+    return mentions
+
+def first_occurrences(text: str) -> List[Tuple[int, int]]:
+    """(year, offset) for each year-like number in `text`, at the offset str.find gives for it."""
+    first = {}
+    for match in OCCURRENCE_PATTERN.finditer(text):
+        first.setdefault(int(match.group(1)), match.start())
+    return sorted(first.items())
+
+def snippet(text: str, offset: int) -> str:
+    return text[offset:offset + 50] + "..."
+
+class TimelineIndex:
+    """
+    Year and era mentions of every paragraph, extracted once at load time. Rows are
+    stored per paragraph (doc_rows gives each paragraph's slice) in flat arrays,
+    with a second ordering by first year for range queries. Where each year-like
+    number first occurs in a paragraph is kept too (sliced by doc_occurrences), as
+    response timelines take a year's snippet from there even when the occurrence
+    is not a mention of its own, e.g. the "1830" of "1830s". Paragraphs are added
+    in load order with `add`; `finish` builds the year ordering.
+    """
+
+    # Row arrays shared with the index snapshot, with their array typecodes
+    ARRAYS = (("starts", "i"), ("ends", "i"), ("offsets", "q"), ("row_docs", "i"), ("doc_rows", "q"),
+              ("order", "i"), ("order_starts", "i"),
+              ("occurrence_years", "i"), ("occurrence_offsets", "q"), ("doc_occurrences", "q"))
+
+    def __init__(self, labels: Optional[Sequence[str]] = None, **arrays):
+        self.labels = labels if labels is not None else []
+        for name, typecode in self.ARRAYS:
+            setattr(self, name, arrays.get(name, array(typecode, [0] if name in ("doc_rows", "doc_occurrences") else [])))
+
+    @property
+    def documents(self) -> int:
+        return len(self.doc_rows) - 1
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def add(self, text: str) -> int:
+        """Records the mentions of the next paragraph and returns its id."""
+        for label, start, end, offset in extract_mentions(text):
+            self.labels.append(sys.intern(label))
+            self.starts.append(start)
+            self.ends.append(end)
+            self.offsets.append(offset)
+            self.row_docs.append(self.documents)
+        for year, offset in first_occurrences(text):
+            self.occurrence_years.append(year)
+            self.occurrence_offsets.append(offset)
+        self.doc_occurrences.append(len(self.occurrence_years))
+        self.doc_rows.append(len(self.starts))
+        return self.documents - 1
+
+    def finish(self):
+        order = sorted(range(len(self)), key=lambda row: (self.starts[row], self.ends[row], self.row_docs[row]))
+        self.order = array("i", order)
+        self.order_starts = array("i", (self.starts[row] for row in order))
+
+    def years(self, doc_id: int) -> Iterator[str]:
+        """The single years a paragraph mentions, in year order."""
+        for row in range(self.doc_rows[doc_id], self.doc_rows[doc_id + 1]):
+            if self.starts[row] == self.ends[row] and self.labels[row].isdigit():
+                yield self.labels[row]
+
+    def first_occurrence(self, doc_id: int, year: str) -> int:
+        """Where `year` first occurs in a paragraph, as str.find would report it; -1 if it does not."""
+        value = int(year)
+        for i in range(self.doc_occurrences[doc_id], self.doc_occurrences[doc_id + 1]):
+            if self.occurrence_years[i] == value:
+                return self.occurrence_offsets[i]
+        return -1
+
+    def between(self, start: int, end: int) -> Iterator[int]:
+        """Rows whose years overlap start..end, ordered by first year then paragraph."""
+        low = bisect.bisect_left(self.order_starts, start - MAX_SPAN)
+        high = bisect.bisect_right(self.order_starts, end)
+        for position in range(low, high):
+            row = self.order[position]
+            if self.ends[row] >= start:
+                yield row
@@ -0,0 +1,242 @@
+import os
+import json
+import uuid
+import shutil
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_DIR = os.path.join(BASE_DIR, "data", "vector_index")
+
+VECTORS_NAME = "vectors.npy"
+CHUNKS_NAME = "chunks.json"
+
+# Background ingest jobs build new store generations under <store dir>/builds/ and
+# publish one by rewriting <store dir>/CURRENT; without CURRENT the directory itself is the store
+CURRENT_NAME = "CURRENT"
+BUILDS_NAME = "builds"
+
+def store_backend() -> str:
+    """Which vector store RAG and ingestion use: VECTOR_STORE=chroma (default) or numpy."""
+    return os.getenv("VECTOR_STORE", "chroma").lower()
+
+def live_store_dir(base: str) -> str:
+    """The directory holding the live store under `base`: the generation CURRENT names, else `base`."""
+    try:
+        with open(os.path.join(base, CURRENT_NAME), "r", encoding="utf-8") as f:
+            name = f.read().strip()
+    except OSError:
+        return base
+    path = os.path.join(base, BUILDS_NAME, name)
+    return path if name and os.path.isdir(path) else base
+
+def new_store_dir(base: str, name: str) -> str:
+    """
+    Creates the generation `builds/<name>` as a copy of the live store, so an
+    incremental ingest into it only embeds what changed. The live store is not touched.
+    """
+    live = live_store_dir(base)
+    path = os.path.join(base, BUILDS_NAME, name)
+    if os.path.isdir(live):
+        ignore = shutil.ignore_patterns(BUILDS_NAME, CURRENT_NAME) if live == base else None
+        shutil.copytree(live, path, ignore=ignore)
+    else:
+        os.makedirs(path)
+    return path
+
+def publish_store_dir(base: str, path: str) -> str:
+    """Makes the generation at `path` live with one atomic replace of CURRENT. Returns the previous live directory."""
+    previous = live_store_dir(base)
+    pointer = os.path.join(base, CURRENT_NAME)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(os.path.basename(path))
+    os.replace(pointer + ".tmp", pointer)
+    return previous
+
+def restore_store_dir(base: str, previous: str):
+    """Undoes publish_store_dir, making `previous` (what it returned) live again."""
+    if os.path.abspath(previous) == os.path.abspath(base):
+        try:
+            os.remove(os.path.join(base, CURRENT_NAME))
+        except FileNotFoundError:
+            pass
+    else:
+        publish_store_dir(base, previous)
+
+def prune_store_dirs(base: str, keep: Iterable[str]):
+    """Deletes generations other than `keep` (the live one and the one it replaced, which may still be serving)."""
+    builds = os.path.join(base, BUILDS_NAME)
+    if not os.path.isdir(builds):
+        return
+    kept = {os.path.abspath(path) for path in keep}
+    for name in os.listdir(builds):
+        path = os.path.join(builds, name)
+        if os.path.abspath(path) not in kept:
+            shutil.rmtree(path, ignore_errors=True)
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process vector store for small archives. Chunk embeddings are L2-normalized
+    rows of one contiguous float32 matrix, memory-mapped read-only from `vectors.npy`,
+    and chunk ids, text and metadata sit in a compact `chunks.json` beside it. A query
+    is one matrix-vector product plus argpartition for the top k.
+
+    Writes are buffered in memory and folded into the matrix on the next search or
+    `persist()`, which rewrites both files atomically.
+    """
+
+    def __init__(self, directory: str = INDEX_DIR, embedding: Optional[Embeddings] = None):
+        self.directory = directory
+        self._embedding = embedding
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[dict] = []
+        self._pending: List[np.ndarray] = []
+        self._load()
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding
+
+    def _load(self):
+        vectors_path = os.path.join(self.directory, VECTORS_NAME)
+        chunks_path = os.path.join(self.directory, CHUNKS_NAME)
+        if not (os.path.exists(vectors_path) and os.path.exists(chunks_path)):
+            return
+        with open(chunks_path, "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        matrix = np.load(vectors_path, mmap_mode="r")
+        if matrix.shape[0] != len(chunks["ids"]):
+            raise ValueError(f"Vector index at {self.directory} is inconsistent: "
+                             f"{matrix.shape[0]} vectors for {len(chunks['ids'])} chunks. Re-run ingestion.")
+        self._matrix = matrix
+        self._ids = chunks["ids"]
+        self._texts = chunks["texts"]
+        self._metadatas = chunks["metadatas"]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _consolidate(self) -> np.ndarray:
+        """Folds buffered rows into the matrix. Caller holds the lock."""
+        if self._pending:
+            blocks = ([self._matrix] if self._matrix.shape[0] else []) + self._pending
+            self._matrix = np.ascontiguousarray(np.vstack(blocks))
+            self._pending = []
+        return self._matrix
+
+    def add_embeddings(self, texts: List[str], vectors: List[List[float]], metadatas: Optional[List[dict]] = None,
+                       ids: Optional[List[str]] = None) -> List[str]:
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in texts]
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        if not texts:
+            return []
+        block = _normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1))
+        with self._lock:
+            # Re-adding an id replaces it
+            replaced = set(ids) & set(self._ids)
+            if replaced:
+                self._delete(replaced)
+            self._pending.append(block)
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metadatas.extend(metadatas)
+        return ids
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        return self.add_embeddings(texts, self._embedding.embed_documents(texts), metadatas, ids)
+
+    def _delete(self, ids: set):
+        matrix = self._consolidate()
+        keep = [i for i, chunk_id in enumerate(self._ids) if chunk_id not in ids]
+        if len(keep) == len(self._ids):
+            return
+        self._matrix = np.ascontiguousarray(matrix[keep]) if keep else np.zeros((0, matrix.shape[1]), dtype=np.float32)
+        self._ids = [self._ids[i] for i in keep]
+        self._texts = [self._texts[i] for i in keep]
+        self._metadatas = [self._metadatas[i] for i in keep]
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if ids:
+            with self._lock:
+                self._delete(set(ids))
+        return True
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Chroma-style listing of stored chunks."""
+        with self._lock:
+            wanted = None if ids is None else set(ids)
+            rows = [i for i, chunk_id in enumerate(self._ids) if wanted is None or chunk_id in wanted]
+            result: Dict[str, Any] = {"ids": [self._ids[i] for i in rows]}
+            include = ["documents", "metadatas"] if include is None else include
+            if "documents" in include:
+                result["documents"] = [self._texts[i] for i in rows]
+            if "metadatas" in include:
+                result["metadatas"] = [self._metadatas[i] for i in rows]
+        return result
+
+    def persist(self):
+        """Writes the matrix and side file to temporary names, then swaps them in."""
+        os.makedirs(self.directory, exist_ok=True)
+        vectors_path = os.path.join(self.directory, VECTORS_NAME)
+        chunks_path = os.path.join(self.directory, CHUNKS_NAME)
+        with self._lock:
+            matrix = self._consolidate()
+            with open(vectors_path + ".tmp", "wb") as f:
+                np.save(f, matrix)
+            with open(chunks_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"ids": self._ids, "texts": self._texts, "metadatas": self._metadatas},
+                          f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(vectors_path + ".tmp", vectors_path)
+            os.replace(chunks_path + ".tmp", chunks_path)
+            # Serve from the file again rather than the in-memory copy
+            self._matrix = np.load(vectors_path, mmap_mode="r")
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        with self._lock:
+            matrix = self._consolidate()
+            ids, texts, metadatas = self._ids, self._texts, self._metadatas
+        if k <= 0 or matrix.shape[0] == 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        scores = matrix @ (query / norm if norm else query)
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(Document(id=ids[i], page_content=texts[i], metadata=dict(metadatas[i])), float(scores[i])) for i in top]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities in [-1, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, directory: str = INDEX_DIR, **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(directory, embedding)
+        store.add_texts(texts, metadatas, ids)
+        return store
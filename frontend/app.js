@@ -27,6 +27,55 @@ async function generateNarrative(query, age, education, tone) {
     }
 }
 
+// Streams /generate/stream (NDJSON). onUpdate receives the partial response as it grows;
+// resolves with the final response, or null if streaming is unavailable.
+async function generateNarrativeStream(query, age, education, tone, onUpdate) {
+    try {
+        const response = await fetch(`${API_URL}/generate/stream`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({
+                query,
+                user_age: parseInt(age),
+                education_level: education,
+                tone: tone
+            })
+        });
+        if (!response.ok || !response.body) throw new Error("Streaming not available");
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const partial = { narrative: "", timeline: [], sources: [], metadata: {} };
+        let buffer = "";
+        let final = null;
+
+        const handle = (line) => {
+            if (!line.trim()) return;
+            const msg = JSON.parse(line);
+            if (msg.event === "narrative") partial.narrative += msg.delta;
+            else if (msg.event === "timeline") partial.timeline = msg.timeline;
+            else if (msg.event === "sources") partial.sources = msg.sources;
+            else if (msg.event === "done") final = msg.response;
+            else if (msg.event === "error") throw new Error(msg.detail);
+            onUpdate(final || { ...partial });
+        };
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split("\n");
+            buffer = lines.pop();
+            lines.forEach(handle);
+        }
+        handle(buffer + decoder.decode());
+        return final || partial;
+    } catch (error) {
+        console.error("Streaming API Error:", error);
+        return null;
+    }
+}
+
 // --- Icons ---
 const Icon = ({ path, size = 20, className = "" }) => (
     <svg xmlns="http://www.w3.org/2000/svg" width={size} height={size} viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="1.5" strokeLinecap="round" strokeLinejoin="round" className={className}>
@@ -236,7 +285,14 @@ function App() {
         setLoading(true);
         setData(null); // Clear previous
 
-        const result = await generateNarrative(query, prefs.age, prefs.education, prefs.tone);
+        // Render progressively as the narrative streams in
+        let result = await generateNarrativeStream(query, prefs.age, prefs.education, prefs.tone, (partial) => {
+            setData(partial);
+            setLoading(false);
+        });
+        if (!result) {
+            result = await generateNarrative(query, prefs.age, prefs.education, prefs.tone);
+        }
         setData(result);
         setLoading(false);
     };